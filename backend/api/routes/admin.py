@@ -8,6 +8,8 @@ from core.security.security import get_admin_user, get_current_user
 from infra.db.connection import get_session
 from core.models import User, Doctor, Patient
 from core.services import user_management_service
+from core.services import dashboard_cache_service
+from core.utils import ai
 from api.schemas.users import (
     DoctorListResponse,
     GetDoctorsSchema,
@@ -45,7 +47,19 @@ async def get_dashboard_stats(
         "total_patients": total_patients,
         "pending_doctors": pending_doctors
     }
-    
+
+
+@router.get("/ml-services/status")
+async def get_ml_services_status(current_admin: User = Depends(get_admin_user())):
+    """Estado do circuit breaker, latência (p95) e hedging de cada serviço de ML."""
+    return ai.get_services_status()
+
+
+@router.get("/dashboard-cache/status")
+async def get_dashboard_cache_status(current_admin: User = Depends(get_admin_user())):
+    """Tamanho, invalidações e taxa de acerto do cache do dashboard do médico."""
+    return dashboard_cache_service.get_cache_status()
+
 @router.get("/users", response_model=list)
 async def list_users(
     filters: UserFilterSchema = Depends(),
@@ -8,6 +8,7 @@ from api.schemas.doctor_dashboard import (
     RankingsResponse,
     ScoreEvolutionResponse,
     AgeGroupAnalysisResponse,
+    DashboardSummaryResponse,
     TestDistributionResponse,
 )
 from core.models import User
@@ -93,3 +94,49 @@ def get_test_distribution(
     Retorna distribuição de testes por tipo e classificação.
     """
     return doctor_dashboard_service.get_test_distribution(session, user)
+
+
+@router.get("/summary", response_model=DashboardSummaryResponse)
+async def get_dashboard_summary(
+    user: CurrentDoctor,
+    sections: str | None = Query(
+        default=None,
+        description=(
+            "Seções separadas por vírgula: 'overview', 'rankings', 'score_evolution', "
+            "'age_group_analysis' e 'test_distribution'. Sem o parâmetro, todas."
+        ),
+    ),
+    ranking_type: str = Query(
+        default="overall",
+        description="Tipo de ranking: 'overall', 'spiral', ou 'voice'",
+    ),
+    limit: int = Query(
+        default=10,
+        ge=1,
+        le=50,
+        description="Número máximo de pacientes no ranking",
+    ),
+    time_period: str = Query(
+        default="month",
+        description="Período de análise: 'week', 'month', 'quarter', ou 'year'",
+    ),
+    test_type: str = Query(
+        default="all",
+        description="Tipo de teste: 'all', 'spiral', ou 'voice'",
+    ),
+    session: Session = Depends(get_session),
+):
+    """
+    Retorna as seções do dashboard numa única requisição, com as consultas
+    das seções rodando em paralelo. Os parâmetros das seções são os mesmos
+    dos endpoints individuais.
+    """
+    return await doctor_dashboard_service.get_dashboard_summary(
+        session.get_bind(),
+        user,
+        doctor_dashboard_service.parse_sections(sections),
+        ranking_type,
+        limit,
+        time_period,
+        test_type,
+    )
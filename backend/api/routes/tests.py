@@ -1,11 +1,19 @@
+from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, UploadFile
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, Query, Request, UploadFile
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
+from core.enums import ImageSize
 from core.models.users import User
-from core.security.security import get_doctor_user, get_patient_user
+from core.security.security import get_current_user, get_doctor_user, get_patient_user
+from core.services.test_job_service import (
+    enqueue_clinical_spiral,
+    enqueue_clinical_voice,
+    get_test_job,
+)
 from core.services.test_service import (
     get_my_spiral_image,
     get_my_test_detail,
@@ -26,6 +34,7 @@ from core.services.test_service import (
     process_voice,
     process_voice_as_practice,
 )
+from core.utils.media import media_response
 from infra.db.connection import get_session
 
 from ..schemas.tests import (
@@ -41,6 +50,7 @@ from ..schemas.tests import (
     ProcessVoiceSchema,
     SpiralImageSchema,
     SpiralTestResult,
+    TestJobStatus,
     VoiceTestResult,
 )
 
@@ -48,10 +58,22 @@ router = APIRouter(prefix="/tests", tags=["Tests"])
 
 CurrentPatient = Annotated[User, Depends(get_patient_user())]
 CurrentDoctor = Annotated[User, Depends(get_doctor_user())]
+CurrentUser = Annotated[User, Depends(get_current_user)]
+TimelineCursor = Annotated[
+    str | None,
+    Query(description="Cursor <execution_date>,<id> do último teste da página anterior"),
+]
+TimelineLimit = Annotated[int | None, Query(ge=1, le=200)]
+
+# ?async=true: o teste é salvo como PENDING e processado em segundo plano
+AsyncMode = Annotated[
+    bool,
+    Query(alias="async", description="Processa em segundo plano e responde 202"),
+]
 
 
 @router.post("/spiral/process")
-def process_spiral_test(
+async def process_spiral_test(
     user: CurrentPatient,
     session: Session = Depends(get_session),
     schema: ProcessSpiralSchema = Depends(ProcessSpiralSchema.as_form),
@@ -60,12 +82,12 @@ def process_spiral_test(
     Processa teste de espiral do paciente (salva no banco).
     Retorna apenas o resultado do modelo de ML.
     """
-    model_result, _ = process_spiral(schema, user, session)
+    model_result, _ = await process_spiral(schema, user, session)
     return model_result
 
 
 @router.post("/voice/process")
-def process_voice_test(
+async def process_voice_test(
     user: CurrentPatient,
     session: Session = Depends(get_session),
     schema: ProcessVoiceSchema = Depends(ProcessVoiceSchema.as_form),
@@ -74,36 +96,49 @@ def process_voice_test(
     Processa teste de voz do paciente (salva no banco).
     Retorna apenas o resultado do modelo de ML.
     """
-    model_result, _ = process_voice(schema, user, session)
+    model_result, _ = await process_voice(schema, user, session)
     return model_result
 
 
 @router.post("/spiral/practice", response_model=SpiralTestResult)
-def practice_spiral_test(
+async def practice_spiral_test(
     user: CurrentPatient, image: SpiralImageSchema = Depends(SpiralImageSchema.as_form)
 ):
     """
     Teste de prática de espiral (não salva no banco de dados).
     Retorna apenas o resultado do modelo de ML.
     """
-    return process_spiral_as_practice(image)
+    return await process_spiral_as_practice(image)
 
 
 @router.post("/voice/practice", response_model=VoiceTestResult)
-def practice_voice_test(user: CurrentPatient, audio_file: UploadFile):
+async def practice_voice_test(user: CurrentPatient, audio_file: UploadFile):
     """
     Teste de prática de voz (não salva no banco de dados).
     Retorna apenas o resultado do modelo de ML.
     """
-    return process_voice_as_practice(audio_file)
+    return await process_voice_as_practice(audio_file)
 
 
 # Endpoints para testes clínicos (iniciados pelo médico)
 
 
-@router.post("/clinical/spiral/process", response_model=ClinicalSpiralTestResult)
-def process_clinical_spiral_test(
+def _accepted(job: TestJobStatus) -> JSONResponse:
+    return JSONResponse(
+        status_code=HTTPStatus.ACCEPTED,
+        content=jsonable_encoder(job),
+        headers={"Location": job.status_url},
+    )
+
+
+@router.post(
+    "/clinical/spiral/process",
+    response_model=ClinicalSpiralTestResult,
+    responses={HTTPStatus.ACCEPTED.value: {"model": TestJobStatus}},
+)
+async def process_clinical_spiral_test(
     user: CurrentDoctor,
+    async_mode: AsyncMode = False,
     session: Session = Depends(get_session),
     schema: ClinicalProcessSpiralSchema = Depends(ClinicalProcessSpiralSchema.as_form),
 ):
@@ -112,15 +147,23 @@ def process_clinical_spiral_test(
 
     O médico deve fornecer o patient_id do paciente vinculado que realizará o teste.
     O teste é salvo no banco de dados e retorna informações detalhadas incluindo test_id.
+    Com ?async=true retorna 202 com o job, acompanhado em /tests/jobs/{job_id}.
 
     Requer autenticação de médico.
     """
-    return process_clinical_spiral(schema, user, session)
+    if async_mode:
+        return _accepted(await enqueue_clinical_spiral(schema, user, session))
+    return await process_clinical_spiral(schema, user, session)
 
 
-@router.post("/clinical/voice/process", response_model=ClinicalVoiceTestResult)
-def process_clinical_voice_test(
+@router.post(
+    "/clinical/voice/process",
+    response_model=ClinicalVoiceTestResult,
+    responses={HTTPStatus.ACCEPTED.value: {"model": TestJobStatus}},
+)
+async def process_clinical_voice_test(
     user: CurrentDoctor,
+    async_mode: AsyncMode = False,
     session: Session = Depends(get_session),
     schema: ClinicalProcessVoiceSchema = Depends(ClinicalProcessVoiceSchema.as_form),
 ):
@@ -129,10 +172,26 @@ def process_clinical_voice_test(
 
     O médico deve fornecer o patient_id do paciente vinculado que realizará o teste.
     O teste é salvo no banco de dados e retorna informações detalhadas incluindo test_id.
+    Com ?async=true retorna 202 com o job, acompanhado em /tests/jobs/{job_id}.
 
     Requer autenticação de médico.
     """
-    return process_clinical_voice(schema, user, session)
+    if async_mode:
+        return _accepted(await enqueue_clinical_voice(schema, user, session))
+    return await process_clinical_voice(schema, user, session)
+
+
+@router.get("/jobs/{job_id}", response_model=TestJobStatus)
+def get_test_job_status(
+    user: CurrentUser, job_id: int, session: Session = Depends(get_session)
+):
+    """
+    Estado de um teste enviado com ?async=true: PENDING, PROCESSING, COMPLETED
+    (com o resultado) ou FAILED (com o motivo).
+
+    Disponível para o médico que conduziu o teste e para o paciente.
+    """
+    return get_test_job(session, user, job_id)
 
 
 @router.get("/{patient_id}", response_model=list[BasicTestReturn])
@@ -172,13 +231,20 @@ def get_patient_statistics(
 
 @router.get("/patient/{patient_id}/timeline", response_model=PatientTestTimeline)
 def get_patient_timeline(
-    user: CurrentDoctor, patient_id: int, session: Session = Depends(get_session)
+    user: CurrentDoctor,
+    patient_id: int,
+    before: TimelineCursor = None,
+    limit: TimelineLimit = None,
+    session: Session = Depends(get_session),
 ):
     """
-    Retorna timeline completa de testes de um paciente ordenada cronologicamente.
+    Retorna timeline de testes de um paciente, do mais recente ao mais antigo.
     Útil para visualizações e gráficos de progressão.
+
+    Sem ``limit`` retorna todos os testes. Com ``limit`` retorna uma página; a
+    seguinte é pedida passando o ``next_before`` da resposta em ``before``.
     """
-    return get_patient_test_timeline(session, user, patient_id)
+    return get_patient_test_timeline(session, user, patient_id, before, limit)
 
 
 @router.get("/test/{test_id}")
@@ -199,14 +265,20 @@ def get_test_details(
 
 
 @router.get("/my-tests/timeline", response_model=PatientTestTimeline)
-def get_my_timeline(user: CurrentPatient, session: Session = Depends(get_session)):
+def get_my_timeline(
+    user: CurrentPatient,
+    before: TimelineCursor = None,
+    limit: TimelineLimit = None,
+    session: Session = Depends(get_session),
+):
     """
-    Retorna timeline completa de testes do próprio paciente ordenada cronologicamente.
+    Retorna timeline de testes do próprio paciente, do mais recente ao mais antigo.
     Útil para visualizações e gráficos de progressão do paciente.
+    Aceita a mesma paginação (``before``/``limit``) da timeline do médico.
 
     Requer autenticação de paciente.
     """
-    return get_my_tests_timeline(session, user)
+    return get_my_tests_timeline(session, user, before, limit)
 
 
 @router.get("/my-tests/statistics", response_model=PatientTestStatistics)
@@ -240,44 +312,42 @@ def get_my_test_details(
 
 @router.get("/my-tests/{test_id}/spiral-image")
 def get_my_test_spiral_image(
-    user: CurrentPatient, test_id: int, session: Session = Depends(get_session)
+    request: Request,
+    user: CurrentPatient,
+    test_id: int,
+    size: ImageSize = ImageSize.ORIGINAL,
+    session: Session = Depends(get_session),
 ):
     """
     Retorna a imagem de um teste de espiral do próprio paciente.
 
     O paciente só pode visualizar imagens de seus próprios testes.
-    Retorna a imagem como arquivo binário.
+    Retorna a imagem em streaming, com ETag e suporte a Range (206).
+    Use ``?size=thumb`` (160 px) ou ``?size=medium`` (640 px) em listagens e
+    prévias para receber a versão reduzida em WebP.
 
     Requer autenticação de paciente.
     """
-    image_data, filename, content_type = get_my_spiral_image(session, user, test_id)
-
-    return Response(
-        content=image_data,
-        media_type=content_type,
-        headers={"Content-Disposition": f'inline; filename="{filename}"'},
-    )
+    return media_response(request, get_my_spiral_image(session, user, test_id, size))
 
 
 @router.get("/my-tests/{test_id}/voice-audio")
 def get_my_test_voice_audio(
-    user: CurrentPatient, test_id: int, session: Session = Depends(get_session)
+    request: Request,
+    user: CurrentPatient,
+    test_id: int,
+    session: Session = Depends(get_session),
 ):
     """
     Retorna o áudio de um teste de voz do próprio paciente.
 
     O paciente só pode visualizar áudios de seus próprios testes.
-    Retorna o áudio como arquivo binário.
+    Retorna o áudio em streaming, com ETag e suporte a Range (206), para o
+    player buscar só o trecho do seek.
 
     Requer autenticação de paciente.
     """
-    audio_data, filename, content_type = get_my_voice_audio(session, user, test_id)
-
-    return Response(
-        content=audio_data,
-        media_type=content_type,
-        headers={"Content-Disposition": f'inline; filename="{filename}"'},
-    )
+    return media_response(request, get_my_voice_audio(session, user, test_id))
 
 
 # Endpoints para recuperar mídias (imagens e áudios) dos testes
@@ -285,41 +355,39 @@ def get_my_test_voice_audio(
 
 @router.get("/test/{test_id}/spiral-image")
 def get_test_spiral_image(
-    user: CurrentDoctor, test_id: int, session: Session = Depends(get_session)
+    request: Request,
+    user: CurrentDoctor,
+    test_id: int,
+    size: ImageSize = ImageSize.ORIGINAL,
+    session: Session = Depends(get_session),
 ):
     """
     Retorna a imagem de um teste de espiral.
 
     O médico só pode visualizar imagens de testes de seus pacientes vinculados.
-    Retorna a imagem como arquivo binário.
+    Retorna a imagem em streaming, com ETag e suporte a Range (206).
+    Use ``?size=thumb`` (160 px) ou ``?size=medium`` (640 px) em listagens e
+    prévias para receber a versão reduzida em WebP.
 
     Requer autenticação de médico.
     """
-    image_data, filename, content_type = get_spiral_image(session, user, test_id)
-
-    return Response(
-        content=image_data,
-        media_type=content_type,
-        headers={"Content-Disposition": f'inline; filename="{filename}"'},
-    )
+    return media_response(request, get_spiral_image(session, user, test_id, size))
 
 
 @router.get("/test/{test_id}/voice-audio")
 def get_test_voice_audio(
-    user: CurrentDoctor, test_id: int, session: Session = Depends(get_session)
+    request: Request,
+    user: CurrentDoctor,
+    test_id: int,
+    session: Session = Depends(get_session),
 ):
     """
     Retorna o áudio de um teste de voz.
 
     O médico só pode visualizar áudios de testes de seus pacientes vinculados.
-    Retorna o áudio como arquivo binário.
+    Retorna o áudio em streaming, com ETag e suporte a Range (206), para o
+    player buscar só o trecho do seek.
 
     Requer autenticação de médico.
     """
-    audio_data, filename, content_type = get_voice_audio(session, user, test_id)
-
-    return Response(
-        content=audio_data,
-        media_type=content_type,
-        headers={"Content-Disposition": f'inline; filename="{filename}"'},
-    )
+    return media_response(request, get_voice_audio(session, user, test_id))
@@ -85,3 +85,13 @@ class TestDistributionResponse(BaseModel):
     spiral_tests: TestTypeData
     voice_tests: TestTypeData
     by_classification: dict[str, int]  # {"healthy": 10, "parkinson": 5}
+
+
+class DashboardSummaryResponse(BaseModel):
+    """Seções do dashboard do médico numa única resposta; as não pedidas ficam nulas"""
+
+    overview: DashboardOverviewResponse | None = None
+    rankings: RankingsResponse | None = None
+    score_evolution: ScoreEvolutionResponse | None = None
+    age_group_analysis: AgeGroupAnalysisResponse | None = None
+    test_distribution: TestDistributionResponse | None = None
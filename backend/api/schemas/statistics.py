@@ -16,6 +16,15 @@ class GenderAverages(BaseModel):
     female: float | None = None
 
 
+class CohortPercentiles(BaseModel):
+    """Percentil do paciente dentro de cada recorte da sua coorte (0-100)"""
+
+    age_group: float | None = None
+    gender: float | None = None
+    state: float | None = None
+    city: float | None = None
+
+
 class PatientDemographics(BaseModel):
     """Informações demográficas do paciente"""
 
@@ -50,6 +59,11 @@ class ComparativeStatistics(BaseModel):
 
     # Posição do paciente
     patient_percentile: float | None = None  # 0-100
+    cohort_percentiles: CohortPercentiles = CohortPercentiles()
+
+    # Erro máximo dos percentis acima, em pontos percentuais (0 no modo exato)
+    patient_percentile_max_error: float | None = None
+    cohort_percentiles_max_error: CohortPercentiles = CohortPercentiles()
 
     # Informações demográficas do paciente
     demographics: PatientDemographics
@@ -1,10 +1,10 @@
 from datetime import datetime
-from typing import Dict, Literal, Optional
+from typing import Dict, Literal, Optional, Union
 
 from fastapi import File, Form, UploadFile
 from pydantic import BaseModel, ConfigDict, Field
 
-from core.enums import SpiralMethods, TestType
+from core.enums import SpiralMethods, TestStatus, TestType
 
 
 class SpiralImageSchema(BaseModel):
@@ -275,6 +275,20 @@ class ClinicalVoiceTestResult(BaseModel):
     )
 
 
+class TestJobStatus(BaseModel):
+    """Estado de um teste clínico enviado para processamento assíncrono"""
+
+    job_id: int = Field(..., description="ID do teste (e do job de processamento)")
+    test_type: TestType
+    status: TestStatus
+    attempts: int = Field(..., description="Tentativas de processamento já feitas")
+    error: Optional[str] = Field(None, description="Motivo da falha, se houver")
+    status_url: str = Field(..., description="Endpoint para acompanhar o job")
+    result: Optional[Union[ClinicalSpiralTestResult, ClinicalVoiceTestResult]] = Field(
+        None, description="Resultado do teste, quando concluído"
+    )
+
+
 # Schemas para perfil e estatísticas do paciente
 
 
@@ -350,3 +364,7 @@ class PatientTestTimeline(BaseModel):
         ..., description="Lista de testes ordenados cronologicamente"
     )
     total_count: int = Field(..., description="Total de testes")
+    next_before: Optional[str] = Field(
+        None,
+        description="Cursor da próxima página (parâmetro before); nulo na última página",
+    )
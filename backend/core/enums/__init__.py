@@ -1,7 +1,7 @@
 from .bind_enum import BindEnum
 from .note_enum import NoteCategory
 from .notification_enum import NotificationType
-from .test_enum import SpiralMethods, TestType
+from .test_enum import ImageSize, SpiralMethods, TestStatus, TestType
 from .user_enum import Gender, UserType
 
 # noqa
@@ -10,7 +10,9 @@ __all__ = [
     "UserType",
     "Gender",
     "TestType",
+    "TestStatus",
     "SpiralMethods",
+    "ImageSize",
     "NoteCategory",
     "NotificationType",
 ]
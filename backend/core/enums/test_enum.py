@@ -9,3 +9,18 @@ class TestType(Enum):
 class SpiralMethods(Enum):
     PAPER = 1
     WEBCAM = 2
+
+
+class TestStatus(str, Enum):
+    PENDING = "PENDING"
+    PROCESSING = "PROCESSING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+
+class ImageSize(str, Enum):
+    """Versões servidas da imagem da espiral (miniaturas geradas no upload)."""
+
+    THUMB = "thumb"
+    MEDIUM = "medium"
+    ORIGINAL = "original"
@@ -1,4 +1,5 @@
 from .address import Address
+from .cohort import CohortAggregate, ScoreSketchBucket
 from .note import Note
 from .notification import Notification
 from .tests import SpiralTest, Test, VoiceTest
@@ -7,6 +8,8 @@ from .users import Bind, Doctor, Patient, User, Admin, UserType
 
 __all__ = [
     "Address",
+    "CohortAggregate",
+    "ScoreSketchBucket",
     "User",
     "Patient",
     "Doctor",
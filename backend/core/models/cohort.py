@@ -0,0 +1,39 @@
+from sqlalchemy import SmallInteger, String
+from sqlalchemy.dialects.postgresql import ENUM as PG_ENUM
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.enums import Gender
+from core.models.table_registry import table_registry
+
+
+@table_registry.mapped_as_dataclass
+class CohortAggregate:
+    """
+    Soma e contagem dos scores dos pacientes que compartilham dados, por coorte
+    (faixa etária, gênero, cidade e estado). Mantida por core.services.cohort_service.
+    """
+    __tablename__ = "cohort_aggregate"
+
+    age_group: Mapped[str] = mapped_column(String(8), primary_key=True)
+    gender: Mapped[Gender] = mapped_column(
+        PG_ENUM(Gender, name="gender_enum", create_type=False), primary_key=True
+    )
+    city: Mapped[str] = mapped_column(primary_key=True)
+    state: Mapped[str] = mapped_column(primary_key=True)
+    patient_count: Mapped[int] = mapped_column(default=0, nullable=False)
+    score_sum: Mapped[float] = mapped_column(default=0.0, nullable=False)
+    score_count: Mapped[int] = mapped_column(default=0, nullable=False)
+
+
+@table_registry.mapped_as_dataclass
+class ScoreSketchBucket:
+    """
+    Um balde do histograma (sketch) das médias por paciente de uma coorte:
+    quantos pacientes têm a média naquela faixa de score. Mantido por
+    core.services.cohort_service e lido por core.services.percentile_service.
+    """
+    __tablename__ = "score_sketch_bucket"
+
+    sketch: Mapped[str] = mapped_column(String(160), primary_key=True)
+    bucket: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    patients: Mapped[int] = mapped_column(default=0, nullable=False)
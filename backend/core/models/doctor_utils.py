@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import ForeignKey, LargeBinary
+from sqlalchemy import ForeignKey, LargeBinary, String
 from core.enums.doctor_enum import ActivityType, DocumentType
 from core.models.table_registry import table_registry
 from sqlalchemy.orm import Mapped, mapped_column
@@ -14,9 +14,15 @@ class DoctorDocument:
         PG_ENUM(DocumentType, name="document_type_enum"), nullable=False
     )
     file_name: Mapped[str] = mapped_column(nullable=False)
-    file_data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
     file_size: Mapped[int] = mapped_column(nullable=False)
     mime_type: Mapped[str] = mapped_column(nullable=False)
+    # SHA-256 do arquivo no blob store
+    file_key: Mapped[str | None] = mapped_column(String(64), nullable=True, default=None)
+    # Legado: documentos anteriores ao blob store (migrados para file_key)
+    # Adiado e com raiseload: só o download do documento o carrega
+    file_data: Mapped[bytes | None] = mapped_column(
+        LargeBinary, nullable=True, default=None, deferred=True, deferred_raiseload=True
+    )
     uploaded_at: Mapped[datetime] = mapped_column(default_factory=datetime.now, init=False)
     verified: Mapped[bool] = mapped_column(default=False, init=False)
     verified_by_admin_id: Mapped[int | None] = mapped_column(nullable=True, init=False)
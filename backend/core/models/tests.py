@@ -1,11 +1,17 @@
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey, Integer, LargeBinary, String, func
+from sqlalchemy import ForeignKey, Integer, LargeBinary, String, Text, event, func
 from sqlalchemy.dialects.postgresql import ENUM as PG_ENUM, JSONB
-from sqlalchemy.orm import Mapped, mapped_column, relationship
-
-from core.enums import SpiralMethods, TestType
+from sqlalchemy.orm import (
+    Mapped,
+    Session,
+    mapped_column,
+    relationship,
+    with_loader_criteria,
+)
+
+from core.enums import SpiralMethods, TestStatus, TestType
 from core.models.table_registry import table_registry
 
 if TYPE_CHECKING:
@@ -21,10 +27,25 @@ class Test:
     test_type: Mapped[TestType] = mapped_column(
         "type", PG_ENUM(TestType, name="test_type_enum", create_type=True)
     )
-    score: Mapped[float] = mapped_column(nullable=False)
+    # Nulo enquanto o teste aguarda o processamento assíncrono
+    score: Mapped[float | None] = mapped_column(nullable=True)
     patient_id: Mapped[int] = mapped_column(ForeignKey("patient.id"))
     doctor_id: Mapped[int] = mapped_column(ForeignKey("doctor.id"))
 
+    # Estado do processamento (fila de jobs de inferência)
+    status: Mapped[TestStatus] = mapped_column(
+        PG_ENUM(TestStatus, name="test_status_enum", create_type=True),
+        init=False,
+        default=TestStatus.COMPLETED,
+    )
+    attempts: Mapped[int] = mapped_column(init=False, default=0)
+    available_at: Mapped[datetime | None] = mapped_column(
+        init=False,
+        default=None,
+        doc="Quando o job pode ser (re)tentado; durante o processamento, fim do lease",
+    )
+    error_message: Mapped[str | None] = mapped_column(Text, init=False, default=None)
+
     # Relação com paciente
     patient: Mapped["Patient"] = relationship(
         "Patient", foreign_keys=[patient_id], init=False
@@ -48,9 +69,22 @@ class VoiceTest(Test):
     id: Mapped[int] = mapped_column(ForeignKey("test.id"), primary_key=True, init=False)
     record_duration: Mapped[float] = mapped_column(nullable=False)
 
-    # Campos para armazenar o áudio
+    # Campos para armazenar o áudio (bytes no blob store, referência aqui)
+    voice_audio_key: Mapped[str | None] = mapped_column(
+        String(64), nullable=True, default=None, doc="SHA-256 do áudio no blob store"
+    )
+    voice_audio_size: Mapped[int | None] = mapped_column(
+        Integer, nullable=True, default=None, doc="Tamanho do áudio em bytes"
+    )
+    # Bytes nunca entram nas consultas por padrão (acesso sem undefer() levanta
+    # erro); só os endpoints de mídia os carregam explicitamente
     voice_audio_data: Mapped[bytes | None] = mapped_column(
-        LargeBinary, nullable=True, default=None, doc="Áudio da voz em bytes"
+        LargeBinary,
+        nullable=True,
+        default=None,
+        deferred=True,
+        deferred_raiseload=True,
+        doc="Legado: áudio em bytes, anterior ao blob store (migrado para voice_audio_key)",
     )
     voice_audio_filename: Mapped[str | None] = mapped_column(
         String, nullable=True, default=None, doc="Nome original do arquivo de áudio"
@@ -61,6 +95,9 @@ class VoiceTest(Test):
     raw_parkinson_probability: Mapped[float | None] = mapped_column(
         nullable=True, default=None, doc="Probabilidade original de Parkinson retornada pelo modelo (0.0-1.0)"
     )
+    voice_analysis: Mapped[str | None] = mapped_column(
+        Text, nullable=True, default=None, doc="Texto de análise retornado pelo modelo"
+    )
 
     __mapper_args__ = {
         "polymorphic_identity": TestType.VOICE_TEST,
@@ -77,9 +114,21 @@ class SpiralTest(Test):
         "method", PG_ENUM(SpiralMethods, name="spiral_methods_enum", create_type=True)
     )
 
-    # Campos para armazenar a imagem
+    # Campos para armazenar a imagem (bytes no blob store, referência aqui)
+    spiral_image_key: Mapped[str | None] = mapped_column(
+        String(64), nullable=True, default=None, doc="SHA-256 da imagem no blob store"
+    )
+    spiral_image_size: Mapped[int | None] = mapped_column(
+        Integer, nullable=True, default=None, doc="Tamanho da imagem em bytes"
+    )
+    # Ver voice_audio_data: adiado e com raiseload
     spiral_image_data: Mapped[bytes | None] = mapped_column(
-        LargeBinary, nullable=True, default=None, doc="Imagem da espiral em bytes"
+        LargeBinary,
+        nullable=True,
+        default=None,
+        deferred=True,
+        deferred_raiseload=True,
+        doc="Legado: imagem em bytes, anterior ao blob store (migrada para spiral_image_key)",
     )
     spiral_image_filename: Mapped[str | None] = mapped_column(
         String, nullable=True, default=None, doc="Nome original do arquivo de imagem"
@@ -87,6 +136,13 @@ class SpiralTest(Test):
     spiral_image_content_type: Mapped[str | None] = mapped_column(
         String, nullable=True, default=None, doc="Content-Type do arquivo (ex: image/png)"
     )
+    # Versões reduzidas (WebP) geradas no upload, para listagens e prévias
+    spiral_thumb_key: Mapped[str | None] = mapped_column(
+        String(64), nullable=True, default=None, doc="SHA-256 da miniatura no blob store"
+    )
+    spiral_medium_key: Mapped[str | None] = mapped_column(
+        String(64), nullable=True, default=None, doc="SHA-256 da versão média no blob store"
+    )
 
     # Campos para armazenar resultados dos modelos
     model_predictions: Mapped[dict | None] = mapped_column(
@@ -131,3 +187,23 @@ class SpiralTest(Test):
     __mapper_args__ = {
         "polymorphic_identity": TestType.SPIRAL_TEST,
     }
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _hide_unfinished_tests(execute_state):
+    """
+    Testes ainda na fila (ou que falharam) não têm score: ficam fora de toda
+    consulta ORM, a menos que ela peça
+    ``execution_options(include_unfinished_tests=True)``.
+    """
+    if (
+        execute_state.is_select
+        and not execute_state.is_column_load
+        and not execute_state.is_relationship_load
+        and not execute_state.execution_options.get("include_unfinished_tests", False)
+    ):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(
+                Test, Test.status == TestStatus.COMPLETED, include_aliases=True
+            )
+        )
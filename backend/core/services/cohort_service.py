@@ -0,0 +1,271 @@
+"""
+Agregados por coorte dos pacientes que compartilham dados, usados nas
+estatísticas comparativas.
+
+Duas tabelas, mantidas incrementalmente pelos eventos de flush da sessão, na
+mesma transação da alteração:
+
+- ``cohort_aggregate``: por (faixa etária, gênero, cidade, estado), o número
+  de pacientes e a soma e contagem dos scores;
+- ``score_sketch_bucket``: histogramas das médias por paciente (um global e um
+  por faixa etária, gênero, estado e cidade), lidos por percentile_service.
+
+Antes do flush é lida a contribuição atual de cada paciente afetado (teste
+concluído ou mudança de consentimento, nascimento, gênero ou endereço); depois
+do flush, a nova. A diferença entre as duas é aplicada com upserts atômicos.
+
+A faixa etária muda com os aniversários sem nenhuma escrita no banco, então
+``rebuild_cohort_aggregates`` recalcula as duas tabelas e deve rodar uma vez
+por dia (``python -m infra.db.rebuild_cohorts``).
+"""
+
+from collections import Counter, defaultdict
+from datetime import date
+from typing import NamedTuple
+
+from sqlalchemy import Connection, Table, delete, event, func, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..enums import Gender, TestStatus
+from ..models import Address, CohortAggregate, Patient, ScoreSketchBucket, Test
+
+# Atributos do paciente que definem a coorte ou a participação nela
+_COHORT_ATTRIBUTES = (
+    "share_data_for_statistics",
+    "birthdate",
+    "gender",
+    "address_id",
+    "address",
+)
+
+# Baldes de largura fixa sobre o domínio do score (0.0-1.0)
+SKETCH_BUCKETS = 100
+GLOBAL_SKETCH = "global"
+
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+class CohortKey(NamedTuple):
+    age_group: str
+    gender: Gender
+    city: str
+    state: str
+
+
+def calculate_age(birthdate: date) -> int:
+    """Calcula idade a partir da data de nascimento"""
+    today = date.today()
+    return today.year - birthdate.year - ((today.month, today.day) < (birthdate.month, birthdate.day))
+
+
+def get_age_group(age: int) -> str:
+    """Retorna a faixa etária baseada na idade"""
+    if age <= 40:
+        return "0-40"
+    elif age <= 60:
+        return "41-60"
+    elif age <= 75:
+        return "61-75"
+    else:
+        return "76+"
+
+
+def cohort_key(row) -> CohortKey:
+    return CohortKey(
+        get_age_group(calculate_age(row.birthdate)), row.gender, row.city, row.state
+    )
+
+
+def sketch_names(key: CohortKey) -> dict[str, str]:
+    """Sketches de percentil em que entra um paciente da coorte ``key``, por recorte."""
+    return {
+        "global": GLOBAL_SKETCH,
+        "age_group": f"age_group:{key.age_group}",
+        "gender": f"gender:{key.gender.name}",
+        "state": f"state:{key.state}",
+        "city": f"city:{key.state}:{key.city}",
+    }
+
+
+def bucket_of(score: float) -> int:
+    # Arredonda antes de truncar: a mesma média somada em outra ordem pode
+    # diferir no último bit e não deve cair em outro balde
+    bucket = int(round(score * SKETCH_BUCKETS, 6))
+    return min(max(bucket, 0), SKETCH_BUCKETS - 1)
+
+
+def patient_contributions(connection: Connection, patient_ids=None):
+    """
+    Consentimento, dados da coorte e soma/contagem dos scores de cada paciente
+    (todos, se ``patient_ids`` for None), numa única consulta.
+    """
+    scores = select(
+        Test.patient_id,
+        func.sum(Test.score).label("score_sum"),
+        func.count().label("score_count"),
+    ).where(Test.status == TestStatus.COMPLETED)
+    patients = select(
+        Patient.id,
+        Patient.share_data_for_statistics,
+        Patient.birthdate,
+        Patient.gender,
+        Address.city,
+        Address.state,
+    ).join(Address, Patient.address_id == Address.id)
+    if patient_ids is not None:
+        scores = scores.where(Test.patient_id.in_(patient_ids))
+        patients = patients.where(Patient.id.in_(patient_ids))
+
+    scores = scores.group_by(Test.patient_id).subquery()
+    return connection.execute(
+        patients.add_columns(
+            func.coalesce(scores.c.score_sum, 0.0).label("score_sum"),
+            func.coalesce(scores.c.score_count, 0).label("score_count"),
+        ).outerjoin(scores, scores.c.patient_id == Patient.id)
+    ).all()
+
+
+class _Deltas:
+    """Diferenças acumuladas nas duas tabelas, aplicadas de uma vez no fim."""
+
+    def __init__(self):
+        self.cohorts = defaultdict(lambda: [0, 0.0, 0])
+        self.buckets = Counter()
+
+    def add(self, row, sign: int) -> None:
+        if not row.share_data_for_statistics:
+            return
+        key = cohort_key(row)
+        totals = self.cohorts[key]
+        totals[0] += sign
+        totals[1] += sign * row.score_sum
+        totals[2] += sign * row.score_count
+        if row.score_count:
+            bucket = bucket_of(row.score_sum / row.score_count)
+            for name in sketch_names(key).values():
+                self.buckets[name, bucket] += sign
+
+
+def _upsert_increment(connection: Connection, table: Table, values: dict) -> None:
+    """Insere a linha ou soma os valores nas colunas que não são chave, atomicamente."""
+    insert = _UPSERT_INSERTS[connection.dialect.name](table).values(**values)
+    connection.execute(
+        insert.on_conflict_do_update(
+            index_elements=list(table.primary_key.columns),
+            set_={
+                column.name: column + insert.excluded[column.name]
+                for column in table.columns
+                if not column.primary_key
+            },
+        )
+    )
+
+
+def _apply_deltas(connection: Connection, deltas: _Deltas) -> None:
+    for key, (patient_count, score_sum, score_count) in deltas.cohorts.items():
+        if patient_count or score_count:
+            _upsert_increment(
+                connection,
+                CohortAggregate.__table__,
+                {
+                    **key._asdict(),
+                    "patient_count": patient_count,
+                    "score_sum": score_sum,
+                    "score_count": score_count,
+                },
+            )
+    for (sketch, bucket), patients in deltas.buckets.items():
+        if patients:
+            _upsert_increment(
+                connection,
+                ScoreSketchBucket.__table__,
+                {"sketch": sketch, "bucket": bucket, "patients": patients},
+            )
+
+
+def _cohort_changed(patient: Patient) -> bool:
+    state = inspect(patient)
+    return any(state.attrs[name].history.has_changes() for name in _COHORT_ATTRIBUTES)
+
+
+def _just_completed(session: Session, test: Test) -> bool:
+    if test.status != TestStatus.COMPLETED or test.score is None:
+        return False
+    return test in session.new or inspect(test).attrs.status.history.has_changes()
+
+
+@event.listens_for(Session, "before_flush")
+def _snapshot_affected_patients(session, flush_context, instances):
+    """
+    Antes do flush, com o banco ainda no estado antigo: guarda a contribuição
+    atual dos pacientes que vão mudar de coorte, de consentimento ou ganhar
+    um teste concluído.
+    """
+    patient_ids = {
+        patient.id
+        for patient in session.dirty
+        if isinstance(patient, Patient) and _cohort_changed(patient)
+    }
+    patient_ids.update(
+        test.patient_id
+        for test in (*session.new, *session.dirty)
+        if isinstance(test, Test) and _just_completed(session, test)
+    )
+    # Testes de pacientes ainda não gravados entram com o próprio paciente
+    patient_ids.discard(None)
+    new_patients = [patient for patient in session.new if isinstance(patient, Patient)]
+    if not (patient_ids or new_patients):
+        return
+
+    before = patient_contributions(session.connection(), patient_ids) if patient_ids else []
+    session.info["cohort_changes"] = (patient_ids, new_patients, before)
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_cohort_changes(session, flush_context):
+    """Depois do flush: aplica a diferença entre a contribuição nova e a antiga."""
+    changes = session.info.pop("cohort_changes", None)
+    if changes is None:
+        return
+    patient_ids, new_patients, before = changes
+    patient_ids = patient_ids | {patient.id for patient in new_patients}
+
+    connection = session.connection()
+    deltas = _Deltas()
+    for row in before:
+        deltas.add(row, -1)
+    for row in patient_contributions(connection, patient_ids):
+        deltas.add(row, 1)
+    _apply_deltas(connection, deltas)
+
+
+def rebuild_cohort_aggregates(session: Session) -> int:
+    """
+    Recalcula do zero os agregados e os sketches, a partir dos pacientes e
+    testes. Retorna o número de coortes gravadas. Não faz commit.
+    """
+    deltas = _Deltas()
+    for row in patient_contributions(session.connection()):
+        deltas.add(row, 1)
+
+    session.execute(delete(CohortAggregate))
+    session.execute(delete(ScoreSketchBucket))
+    session.add_all(
+        CohortAggregate(
+            **key._asdict(),
+            patient_count=patient_count,
+            score_sum=score_sum,
+            score_count=score_count,
+        )
+        for key, (patient_count, score_sum, score_count) in deltas.cohorts.items()
+    )
+    session.add_all(
+        ScoreSketchBucket(sketch=sketch, bucket=bucket, patients=patients)
+        for (sketch, bucket), patients in deltas.buckets.items()
+    )
+    session.flush()
+    return len(deltas.cohorts)
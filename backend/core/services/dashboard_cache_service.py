@@ -0,0 +1,354 @@
+"""
+Cache dos resultados do dashboard do médico, por médico e parâmetros.
+
+Os dados de um dashboard só mudam quando um teste de um paciente vinculado é
+concluído (ou alterado/removido), quando um vínculo do médico muda de estado
+ou quando os dados exibidos de um paciente vinculado mudam. Em vez de chamar a
+invalidação em cada caminho de escrita (process_spiral, process_voice, a fila
+de testes, accept_bind_request, unbind_users...), os eventos da sessão fazem
+isso para qualquer escrita, como em cohort_service:
+
+- depois do flush são coletados os médicos afetados pelas linhas gravadas;
+- depois do commit as entradas desses médicos são descartadas. Um rollback
+  descarta a coleta sem invalidar nada.
+
+Backends (``DASHBOARD_CACHE_BACKEND``):
+
+- ``memory``: LRU no processo, com até ``DASHBOARD_CACHE_MAX_ENTRIES`` entradas.
+  Com vários processos, cada um só vê as próprias invalidações; o TTL limita
+  quanto tempo os outros ficam desatualizados;
+- ``redis``: compartilhado entre processos (requer o pacote ``redis``);
+- ``off``: sem cache.
+
+Cada médico tem uma geração, incrementada a cada invalidação. Um resultado
+calculado durante uma invalidação não é gravado, para não guardar dados
+anteriores ao commit.
+"""
+
+import json
+import threading
+import time
+from collections import Counter, OrderedDict
+from functools import wraps
+from inspect import signature
+from itertools import chain
+from typing import Any, Callable, get_type_hints
+
+from pydantic import TypeAdapter
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from infra.settings import settings
+
+from ..enums import BindEnum, TestStatus
+from ..models import Bind, Patient, Test
+
+# Atributos do paciente exibidos no dashboard do médico
+_DASHBOARD_PATIENT_ATTRIBUTES = ("name", "cpf", "email", "birthdate", "is_active")
+
+_MISSING = object()
+
+
+class MemoryCacheBackend:
+    """LRU em memória, compartilhado pelas threads do processo."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # (doctor_id, campo) -> (expira em, valor)
+        self._entries: OrderedDict[tuple[int, str], tuple[float, Any]] = OrderedDict()
+        self._fields: dict[int, set[str]] = {}
+        self._generations: Counter = Counter()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, doctor_id: int, field: str, adapter: TypeAdapter):
+        """(valor ou ``_MISSING``, geração atual do médico)"""
+        with self._lock:
+            generation = self._generations[doctor_id]
+            entry = self._entries.get((doctor_id, field))
+            if entry is None or entry[0] <= time.monotonic():
+                return _MISSING, generation
+            self._entries.move_to_end((doctor_id, field))
+            return entry[1], generation
+
+    def put(
+        self, doctor_id: int, field: str, value, adapter: TypeAdapter, generation
+    ) -> None:
+        with self._lock:
+            if self._generations[doctor_id] != generation:
+                return
+            self._entries[doctor_id, field] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end((doctor_id, field))
+            self._fields.setdefault(doctor_id, set()).add(field)
+            while len(self._entries) > self.max_entries:
+                (old_doctor, old_field), _ = self._entries.popitem(last=False)
+                self._discard_field(old_doctor, old_field)
+                self.evictions += 1
+
+    def invalidate(self, doctor_ids: set[int]) -> None:
+        with self._lock:
+            for doctor_id in doctor_ids:
+                self._generations[doctor_id] += 1
+                for field in self._fields.pop(doctor_id, ()):
+                    self._entries.pop((doctor_id, field), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._fields.clear()
+            self._generations.clear()
+
+    def _discard_field(self, doctor_id: int, field: str) -> None:
+        fields = self._fields.get(doctor_id)
+        if fields is not None:
+            fields.discard(field)
+            if not fields:
+                del self._fields[doctor_id]
+
+
+# Grava o campo só se a geração do médico não mudou desde a leitura
+_SET_IF_GENERATION = """
+if (redis.call('GET', KEYS[1]) or '0') == ARGV[1] then
+    redis.call('HSET', KEYS[2], ARGV[2], ARGV[3])
+    redis.call('EXPIRE', KEYS[2], ARGV[4])
+end
+"""
+
+
+class RedisCacheBackend:
+    """
+    Um hash por médico (``dashboard:{id}``), com os valores em JSON, e um
+    contador de geração (``dashboard:{id}:generation``). Invalidar apaga o
+    hash e incrementa o contador.
+    """
+
+    def __init__(self, url: str, ttl_seconds: float):
+        try:
+            import redis
+        except ImportError:
+            raise ValueError(
+                "DASHBOARD_CACHE_BACKEND='redis' requer o pacote redis instalado"
+            ) from None
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = max(int(ttl_seconds), 1)
+        self._set_if_generation = self.client.register_script(_SET_IF_GENERATION)
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return 0
+
+    @staticmethod
+    def _keys(doctor_id: int) -> tuple[str, str]:
+        return f"dashboard:{doctor_id}:generation", f"dashboard:{doctor_id}"
+
+    def get(self, doctor_id: int, field: str, adapter: TypeAdapter):
+        generation_key, hash_key = self._keys(doctor_id)
+        pipeline = self.client.pipeline(transaction=False)
+        pipeline.hget(hash_key, field)
+        pipeline.get(generation_key)
+        raw, generation = pipeline.execute()
+        generation = (generation or b"0").decode()
+        if raw is None:
+            return _MISSING, generation
+        return adapter.validate_json(raw), generation
+
+    def put(
+        self, doctor_id: int, field: str, value, adapter: TypeAdapter, generation
+    ) -> None:
+        self._set_if_generation(
+            keys=list(self._keys(doctor_id)),
+            args=[generation, field, adapter.dump_json(value), self.ttl_seconds],
+        )
+
+    def invalidate(self, doctor_ids: set[int]) -> None:
+        pipeline = self.client.pipeline(transaction=False)
+        for doctor_id in doctor_ids:
+            generation_key, hash_key = self._keys(doctor_id)
+            pipeline.incr(generation_key)
+            pipeline.delete(hash_key)
+        pipeline.execute()
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter("dashboard:*"):
+            self.client.delete(key)
+
+
+def get_cache_backend():
+    if settings.DASHBOARD_CACHE_BACKEND == "memory":
+        return MemoryCacheBackend(
+            settings.DASHBOARD_CACHE_MAX_ENTRIES, settings.DASHBOARD_CACHE_TTL_SECONDS
+        )
+    if settings.DASHBOARD_CACHE_BACKEND == "redis":
+        return RedisCacheBackend(
+            settings.DASHBOARD_CACHE_REDIS_URL, settings.DASHBOARD_CACHE_TTL_SECONDS
+        )
+    if settings.DASHBOARD_CACHE_BACKEND == "off":
+        return None
+    raise ValueError(
+        f"Backend de cache desconhecido: {settings.DASHBOARD_CACHE_BACKEND!r}"
+    )
+
+
+cache_backend = get_cache_backend()
+
+# Contadores do processo, por seção do dashboard
+hits: Counter = Counter()
+misses: Counter = Counter()
+invalidations = 0
+
+
+def cached_per_doctor(section: str):
+    """
+    Cacheia uma função ``(session, doctor, *params)`` por médico e parâmetros.
+    O tipo de retorno anotado é usado para serializar no Redis.
+    """
+
+    def decorator(fn: Callable):
+        fn_signature = signature(fn)
+        adapter = TypeAdapter(get_type_hints(fn)["return"])
+
+        @wraps(fn)
+        def wrapper(session: Session, doctor, *args, **kwargs):
+            backend = cache_backend
+            if backend is None:
+                return fn(session, doctor, *args, **kwargs)
+
+            bound = fn_signature.bind(session, doctor, *args, **kwargs)
+            bound.apply_defaults()
+            params = list(bound.arguments.items())[2:]
+            field = f"{section}:{json.dumps(params, default=str)}"
+
+            value, generation = backend.get(doctor.id, field, adapter)
+            if value is not _MISSING:
+                hits[section] += 1
+                return value
+
+            misses[section] += 1
+            value = fn(session, doctor, *args, **kwargs)
+            backend.put(doctor.id, field, value, adapter, generation)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate_doctors(doctor_ids: set[int]) -> None:
+    global invalidations
+    if cache_backend is None or not doctor_ids:
+        return
+    cache_backend.invalidate(doctor_ids)
+    invalidations += len(doctor_ids)
+
+
+def clear() -> None:
+    """Descarta todo o cache e zera os contadores."""
+    global invalidations
+    if cache_backend is not None:
+        cache_backend.clear()
+    hits.clear()
+    misses.clear()
+    invalidations = 0
+
+
+def get_cache_status() -> dict:
+    """Backend, tamanho, acertos e taxa de acerto (geral e por seção) do processo."""
+
+    def rate(hit_count: int, miss_count: int) -> float | None:
+        total = hit_count + miss_count
+        return hit_count / total if total else None
+
+    sections = sorted(set(hits) | set(misses))
+    total_hits, total_misses = sum(hits.values()), sum(misses.values())
+    return {
+        "backend": settings.DASHBOARD_CACHE_BACKEND,
+        "entries": len(cache_backend) if cache_backend is not None else 0,
+        "evictions": cache_backend.evictions if cache_backend is not None else 0,
+        "invalidations": invalidations,
+        "hits": total_hits,
+        "misses": total_misses,
+        "hit_rate": rate(total_hits, total_misses),
+        "sections": {
+            section: {
+                "hits": hits[section],
+                "misses": misses[section],
+                "hit_rate": rate(hits[section], misses[section]),
+            }
+            for section in sections
+        },
+    }
+
+
+def _affects_dashboard(session, obj, status_attribute: str, visible_status) -> bool:
+    """
+    Se a linha entra (ou entrava) no dashboard pelo seu status. Em linhas
+    alteradas o status antigo pode não estar carregado, então qualquer mudança
+    de status conta.
+    """
+    if obj in session.deleted:
+        return True
+    if getattr(obj, status_attribute) == visible_status:
+        return True
+    return obj not in session.new and (
+        inspect(obj).attrs[status_attribute].history.has_changes()
+    )
+
+
+def _patient_changed(patient: Patient) -> bool:
+    state = inspect(patient)
+    return any(
+        state.attrs[name].history.has_changes() for name in _DASHBOARD_PATIENT_ATTRIBUTES
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_affected_doctors(session, flush_context):
+    """
+    Médicos cujo dashboard muda com o que acabou de ser gravado: o médico de
+    cada vínculo que está ou estava ativo e os médicos vinculados aos pacientes
+    com teste concluído (novo, alterado ou removido) ou dados exibidos alterados.
+    """
+    if cache_backend is None:
+        return
+
+    doctor_ids = set()
+    patient_ids = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Bind) and _affects_dashboard(
+            session, obj, "status", BindEnum.ACTIVE
+        ):
+            doctor_ids.add(obj.doctor_id)
+        elif isinstance(obj, Test) and _affects_dashboard(
+            session, obj, "status", TestStatus.COMPLETED
+        ):
+            patient_ids.add(obj.patient_id)
+        elif isinstance(obj, Patient) and obj not in session.new:
+            # Paciente novo ainda não tem vínculos
+            if obj in session.deleted or _patient_changed(obj):
+                patient_ids.add(obj.id)
+
+    patient_ids.discard(None)
+    if patient_ids:
+        doctor_ids.update(
+            session.connection().scalars(
+                select(Bind.doctor_id).where(
+                    Bind.patient_id.in_(patient_ids), Bind.status == BindEnum.ACTIVE
+                )
+            )
+        )
+    if doctor_ids:
+        session.info.setdefault("dashboard_cache_doctors", set()).update(doctor_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    invalidate_doctors(session.info.pop("dashboard_cache_doctors", set()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("dashboard_cache_doctors", None)
@@ -1,5 +1,11 @@
-from datetime import datetime, timedelta
-from sqlalchemy import func, desc, and_, extract
+import asyncio
+from datetime import date, datetime, timedelta
+from http import HTTPStatus
+from typing import NamedTuple
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Engine, Select, case, distinct, func, or_, select, true
 from sqlalchemy.orm import Session
 
 from api.schemas.doctor_dashboard import (
@@ -11,197 +17,226 @@ from api.schemas.doctor_dashboard import (
     TimeSeriesDataPoint,
     AgeGroupAnalysisResponse,
     AgeGroupData,
+    DashboardSummaryResponse,
     TestDistributionResponse,
     TestTypeData,
 )
 from core.models import Bind, Patient, Test, User
 from core.enums import BindEnum, TestType
+from core.services.dashboard_cache_service import cached_per_doctor
+from core.services.patient_service import (
+    ATTENTION_MIN_AVERAGE,
+    STABLE_MIN_AVERAGE,
+    recent_averages_subquery,
+)
 
 # Threshold de classificação (mesmo valor de test_service.py)
 HEALTHY_THRESHOLD = 0.7
 
+# Faixas etárias: (idade máxima, rótulo), a última sem limite
+AGE_GROUPS = ((40, "0-40"), (60, "41-60"), (75, "61-75"), (None, "76+"))
 
-def _calculate_age(birthdate: datetime) -> int:
-    """Calcula idade baseado na data de nascimento"""
-    today = datetime.now().date()
-    birthdate_date = birthdate.date() if isinstance(birthdate, datetime) else birthdate
-    return today.year - birthdate_date.year - (
-        (today.month, today.day) < (birthdate_date.month, birthdate_date.day)
-    )
+# Seções do resumo do dashboard, na ordem da resposta
+DASHBOARD_SECTIONS = (
+    "overview",
+    "rankings",
+    "score_evolution",
+    "age_group_analysis",
+    "test_distribution",
+)
 
+RANKING_CATEGORIES = {
+    "spiral": TestType.SPIRAL_TEST,
+    "voice": TestType.VOICE_TEST,
+    "overall": None,
+}
 
-def _get_age_group(age: int) -> str:
-    """Retorna faixa etária baseado na idade"""
-    if age <= 40:
-        return "0-40"
-    elif age <= 60:
-        return "41-60"
-    elif age <= 75:
-        return "61-75"
-    else:
-        return "76+"
 
+class DoctorRef(NamedTuple):
+    """
+    Médico desacoplado da sessão, para as seções do resumo que rodam em outras
+    threads. Os widgets só leem ``doctor.id``.
+    """
 
-def _calculate_status(avg_score: float | None) -> str:
-    """Calcula status do paciente baseado na pontuação média"""
-    if avg_score is None:
-        return "stable"
-    if avg_score >= HEALTHY_THRESHOLD:
-        return "stable"
-    elif avg_score >= 0.4:
-        return "attention"
-    else:
-        return "critical"
+    id: int
 
 
-def get_dashboard_overview(session: Session, doctor: User) -> DashboardOverviewResponse:
-    """Retorna visão geral do dashboard com estatísticas agregadas"""
-
-    # Buscar IDs dos pacientes vinculados
-    linked_patient_ids = (
-        session.query(Bind.patient_id)
-        .filter(Bind.doctor_id == doctor.id, Bind.status == BindEnum.ACTIVE)
-        .all()
+def _linked_patient_ids(doctor: User) -> Select:
+    """
+    Subconsulta com os IDs dos pacientes com vínculo ativo com o médico. Cada
+    widget a usa dentro da própria consulta, sem buscar a lista antes.
+    """
+    return select(Bind.patient_id).where(
+        Bind.doctor_id == doctor.id, Bind.status == BindEnum.ACTIVE
     )
-    patient_ids = [pid[0] for pid in linked_patient_ids]
-
-    if not patient_ids:
-        return DashboardOverviewResponse(
-            total_patients=0,
-            patients_by_status=PatientsByStatus(stable=0, attention=0, critical=0),
-            total_tests=0,
-            total_tests_this_month=0,
-            avg_score_all_patients=None,
-        )
 
-    # Calcular status de cada paciente baseado nos últimos 5 testes
-    status_counts = {"stable": 0, "attention": 0, "critical": 0}
 
-    for patient_id in patient_ids:
-        last_five_tests = (
-            session.query(Test.score)
-            .filter(Test.patient_id == patient_id)
-            .order_by(desc(Test.execution_date))
-            .limit(5)
-            .all()
-        )
+def _for_type(aggregate, test_type: TestType | None):
+    """Restringe o agregado a um tipo de teste (FILTER); None mantém todos."""
+    return aggregate.filter(Test.test_type == test_type) if test_type else aggregate
+
+
+def _years_before(today: date, years: int) -> date:
+    try:
+        return today.replace(year=today.year - years)
+    except ValueError:
+        # 29 de fevereiro em ano não bissexto
+        return today.replace(year=today.year - years, day=28)
 
-        if last_five_tests:
-            avg_score = sum(score[0] for score in last_five_tests) / len(last_five_tests)
-            status = _calculate_status(avg_score)
-            status_counts[status] += 1
-        else:
-            status_counts["stable"] += 1
 
-    # Total de testes
-    total_tests = (
-        session.query(func.count(Test.id))
-        .filter(Test.patient_id.in_(patient_ids))
-        .scalar()
+def _age_group_case(birthdate):
+    """
+    Faixa etária calculada no banco. Compara a data de nascimento com as datas
+    de corte de hoje em vez de calcular a idade de cada linha: tem o mesmo
+    resultado de cohort_service.calculate_age e funciona em qualquer dialeto.
+    """
+    today = date.today()
+    *bounded, (_, last_label) = AGE_GROUPS
+    return case(
+        *(
+            (birthdate > _years_before(today, max_age + 1), label)
+            for max_age, label in bounded
+        ),
+        else_=last_label,
     )
 
-    # Testes deste mês
-    first_day_of_month = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    total_tests_this_month = (
-        session.query(func.count(Test.id))
-        .filter(
-            Test.patient_id.in_(patient_ids),
-            Test.execution_date >= first_day_of_month,
+
+@cached_per_doctor("overview")
+def get_dashboard_overview(session: Session, doctor: User) -> DashboardOverviewResponse:
+    """
+    Retorna visão geral do dashboard com estatísticas agregadas, numa única
+    consulta. O status de cada paciente vem da média dos últimos testes
+    (patient_service); pacientes sem testes contam como "stable".
+    """
+    linked = _linked_patient_ids(doctor)
+
+    patients = (
+        select(func.count().label("total_patients"))
+        .select_from(linked.subquery())
+        .subquery()
+    )
+
+    recent = recent_averages_subquery(linked)
+    statuses = (
+        select(
+            func.count()
+            .filter(
+                recent.c.avg_score < STABLE_MIN_AVERAGE,
+                recent.c.avg_score >= ATTENTION_MIN_AVERAGE,
+            )
+            .label("attention"),
+            func.count()
+            .filter(recent.c.avg_score < ATTENTION_MIN_AVERAGE)
+            .label("critical"),
         )
-        .scalar()
+        .select_from(recent)
+        .subquery()
     )
 
-    # Pontuação média de todos os pacientes
-    avg_score_result = (
-        session.query(func.avg(Test.score))
-        .filter(Test.patient_id.in_(patient_ids))
-        .scalar()
+    first_day_of_month = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    tests = (
+        select(
+            func.count(Test.id).label("total_tests"),
+            func.count(Test.id)
+            .filter(Test.execution_date >= first_day_of_month)
+            .label("total_tests_this_month"),
+            func.avg(Test.score).label("avg_score"),
+        )
+        .where(Test.patient_id.in_(linked))
+        .subquery()
     )
-    avg_score_all_patients = float(avg_score_result) if avg_score_result else None
+
+    row = session.execute(
+        select(patients, statuses, tests)
+        .select_from(patients)
+        .join(statuses, true())
+        .join(tests, true())
+    ).one()
 
     return DashboardOverviewResponse(
-        total_patients=len(patient_ids),
+        total_patients=row.total_patients,
         patients_by_status=PatientsByStatus(
-            stable=status_counts["stable"],
-            attention=status_counts["attention"],
-            critical=status_counts["critical"],
+            stable=row.total_patients - row.attention - row.critical,
+            attention=row.attention,
+            critical=row.critical,
         ),
-        total_tests=total_tests or 0,
-        total_tests_this_month=total_tests_this_month or 0,
-        avg_score_all_patients=avg_score_all_patients,
+        total_tests=row.total_tests or 0,
+        total_tests_this_month=row.total_tests_this_month or 0,
+        avg_score_all_patients=float(row.avg_score) if row.avg_score else None,
     )
 
 
+@cached_per_doctor("rankings")
 def get_rankings(
     session: Session, doctor: User, ranking_type: str = "overall", limit: int = 10
 ) -> RankingsResponse:
-    """Retorna rankings de pacientes por desempenho"""
+    """
+    Retorna rankings de pacientes por desempenho. Uma única consulta agrega os
+    testes de cada paciente por tipo (FILTER) e numera os pacientes em cada
+    ranking; só voltam os que estão entre os ``limit`` primeiros de algum.
+    """
+    columns = []
+    for category, test_type in RANKING_CATEGORIES.items():
+        columns += [
+            _for_type(func.avg(Test.score), test_type).label(f"{category}_avg"),
+            _for_type(func.count(Test.id), test_type).label(f"{category}_tests"),
+            _for_type(func.max(Test.execution_date), test_type).label(f"{category}_last"),
+        ]
 
-    # Buscar IDs dos pacientes vinculados
-    linked_patient_ids = (
-        session.query(Bind.patient_id)
-        .filter(Bind.doctor_id == doctor.id, Bind.status == BindEnum.ACTIVE)
-        .all()
+    per_patient = (
+        select(Patient.id, Patient.name, *columns)
+        .join(Test, Test.patient_id == Patient.id)
+        .where(Patient.id.in_(_linked_patient_ids(doctor)))
+        .group_by(Patient.id, Patient.name)
+        .subquery()
     )
-    patient_ids = [pid[0] for pid in linked_patient_ids]
-
-    def get_ranking_for_test_type(test_type: TestType | None):
-        query = (
-            session.query(
-                Patient.id,
-                Patient.name,
-                func.avg(Test.score).label("avg_score"),
-                func.count(Test.id).label("total_tests"),
-                func.max(Test.execution_date).label("last_test_date"),
-            )
-            .join(Test, Test.patient_id == Patient.id)
-            .filter(
-                Patient.id.in_(patient_ids),
+    ranked = select(
+        per_patient,
+        *(
+            func.row_number()
+            .over(
+                order_by=(
+                    per_patient.c[f"{category}_avg"].desc().nulls_last(),
+                    per_patient.c.id,
+                )
             )
-        )
-
-        if test_type:
-            query = query.filter(Test.test_type == test_type)
+            .label(f"{category}_rank")
+            for category in RANKING_CATEGORIES
+        ),
+    ).subquery()
 
-        results = (
-            query
-            .group_by(Patient.id, Patient.name)
-            .order_by(desc("avg_score"))
-            .limit(limit)
-            .all()
-        )
+    in_any_ranking = or_(
+        *(ranked.c[f"{category}_rank"] <= limit for category in RANKING_CATEGORIES)
+    )
+    rows = [row._mapping for row in session.execute(select(ranked).where(in_any_ranking))]
 
+    def ranking(category: str) -> list[PatientRanking]:
+        rank = f"{category}_rank"
         return [
             PatientRanking(
-                patient_id=r.id,
-                patient_name=r.name,
-                avg_score=float(r.avg_score),
-                total_tests=r.total_tests,
-                last_test_date=r.last_test_date,
+                patient_id=r["id"],
+                patient_name=r["name"],
+                avg_score=float(r[f"{category}_avg"]),
+                total_tests=r[f"{category}_tests"],
+                last_test_date=r[f"{category}_last"],
             )
-            for r in results
+            for r in sorted(rows, key=lambda r: r[rank])
+            if r[rank] <= limit and r[f"{category}_tests"]
         ]
 
     return RankingsResponse(
-        top_spiral_scores=get_ranking_for_test_type(TestType.SPIRAL_TEST),
-        top_voice_scores=get_ranking_for_test_type(TestType.VOICE_TEST),
-        top_overall_scores=get_ranking_for_test_type(None),
+        top_spiral_scores=ranking("spiral"),
+        top_voice_scores=ranking("voice"),
+        top_overall_scores=ranking("overall"),
     )
 
 
+@cached_per_doctor("score_evolution")
 def get_score_evolution(
     session: Session, doctor: User, time_period: str = "month", test_type: str = "all"
 ) -> ScoreEvolutionResponse:
     """Retorna evolução das pontuações ao longo do tempo"""
 
-    # Buscar IDs dos pacientes vinculados
-    linked_patient_ids = (
-        session.query(Bind.patient_id)
-        .filter(Bind.doctor_id == doctor.id, Bind.status == BindEnum.ACTIVE)
-        .all()
-    )
-    patient_ids = [pid[0] for pid in linked_patient_ids]
-
     # Determinar período
     if time_period == "week":
         start_date = datetime.now() - timedelta(days=7)
@@ -219,7 +254,7 @@ def get_score_evolution(
             func.count(Test.id).label("test_count"),
         )
         .filter(
-            Test.patient_id.in_(patient_ids),
+            Test.patient_id.in_(_linked_patient_ids(doctor)),
             Test.execution_date >= start_date,
         )
     )
@@ -261,151 +296,135 @@ def get_score_evolution(
     )
 
 
+@cached_per_doctor("age_group_analysis")
 def get_age_group_analysis(session: Session, doctor: User) -> AgeGroupAnalysisResponse:
-    """Retorna análise de performance por faixa etária"""
-
-    # Buscar IDs dos pacientes vinculados
-    linked_patient_ids = (
-        session.query(Bind.patient_id)
-        .filter(Bind.doctor_id == doctor.id, Bind.status == BindEnum.ACTIVE)
-        .all()
+    """
+    Retorna análise de performance por faixa etária, numa única consulta
+    agrupada pela faixa calculada no banco. Faixas sem pacientes não aparecem;
+    faixas com pacientes sem testes têm média 0.0.
+    """
+    patients = (
+        select(Patient.id, _age_group_case(Patient.birthdate).label("age_range"))
+        .where(Patient.id.in_(_linked_patient_ids(doctor)))
+        .subquery()
     )
-    patient_ids = [pid[0] for pid in linked_patient_ids]
-
-    # Buscar pacientes com testes
-    patients_with_tests = (
-        session.query(Patient.id, Patient.birthdate)
-        .filter(Patient.id.in_(patient_ids))
-        .all()
+    rows = session.execute(
+        select(
+            patients.c.age_range,
+            func.count(distinct(patients.c.id)).label("patient_count"),
+            func.avg(Test.score).label("avg_score"),
+            _for_type(func.avg(Test.score), TestType.SPIRAL_TEST).label("avg_spiral_score"),
+            _for_type(func.avg(Test.score), TestType.VOICE_TEST).label("avg_voice_score"),
+        )
+        .select_from(patients)
+        .outerjoin(Test, Test.patient_id == patients.c.id)
+        .group_by(patients.c.age_range)
     )
-
-    # Agrupar por faixa etária
-    age_groups_data = {}
-
-    for patient_id, birthdate in patients_with_tests:
-        age = _calculate_age(birthdate)
-        age_group = _get_age_group(age)
-
-        if age_group not in age_groups_data:
-            age_groups_data[age_group] = {
-                "patient_ids": [],
-                "scores": [],
-                "spiral_scores": [],
-                "voice_scores": [],
-            }
-
-        age_groups_data[age_group]["patient_ids"].append(patient_id)
-
-        # Buscar testes do paciente
-        tests = (
-            session.query(Test.score, Test.test_type)
-            .filter(Test.patient_id == patient_id)
-            .all()
+    by_range = {row.age_range: row for row in rows}
+
+    age_groups = [
+        AgeGroupData(
+            age_range=age_range,
+            avg_score=float(row.avg_score) if row.avg_score is not None else 0.0,
+            patient_count=row.patient_count,
+            avg_spiral_score=row.avg_spiral_score,
+            avg_voice_score=row.avg_voice_score,
         )
-
-        for score, test_type in tests:
-            age_groups_data[age_group]["scores"].append(score)
-            if test_type == TestType.SPIRAL_TEST:
-                age_groups_data[age_group]["spiral_scores"].append(score)
-            elif test_type == TestType.VOICE_TEST:
-                age_groups_data[age_group]["voice_scores"].append(score)
-
-    # Calcular médias
-    age_groups = []
-    for age_range in ["0-40", "41-60", "61-75", "76+"]:
-        if age_range in age_groups_data:
-            data = age_groups_data[age_range]
-            age_groups.append(
-                AgeGroupData(
-                    age_range=age_range,
-                    avg_score=sum(data["scores"]) / len(data["scores"]) if data["scores"] else 0.0,
-                    patient_count=len(data["patient_ids"]),
-                    avg_spiral_score=(
-                        sum(data["spiral_scores"]) / len(data["spiral_scores"])
-                        if data["spiral_scores"]
-                        else None
-                    ),
-                    avg_voice_score=(
-                        sum(data["voice_scores"]) / len(data["voice_scores"])
-                        if data["voice_scores"]
-                        else None
-                    ),
-                )
-            )
+        for _, age_range in AGE_GROUPS
+        if (row := by_range.get(age_range)) is not None
+    ]
 
     return AgeGroupAnalysisResponse(age_groups=age_groups)
 
 
+@cached_per_doctor("test_distribution")
 def get_test_distribution(session: Session, doctor: User) -> TestDistributionResponse:
-    """Retorna distribuição de testes por tipo e classificação"""
-
-    # Buscar IDs dos pacientes vinculados
-    linked_patient_ids = (
-        session.query(Bind.patient_id)
-        .filter(Bind.doctor_id == doctor.id, Bind.status == BindEnum.ACTIVE)
-        .all()
-    )
-    patient_ids = [pid[0] for pid in linked_patient_ids]
-
-    # Total de testes
-    total_tests = (
-        session.query(func.count(Test.id))
-        .filter(Test.patient_id.in_(patient_ids))
-        .scalar()
-    ) or 0
-
-    # Testes por tipo
-    spiral_data = (
-        session.query(func.count(Test.id), func.avg(Test.score))
-        .filter(
-            Test.patient_id.in_(patient_ids),
-            Test.test_type == TestType.SPIRAL_TEST,
-        )
-        .first()
-    )
-
-    voice_data = (
-        session.query(func.count(Test.id), func.avg(Test.score))
-        .filter(
-            Test.patient_id.in_(patient_ids),
-            Test.test_type == TestType.VOICE_TEST,
-        )
-        .first()
-    )
-
-    spiral_count = spiral_data[0] or 0
-    voice_count = voice_data[0] or 0
-
-    # Classificação (healthy vs parkinson)
-    healthy_count = (
-        session.query(func.count(Test.id))
-        .filter(
-            Test.patient_id.in_(patient_ids),
-            Test.score >= HEALTHY_THRESHOLD,
-        )
-        .scalar()
-    ) or 0
-
-    parkinson_count = (
-        session.query(func.count(Test.id))
-        .filter(
-            Test.patient_id.in_(patient_ids),
-            Test.score < HEALTHY_THRESHOLD,
-        )
-        .scalar()
-    ) or 0
+    """Retorna distribuição de testes por tipo e classificação, numa única consulta"""
+    row = session.execute(
+        select(
+            func.count(Test.id).label("total_tests"),
+            _for_type(func.count(Test.id), TestType.SPIRAL_TEST).label("spiral_count"),
+            _for_type(func.avg(Test.score), TestType.SPIRAL_TEST).label("spiral_avg"),
+            _for_type(func.count(Test.id), TestType.VOICE_TEST).label("voice_count"),
+            _for_type(func.avg(Test.score), TestType.VOICE_TEST).label("voice_avg"),
+            func.count(Test.id).filter(Test.score >= HEALTHY_THRESHOLD).label("healthy"),
+            func.count(Test.id).filter(Test.score < HEALTHY_THRESHOLD).label("parkinson"),
+        ).where(Test.patient_id.in_(_linked_patient_ids(doctor)))
+    ).one()
+
+    total_tests = row.total_tests or 0
+    spiral_count = row.spiral_count or 0
+    voice_count = row.voice_count or 0
 
     return TestDistributionResponse(
         total_tests=total_tests,
         spiral_tests=TestTypeData(
             count=spiral_count,
             percentage=(spiral_count / total_tests * 100) if total_tests > 0 else 0.0,
-            avg_score=float(spiral_data[1]) if spiral_data[1] else 0.0,
+            avg_score=float(row.spiral_avg) if row.spiral_avg else 0.0,
         ),
         voice_tests=TestTypeData(
             count=voice_count,
             percentage=(voice_count / total_tests * 100) if total_tests > 0 else 0.0,
-            avg_score=float(voice_data[1]) if voice_data[1] else 0.0,
+            avg_score=float(row.voice_avg) if row.voice_avg else 0.0,
         ),
-        by_classification={"healthy": healthy_count, "parkinson": parkinson_count},
+        by_classification={"healthy": row.healthy or 0, "parkinson": row.parkinson or 0},
+    )
+
+
+def parse_sections(sections: str | None) -> list[str]:
+    """
+    Seções pedidas em ``?sections=`` (separadas por vírgula), sem repetições e
+    na ordem de ``DASHBOARD_SECTIONS``. Sem o parâmetro, todas.
+    """
+    if not sections:
+        return list(DASHBOARD_SECTIONS)
+
+    requested = {name.strip() for name in sections.split(",") if name.strip()}
+    invalid = requested - set(DASHBOARD_SECTIONS)
+    if invalid or not requested:
+        raise HTTPException(
+            HTTPStatus.BAD_REQUEST,
+            detail=(
+                f"Seções inválidas: {', '.join(sorted(invalid)) or sections}. "
+                f"Use: {', '.join(DASHBOARD_SECTIONS)}."
+            ),
+        )
+    return [name for name in DASHBOARD_SECTIONS if name in requested]
+
+
+async def get_dashboard_summary(
+    engine: Engine,
+    doctor: User,
+    sections: list[str],
+    ranking_type: str = "overall",
+    limit: int = 10,
+    time_period: str = "month",
+    test_type: str = "all",
+) -> DashboardSummaryResponse:
+    """
+    Retorna as seções pedidas do dashboard numa única resposta. Cada seção é
+    uma consulta independente (filtrada pela subconsulta dos vínculos ativos
+    do médico), então elas rodam em paralelo, cada uma na sua sessão e
+    conexão do pool do ``engine``.
+    """
+    # O User pertence à sessão da requisição: as threads recebem só o ID
+    doctor_ref = DoctorRef(doctor.id)
+    builders = {
+        "overview": lambda session: get_dashboard_overview(session, doctor_ref),
+        "rankings": lambda session: get_rankings(session, doctor_ref, ranking_type, limit),
+        "score_evolution": lambda session: get_score_evolution(
+            session, doctor_ref, time_period, test_type
+        ),
+        "age_group_analysis": lambda session: get_age_group_analysis(session, doctor_ref),
+        "test_distribution": lambda session: get_test_distribution(session, doctor_ref),
+    }
+
+    def build(section: str):
+        with Session(engine) as session:
+            return builders[section](session)
+
+    results = await asyncio.gather(
+        *(run_in_threadpool(build, section) for section in sections)
     )
+    return DashboardSummaryResponse(**dict(zip(sections, results)))
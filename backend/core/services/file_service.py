@@ -2,7 +2,8 @@ from http import HTTPStatus
 from fastapi import UploadFile, HTTPException
 from fastapi.responses import Response
 from core.models.doctor_utils import DoctorDocument
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer
+from infra.storage.blob_store import blob_store, read_blob_or_legacy
 
 # Configurações de upload
 MAX_FILE_SIZE_MB = 10
@@ -30,11 +31,11 @@ def save_uploaded_file(
     if file_size > max_size:
         raise HTTPException(400, detail=f"Arquivo muito grande (limite: {MAX_FILE_SIZE_MB}MB)")
 
-    file_content = file.file.read()
+    file_key = blob_store.put(file.file.read())
 
     return {
         "file_name": file.filename,
-        "file_data": file_content,
+        "file_key": file_key,
         "file_size": file_size,
         "mime_type": file.content_type
     }
@@ -45,7 +46,7 @@ def get_doctor_document(
     file_id: int,
     session: Session
 ) -> Response:
-    file_info = get_doctor_document_info(doctor_id, file_id, session)
+    file_info = get_doctor_document_info(doctor_id, file_id, session, with_data=True)
 
     if not file_info:
         raise HTTPException(
@@ -54,7 +55,7 @@ def get_doctor_document(
         )
 
     return Response(
-        content=file_info.file_data,
+        content=read_blob_or_legacy(file_info.file_key, file_info.file_data),
         media_type=file_info.mime_type,
         headers={"Content-Disposition": f'attachment; filename="{file_info.file_name}"'}
     )
@@ -74,6 +75,11 @@ def get_doctor_documents_info(
 def get_doctor_document_info(
     doctor_id: int,
     file_id: int,
-    session: Session
+    session: Session,
+    with_data: bool = False
 ) -> DoctorDocument | None:
-    return session.query(DoctorDocument).filter(DoctorDocument.doctor_id == doctor_id, DoctorDocument.id == file_id).first()
\ No newline at end of file
+    query = session.query(DoctorDocument)
+    if with_data:
+        # Bytes legados (documentos ainda não migrados para o blob store)
+        query = query.options(undefer(DoctorDocument.file_data))
+    return query.filter(DoctorDocument.doctor_id == doctor_id, DoctorDocument.id == file_id).first()
\ No newline at end of file
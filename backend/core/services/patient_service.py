@@ -2,7 +2,7 @@ from datetime import date
 from http import HTTPStatus
 
 from fastapi import HTTPException
-from sqlalchemy import or_, func, desc
+from sqlalchemy import Select, Subquery, or_, func, select
 from sqlalchemy.orm import Session
 
 from api.schemas.binding import RequestBinding
@@ -17,9 +17,16 @@ from api.schemas.users import (
 from core.models import Bind, Doctor, Patient, Test, User
 from core.security.security import get_password_hash
 from core.services import address_service, user_service, notification_service
+from core.services.dashboard_cache_service import cached_per_doctor
 from core.services.user_service import get_binded_users
 
-from ..enums import BindEnum, TestType, UserType
+from ..enums import BindEnum, TestStatus, TestType, UserType
+
+# Quantidade de testes mais recentes usada no status do paciente
+RECENT_TESTS_FOR_STATUS = 5
+# Média mínima dos testes recentes para os status "stable" e "attention"
+STABLE_MIN_AVERAGE = 0.7
+ATTENTION_MIN_AVERAGE = 0.4
 
 
 def create_patient(patient: PatientSchema, session: Session, confirmation_email = True):
@@ -142,6 +149,9 @@ def get_binded_patients(session: Session, current_user: User) -> list[PatientLis
     Formato de lista (PatientListResponse)
     """
     binded_patients = get_binded_users(current_user, session)
+    statuses = get_patients_status(
+        session, [item["user"].id for item in binded_patients]
+    )
 
     patient_list = []
 
@@ -151,17 +161,7 @@ def get_binded_patients(session: Session, current_user: User) -> list[PatientLis
 
         # Calcula idade
         age = calculate_age(patient.birthdate)
-
-        # Busca últimos testes para calcular status
-        recent_tests = (
-            session.query(Test)
-            .filter(Test.patient_id == patient.id)
-            .order_by(desc(Test.execution_date))
-            .limit(5)
-            .all()
-        )
-        recent_scores = [test.score for test in recent_tests]
-        status = calculate_patient_status(recent_scores)
+        status = statuses[patient.id]
 
         patient_list.append(
             PatientListResponse(
@@ -191,26 +191,74 @@ def calculate_age(birthdate: date) -> int:
     return age
 
 
-def calculate_patient_status(recent_scores: list[float]) -> str:
+def status_from_average(avg_score: float | None) -> str:
     """
-    Calcula o status do paciente baseado nos scores recentes.
-    - stable: média >= 0.7
+    Calcula o status do paciente baseado na média dos scores recentes.
+    - stable: média >= 0.7 (ou paciente sem testes, média None)
     - attention: 0.4 <= média < 0.7
     - critical: média < 0.4
     """
-    if not recent_scores:
+    if avg_score is None or avg_score >= STABLE_MIN_AVERAGE:
         return "stable"
-
-    avg_score = sum(recent_scores) / len(recent_scores)
-
-    if avg_score >= 0.7:
-        return "stable"
-    elif avg_score >= 0.4:
+    elif avg_score >= ATTENTION_MIN_AVERAGE:
         return "attention"
     else:
         return "critical"
 
 
+def latest_tests_subquery(patient_ids: list[int] | Select) -> Subquery:
+    """
+    Testes concluídos dos pacientes numerados do mais recente para o mais
+    antigo (``position`` 1 = último teste), com o total de testes de cada um.
+    ``patient_ids`` pode ser uma lista ou um select de IDs.
+    """
+    per_patient = {
+        "partition_by": Test.patient_id,
+        "order_by": (Test.execution_date.desc(), Test.id.desc()),
+    }
+    return (
+        select(
+            Test.patient_id,
+            Test.score,
+            Test.test_type,
+            Test.execution_date,
+            func.row_number().over(**per_patient).label("position"),
+            func.count().over(partition_by=Test.patient_id).label("tests_count"),
+        )
+        .where(Test.patient_id.in_(patient_ids), Test.status == TestStatus.COMPLETED)
+        .subquery()
+    )
+
+
+def recent_averages_subquery(patient_ids: list[int] | Select) -> Subquery:
+    """Média dos últimos ``RECENT_TESTS_FOR_STATUS`` testes de cada paciente."""
+    latest = latest_tests_subquery(patient_ids)
+    return (
+        select(latest.c.patient_id, func.avg(latest.c.score).label("avg_score"))
+        .where(latest.c.position <= RECENT_TESTS_FOR_STATUS)
+        .group_by(latest.c.patient_id)
+        .subquery()
+    )
+
+
+def get_patients_status(session: Session, patient_ids: list[int]) -> dict[int, str]:
+    """
+    Status de cada paciente pela média dos últimos ``RECENT_TESTS_FOR_STATUS``
+    testes, numa única consulta para todos os pacientes. Pacientes sem testes
+    ficam como "stable".
+    """
+    if not patient_ids:
+        return {}
+
+    recent = recent_averages_subquery(patient_ids)
+    averages = dict(session.execute(select(recent.c.patient_id, recent.c.avg_score)).all())
+    return {
+        patient_id: status_from_average(averages.get(patient_id))
+        for patient_id in patient_ids
+    }
+
+
+@cached_per_doctor("patients")
 def get_patients_dashboard_data(
     session: Session, current_user: User
 ) -> list[PatientDashboardResponse]:
@@ -219,6 +267,24 @@ def get_patients_dashboard_data(
     Inclui informações de testes, idade, status, etc.
     """
     binded_patients = get_binded_users(current_user, session)
+    patient_ids = [item["user"].id for item in binded_patients]
+    statuses = get_patients_status(session, patient_ids)
+
+    # Último teste e total de testes de todos os pacientes numa consulta
+    last_tests = {}
+    if patient_ids:
+        latest = latest_tests_subquery(patient_ids)
+        last_tests = {
+            row.patient_id: row
+            for row in session.execute(
+                select(
+                    latest.c.patient_id,
+                    latest.c.test_type,
+                    latest.c.execution_date,
+                    latest.c.tests_count,
+                ).where(latest.c.position == 1)
+            )
+        }
 
     dashboard_data = []
 
@@ -229,18 +295,8 @@ def get_patients_dashboard_data(
         # Calcula idade
         age = calculate_age(patient.birthdate)
 
-        # Busca todos os testes do paciente
-        all_tests = (
-            session.query(Test)
-            .filter(Test.patient_id == patient.id)
-            .order_by(desc(Test.execution_date))
-            .all()
-        )
-
-        tests_count = len(all_tests)
-
-        # Busca último teste
-        last_test = all_tests[0] if all_tests else None
+        last_test = last_tests.get(patient.id)
+        tests_count = last_test.tests_count if last_test else 0
         last_test_date = last_test.execution_date.isoformat() if last_test else None
         last_test_type = None
 
@@ -250,9 +306,7 @@ def get_patients_dashboard_data(
             elif last_test.test_type == TestType.VOICE_TEST:
                 last_test_type = "voice"
 
-        # Calcula status baseado nos últimos 5 testes
-        recent_scores = [test.score for test in all_tests[:5]]
-        status = calculate_patient_status(recent_scores)
+        status = statuses[patient.id]
 
         dashboard_data.append(
             PatientDashboardResponse(
@@ -301,16 +355,7 @@ def get_patient_full_profile(
     # Calcula idade
     age = calculate_age(patient.birthdate)
 
-    # Busca testes para calcular status
-    recent_tests = (
-        session.query(Test)
-        .filter(Test.patient_id == patient_id)
-        .order_by(desc(Test.execution_date))
-        .limit(5)
-        .all()
-    )
-    recent_scores = [test.score for test in recent_tests]
-    status = calculate_patient_status(recent_scores)
+    status = get_patients_status(session, [patient_id])[patient_id]
 
     # Busca bind para pegar data de criação
     bind = next((b for b in binds if b.patient_id == patient_id), None)
@@ -373,20 +418,12 @@ def get_patients(session: Session, doctor: User, parameters: GetPatientsSchema)
     if not patients:
         return patient_list
 
+    statuses = get_patients_status(session, [patient.id for patient in patients])
+
     for patient in patients:
         # Calcula idade
         age = calculate_age(patient.birthdate)
-
-        # Busca últimos testes para calcular status
-        recent_tests = (
-            session.query(Test)
-            .filter(Test.patient_id == patient.id)
-            .order_by(desc(Test.execution_date))
-            .limit(5)
-            .all()
-        )
-        recent_scores = [test.score for test in recent_tests]
-        status = calculate_patient_status(recent_scores)
+        status = statuses[patient.id]
 
         # Aplicar filtro de status se fornecido
         if parameters.status and status != parameters.status:
@@ -0,0 +1,160 @@
+"""
+Percentil do paciente entre os pacientes que compartilham dados.
+
+Cada sketch é um histograma de ``SKETCH_BUCKETS`` baldes de largura fixa
+sobre o domínio do score (0.0-1.0), com a média de cada paciente. Ao
+contrário de t-digest e KLL, o histograma aceita remoção, que é o que
+acontece quando a média de um paciente muda a cada teste. Ele também é
+mesclável (soma balde a balde) e tem erro limitado: o percentil estimado
+erra no máximo a fração de pacientes que caem no mesmo balde do score
+consultado.
+
+Os sketches são persistidos em ``score_sketch_bucket`` e mantidos por
+cohort_service. ``PERCENTILE_MODE=exact`` troca a estimativa pelo cálculo
+exato sobre todos os pacientes, para validação.
+"""
+
+from dataclasses import dataclass
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from infra.settings import settings
+
+from ..models import ScoreSketchBucket
+from .cohort_service import (
+    SKETCH_BUCKETS,
+    CohortKey,
+    bucket_of,
+    cohort_key,
+    patient_contributions,
+    sketch_names,
+)
+
+
+@dataclass(frozen=True)
+class PercentileEstimate:
+    percentile: float
+    # Erro máximo, em pontos percentuais
+    max_error: float
+
+
+class ScoreSketch:
+    """Histograma das médias por paciente de uma coorte."""
+
+    def __init__(self, counts: list[int] | None = None):
+        self.counts = counts if counts is not None else [0] * SKETCH_BUCKETS
+
+    @classmethod
+    def of(cls, scores) -> "ScoreSketch":
+        sketch = cls()
+        for score in scores:
+            sketch.add(score)
+        return sketch
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts)
+
+    def add(self, score: float) -> None:
+        self.counts[bucket_of(score)] += 1
+
+    def remove(self, score: float) -> None:
+        bucket = bucket_of(score)
+        if self.counts[bucket] > 0:
+            self.counts[bucket] -= 1
+
+    def merge(self, other: "ScoreSketch") -> "ScoreSketch":
+        return ScoreSketch([a + b for a, b in zip(self.counts, other.counts)])
+
+    def percentile(self, score: float) -> PercentileEstimate | None:
+        """
+        Percentual de pacientes com média menor que ``score``. Dentro do balde
+        do score a contagem é interpolada linearmente.
+        """
+        total = self.total
+        if total <= 0:
+            return None
+
+        bucket = bucket_of(score)
+        below = sum(self.counts[:bucket])
+        in_bucket = self.counts[bucket]
+        position = min(max(score * SKETCH_BUCKETS - bucket, 0.0), 1.0)
+        return PercentileEstimate(
+            percentile=(below + in_bucket * position) / total * 100,
+            max_error=in_bucket / total * 100,
+        )
+
+
+def load_sketches(session: Session, names: list[str]) -> dict[str, ScoreSketch]:
+    """Carrega os sketches pedidos, por nome, numa única consulta."""
+    sketches = {name: ScoreSketch() for name in names}
+    rows = session.execute(
+        select(
+            ScoreSketchBucket.sketch, ScoreSketchBucket.bucket, ScoreSketchBucket.patients
+        ).where(ScoreSketchBucket.sketch.in_(names))
+    )
+    for sketch, bucket, patients in rows:
+        sketches[sketch].counts[bucket] = patients
+    return sketches
+
+
+def exact_percentiles(
+    session: Session, key: CohortKey, score: float, patient_id: int
+) -> dict[str, PercentileEstimate | None]:
+    """
+    Percentis exatos (erro zero) nos mesmos recortes dos sketches, lendo a
+    média de cada paciente que compartilha dados (exceto o próprio). Custo
+    linear no número de pacientes: serve para validar os sketches.
+    """
+    names = sketch_names(key)
+    below = dict.fromkeys(names, 0)
+    compared = dict.fromkeys(names, 0)
+
+    for row in patient_contributions(session.connection()):
+        if not row.share_data_for_statistics or not row.score_count or row.id == patient_id:
+            continue
+        average = row.score_sum / row.score_count
+        row_names = sketch_names(cohort_key(row))
+        for dimension, name in names.items():
+            if row_names[dimension] == name:
+                compared[dimension] += 1
+                below[dimension] += average < score
+
+    return {
+        dimension: (
+            PercentileEstimate(
+                percentile=below[dimension] / compared[dimension] * 100, max_error=0.0
+            )
+            if compared[dimension]
+            else None
+        )
+        for dimension in names
+    }
+
+
+def patient_percentiles(
+    session: Session,
+    key: CohortKey,
+    score: float,
+    patient_id: int,
+    in_sketches: bool,
+) -> dict[str, PercentileEstimate | None]:
+    """
+    Percentil do paciente, com o erro máximo da estimativa, em cada recorte
+    da sua coorte (global, age_group, gender, state e city). ``in_sketches``
+    indica se o próprio paciente está contado nos sketches (compartilha dados
+    e tem testes); nesse caso ele é descontado antes da estimativa.
+    """
+    if settings.PERCENTILE_MODE == "exact":
+        return exact_percentiles(session, key, score, patient_id)
+
+    names = sketch_names(key)
+    sketches = load_sketches(session, list(names.values()))
+    percentiles = {}
+    for dimension, name in names.items():
+        sketch = sketches[name]
+        if in_sketches:
+            sketch.remove(score)
+        percentiles[dimension] = sketch.percentile(score)
+    return percentiles
@@ -1,36 +1,20 @@
-from datetime import date, datetime
-
 from sqlalchemy import func, select
 from sqlalchemy.orm import Session, joinedload
 
 from api.schemas.statistics import (
+    CohortPercentiles,
     ComparativeStatistics,
     GenderAverages,
     PatientDemographics,
     RegionalAverages,
 )
 from core.enums.user_enum import Gender
-from core.models.address import Address
+from core.models.cohort import CohortAggregate
 from core.models.tests import Test
 from core.models.users import Patient, User
 
-
-def calculate_age(birthdate: date) -> int:
-    """Calcula idade a partir da data de nascimento"""
-    today = date.today()
-    return today.year - birthdate.year - ((today.month, today.day) < (birthdate.month, birthdate.day))
-
-
-def get_age_group(age: int) -> str:
-    """Retorna a faixa etária baseada na idade"""
-    if age <= 40:
-        return "0-40"
-    elif age <= 60:
-        return "41-60"
-    elif age <= 75:
-        return "61-75"
-    else:
-        return "76+"
+from .cohort_service import CohortKey, calculate_age, get_age_group
+from .percentile_service import patient_percentiles
 
 
 def gender_enum_to_string(gender: Gender) -> str:
@@ -65,140 +49,94 @@ def get_comparative_statistics(session: Session, user: User) -> ComparativeStati
     patient_age_group = get_age_group(patient_age)
     patient_gender = gender_enum_to_string(patient.gender)
 
-    # Calcular score médio do paciente
-    patient_avg_query = select(func.avg(Test.score)).where(Test.patient_id == patient.id)
-    patient_avg_score = session.scalar(patient_avg_query) or 0.0
-
-    # --- Estatísticas Globais ---
-
-    # Query base: apenas pacientes que compartilham dados
-    sharing_patients_query = select(Patient.id).where(
-        Patient.share_data_for_statistics == True
+    # Calcular score médio do paciente (soma/contagem, como nos sketches)
+    patient_score_sum, patient_test_count = session.execute(
+        select(func.sum(Test.score), func.count()).where(Test.patient_id == patient.id)
+    ).one()
+    patient_avg_score = (
+        patient_score_sum / patient_test_count if patient_test_count else 0.0
     )
 
-    sharing_patient_ids = session.scalars(sharing_patients_query).all()
-
-    # Contar total de pacientes
-    total_patients_in_system = session.scalar(select(func.count(Patient.id))) or 0
-    total_patients_sharing_data = len(sharing_patient_ids)
-
-    # Média global (todos os pacientes que compartilham dados)
-    global_avg_query = (
-        select(func.avg(Test.score))
-        .where(Test.patient_id.in_(sharing_patient_ids))
-    )
-    global_avg_score = session.scalar(global_avg_query)
-
-    # --- Estatísticas por Faixa Etária ---
-
-    # Encontrar pacientes na mesma faixa etária
-    age_group_patients = session.scalars(
-        select(Patient.id)
-        .where(Patient.id.in_(sharing_patient_ids))
-    ).all()
-
-    # Filtrar por idade calculada (precisamos fazer isso em Python)
-    age_group_patient_ids = [
-        p_id for p_id in age_group_patients
-        if get_age_group(calculate_age(
-            session.scalar(select(Patient.birthdate).where(Patient.id == p_id))
-        )) == patient_age_group
+    # --- Médias das coortes ---
+
+    # Uma consulta sobre a tabela de coortes (já restrita a quem compartilha dados)
+    cohort = CohortAggregate
+    same_age_group = cohort.age_group == patient_age_group
+    filters = {
+        "global": None,
+        "age_group": same_age_group,
+        "male": same_age_group & (cohort.gender == Gender.MALE),
+        "female": same_age_group & (cohort.gender == Gender.FEMALE),
+    }
+    if patient.address:
+        filters["city"] = cohort.city == patient.address.city
+        filters["state"] = cohort.state == patient.address.state
+
+    columns = [
+        select(func.count(Patient.id)).scalar_subquery().label("total_patients"),
+        func.coalesce(func.sum(cohort.patient_count), 0).label("sharing_patients"),
+        func.coalesce(
+            func.sum(cohort.patient_count).filter(same_age_group), 0
+        ).label("age_group_patients"),
     ]
-
-    total_patients_in_age_group = len(age_group_patient_ids)
-
-    # Média da faixa etária
-    age_group_avg_query = (
-        select(func.avg(Test.score))
-        .where(Test.patient_id.in_(age_group_patient_ids))
-    )
-    age_group_avg_score = session.scalar(age_group_avg_query)
-
-    # --- Estatísticas Regionais ---
+    for name, condition in filters.items():
+        score_sum = func.sum(cohort.score_sum)
+        score_count = func.sum(cohort.score_count)
+        if condition is not None:
+            score_sum = score_sum.filter(condition)
+            score_count = score_count.filter(condition)
+        columns += [score_sum.label(f"{name}_sum"), score_count.label(f"{name}_count")]
+
+    totals = session.execute(select(*columns)).one()._mapping
+
+    def cohort_avg(name: str) -> float | None:
+        count = totals.get(f"{name}_count")
+        return totals[f"{name}_sum"] / count if count else None
+
+    total_patients_in_system = totals["total_patients"] or 0
+    total_patients_sharing_data = totals["sharing_patients"]
+    total_patients_in_age_group = totals["age_group_patients"]
+    global_avg_score = cohort_avg("global")
+    age_group_avg_score = cohort_avg("age_group")
 
     regional_avg = RegionalAverages()
-
     if patient.address:
-        # Média por cidade
-        city_patients = session.scalars(
-            select(Patient.id)
-            .join(Address, Patient.address_id == Address.id)
-            .where(Patient.id.in_(sharing_patient_ids))
-            .where(Address.city == patient.address.city)
-        ).all()
-
-        if city_patients:
-            city_avg_query = (
-                select(func.avg(Test.score))
-                .where(Test.patient_id.in_(city_patients))
-            )
-            regional_avg.city = session.scalar(city_avg_query)
-
-        # Média por estado
-        state_patients = session.scalars(
-            select(Patient.id)
-            .join(Address, Patient.address_id == Address.id)
-            .where(Patient.id.in_(sharing_patient_ids))
-            .where(Address.state == patient.address.state)
-        ).all()
-
-        if state_patients:
-            state_avg_query = (
-                select(func.avg(Test.score))
-                .where(Test.patient_id.in_(state_patients))
-            )
-            regional_avg.state = session.scalar(state_avg_query)
-
+        regional_avg.city = cohort_avg("city")
+        regional_avg.state = cohort_avg("state")
         # Média nacional (Brasil) - todos os pacientes compartilhando
         regional_avg.country = global_avg_score
 
-    # --- Estatísticas por Gênero ---
-
-    gender_avg = GenderAverages()
-
-    # Filtrar pacientes por gênero (baseado no campo gender do banco)
-    male_patients = [
-        p_id for p_id in age_group_patient_ids
-        if session.scalar(select(Patient.gender).where(Patient.id == p_id)) == Gender.MALE
-    ]
-
-    female_patients = [
-        p_id for p_id in age_group_patient_ids
-        if session.scalar(select(Patient.gender).where(Patient.id == p_id)) == Gender.FEMALE
-    ]
-
-    if male_patients:
-        male_avg_query = (
-            select(func.avg(Test.score))
-            .where(Test.patient_id.in_(male_patients))
-        )
-        gender_avg.male = session.scalar(male_avg_query)
-
-    if female_patients:
-        female_avg_query = (
-            select(func.avg(Test.score))
-            .where(Test.patient_id.in_(female_patients))
-        )
-        gender_avg.female = session.scalar(female_avg_query)
+    # Médias por gênero dentro da faixa etária do paciente
+    gender_avg = GenderAverages(male=cohort_avg("male"), female=cohort_avg("female"))
 
     # --- Percentil do Paciente ---
 
-    patient_percentile = None
-    if sharing_patient_ids:
-        # Calcular médias de todos os pacientes compartilhando dados (excluindo o paciente atual)
-        all_averages = []
-        for p_id in sharing_patient_ids:
-            if p_id == patient.id:  # Pular o próprio paciente
-                continue
-            avg_query = select(func.avg(Test.score)).where(Test.patient_id == p_id)
-            avg_score = session.scalar(avg_query)
-            if avg_score is not None:
-                all_averages.append(avg_score)
-
-        if all_averages:
-            # Calcular percentil (quantos pacientes têm score menor que o paciente atual)
-            patients_below = sum(1 for avg in all_averages if avg < patient_avg_score)
-            patient_percentile = (patients_below / len(all_averages)) * 100
+    # Estimado pelos sketches das médias por paciente (uma consulta)
+    percentiles = patient_percentiles(
+        session,
+        CohortKey(
+            patient_age_group,
+            patient.gender,
+            patient.address.city if patient.address else "",
+            patient.address.state if patient.address else "",
+        ),
+        patient_avg_score,
+        patient.id,
+        in_sketches=patient.share_data_for_statistics and patient_test_count > 0,
+    )
+    patient_estimate = percentiles.pop("global")
+    cohort_percentiles = CohortPercentiles(
+        **{
+            dimension: estimate.percentile if estimate else None
+            for dimension, estimate in percentiles.items()
+        }
+    )
+    cohort_percentiles_max_error = CohortPercentiles(
+        **{
+            dimension: estimate.max_error if estimate else None
+            for dimension, estimate in percentiles.items()
+        }
+    )
 
     # --- Construir resposta ---
 
@@ -217,7 +155,12 @@ def get_comparative_statistics(session: Session, user: User) -> ComparativeStati
         age_group_avg_score=float(age_group_avg_score) if age_group_avg_score is not None else None,
         regional_avg=regional_avg,
         gender_avg=gender_avg,
-        patient_percentile=patient_percentile,
+        patient_percentile=patient_estimate.percentile if patient_estimate else None,
+        cohort_percentiles=cohort_percentiles,
+        patient_percentile_max_error=(
+            patient_estimate.max_error if patient_estimate else None
+        ),
+        cohort_percentiles_max_error=cohort_percentiles_max_error,
         demographics=demographics,
         total_patients_in_system=total_patients_in_system,
         total_patients_in_age_group=total_patients_in_age_group,
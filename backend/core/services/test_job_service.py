@@ -0,0 +1,398 @@
+import asyncio
+import io
+import logging
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session, undefer
+from starlette.datastructures import Headers
+
+from api.schemas.tests import (
+    ClinicalProcessSpiralSchema,
+    ClinicalProcessVoiceSchema,
+    ProcessSpiralSchema,
+    ProcessVoiceSchema,
+    SpiralImageSchema,
+    TestJobStatus,
+)
+from infra.db.connection import engine
+from infra.settings import settings
+from infra.storage.blob_store import BlobNotFoundError, read_blob_or_legacy
+
+from ..enums.test_enum import TestStatus, TestType
+from ..models import SpiralTest, Test, User, VoiceTest
+from ..utils import ai
+from .test_service import (
+    SPIRAL_MODEL_SERVICE_URL,
+    VOICE_MODEL_SERVICE_URL,
+    apply_spiral_result,
+    apply_voice_result,
+    build_clinical_spiral_result,
+    build_clinical_voice_result,
+    get_bound_patient,
+    new_spiral_test,
+    new_voice_test,
+)
+
+logger = logging.getLogger(__name__)
+
+# Jobs são os próprios testes ainda não concluídos: essa opção os inclui nas consultas
+UNFINISHED = {"include_unfinished_tests": True}
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _job_status(test_db: Test) -> TestJobStatus:
+    result = None
+    if test_db.status == TestStatus.COMPLETED:
+        if test_db.test_type == TestType.SPIRAL_TEST:
+            result = build_clinical_spiral_result(test_db)
+        else:
+            result = build_clinical_voice_result(test_db)
+
+    return TestJobStatus(
+        job_id=test_db.id,
+        test_type=test_db.test_type,
+        status=test_db.status,
+        attempts=test_db.attempts,
+        error=test_db.error_message,
+        status_url=f"/api/tests/jobs/{test_db.id}",
+        result=result,
+    )
+
+
+def _enqueue(session: Session, test_db: Test) -> TestJobStatus:
+    test_db.status = TestStatus.PENDING
+    session.add(test_db)
+    session.commit()
+    session.refresh(test_db)
+    return _job_status(test_db)
+
+
+async def enqueue_clinical_spiral(
+    schema: ClinicalProcessSpiralSchema, doctor: User, session: Session
+) -> TestJobStatus:
+    """
+    Salva o teste de espiral clínico como PENDING e o deixa para os workers.
+    A resposta não espera o modelo de ML.
+    """
+    patient = await run_in_threadpool(get_bound_patient, session, doctor, schema.patient_id)
+
+    process_schema = ProcessSpiralSchema(
+        image=schema.image, draw_duration=schema.draw_duration, method=schema.method
+    )
+    test_db = await run_in_threadpool(
+        new_spiral_test, process_schema, patient.id, doctor.id
+    )
+    job = await run_in_threadpool(_enqueue, session, test_db)
+
+    test_job_worker.notify()
+    return job
+
+
+async def enqueue_clinical_voice(
+    schema: ClinicalProcessVoiceSchema, doctor: User, session: Session
+) -> TestJobStatus:
+    """
+    Salva o teste de voz clínico como PENDING e o deixa para os workers.
+    A resposta não espera o modelo de ML.
+    """
+    patient = await run_in_threadpool(get_bound_patient, session, doctor, schema.patient_id)
+
+    process_schema = ProcessVoiceSchema(
+        record_duration=schema.record_duration, audio_file=schema.audio_file
+    )
+    test_db = await run_in_threadpool(new_voice_test, process_schema, patient.id, doctor.id)
+    job = await run_in_threadpool(_enqueue, session, test_db)
+
+    test_job_worker.notify()
+    return job
+
+
+def get_test_job(session: Session, user: User, job_id: int) -> TestJobStatus:
+    """Retorna o estado do job para o médico que conduziu o teste ou o paciente."""
+    test_db = session.get(Test, job_id, execution_options=UNFINISHED)
+
+    if not test_db or user.id not in (test_db.patient_id, test_db.doctor_id):
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail="Job de processamento não encontrado."
+        )
+
+    return _job_status(test_db)
+
+
+def claim_next_job(session: Session) -> tuple[int, TestType, int] | None:
+    """
+    Reserva o próximo job disponível. ``FOR UPDATE SKIP LOCKED`` deixa vários
+    workers (e várias réplicas do backend) consumirem a fila sem disputar a
+    mesma linha. Jobs cujo lease expirou (worker morto) voltam a ser elegíveis,
+    até esgotarem as tentativas.
+
+    Retorna também o número da tentativa reservada: é ele que prova, ao gravar
+    o resultado, que o job ainda pertence a este worker.
+    """
+    while True:
+        now = _now()
+        row = session.execute(
+            select(Test.id, Test.test_type, Test.attempts)
+            .where(
+                Test.status.in_([TestStatus.PENDING, TestStatus.PROCESSING]),
+                or_(Test.available_at.is_(None), Test.available_at <= now),
+            )
+            .order_by(Test.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .execution_options(**UNFINISHED)
+        ).first()
+
+        if row is None:
+            session.rollback()
+            return None
+
+        if row.attempts >= settings.TEST_JOB_MAX_ATTEMPTS:
+            session.execute(
+                update(Test)
+                .where(Test.id == row.id)
+                .values(
+                    status=TestStatus.FAILED,
+                    available_at=None,
+                    error_message="Tempo limite de processamento excedido.",
+                )
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            continue
+
+        session.execute(
+            update(Test)
+            .where(Test.id == row.id)
+            .values(
+                status=TestStatus.PROCESSING,
+                attempts=Test.attempts + 1,
+                available_at=now + timedelta(seconds=settings.TEST_JOB_LEASE_SECONDS),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+        return row.id, row.test_type, row.attempts + 1
+
+
+def _owned_job(job_id: int, attempts: int):
+    """Condição de posse: o job continua na tentativa reservada por este worker."""
+    return (
+        Test.id == job_id,
+        Test.status == TestStatus.PROCESSING,
+        Test.attempts == attempts,
+    )
+
+
+def _missing_job_input() -> HTTPException:
+    # 4xx: fail_job não tenta de novo, a mídia não vai aparecer sozinha
+    return HTTPException(
+        status_code=HTTPStatus.NOT_FOUND, detail="Mídia do teste não encontrada."
+    )
+
+
+def load_job_input(session: Session, job_id: int, test_type: TestType):
+    """Lê a mídia do teste para reenviá-la ao serviço de ML."""
+    if test_type == TestType.SPIRAL_TEST:
+        test_db = session.get(
+            SpiralTest,
+            job_id,
+            options=[undefer(SpiralTest.spiral_image_data)],
+            execution_options=UNFINISHED,
+        )
+        if test_db is None:
+            raise _missing_job_input()
+        try:
+            content = read_blob_or_legacy(
+                test_db.spiral_image_key, test_db.spiral_image_data
+            )
+        except BlobNotFoundError:
+            content = None
+        if not content:
+            raise _missing_job_input()
+        return SpiralImageSchema(
+            image_content=content,
+            image_filename=test_db.spiral_image_filename,
+            image_content_type=test_db.spiral_image_content_type,
+        )
+
+    test_db = session.get(
+        VoiceTest,
+        job_id,
+        options=[undefer(VoiceTest.voice_audio_data)],
+        execution_options=UNFINISHED,
+    )
+    if test_db is None:
+        raise _missing_job_input()
+    try:
+        content = read_blob_or_legacy(test_db.voice_audio_key, test_db.voice_audio_data)
+    except BlobNotFoundError:
+        content = None
+    if not content:
+        raise _missing_job_input()
+    return UploadFile(
+        file=io.BytesIO(content),
+        filename=test_db.voice_audio_filename,
+        headers=Headers({"content-type": test_db.voice_audio_content_type or ""}),
+    )
+
+
+def complete_job(session: Session, job_id: int, attempts: int, model_result) -> bool:
+    """
+    Grava o resultado se o job ainda pertence a esta tentativa. Se o lease
+    expirou e outro worker o reservou (ou ele já terminou), não faz nada.
+    """
+    # O UPDATE condicional trava a linha até o commit: claim_next_job a pula
+    owned = session.execute(
+        update(Test)
+        .where(*_owned_job(job_id, attempts))
+        .values(available_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    if owned.rowcount == 0:
+        session.rollback()
+        return False
+
+    # Pelo ORM, para os eventos de flush (coortes, cache do dashboard) verem a conclusão
+    test_db = session.get(Test, job_id, execution_options=UNFINISHED)
+    if test_db.test_type == TestType.SPIRAL_TEST:
+        apply_spiral_result(test_db, model_result)
+    else:
+        apply_voice_result(test_db, model_result)
+    session.commit()
+    return True
+
+
+def fail_job(
+    session: Session, job_id: int, attempts: int, error: Exception
+) -> TestStatus | None:
+    """
+    Registra a falha. Erros do lado do serviço (5xx, indisponível) são tentados
+    de novo depois de um atraso crescente; entradas rejeitadas (4xx) ou jobs sem
+    tentativas restantes ficam como FAILED.
+
+    Só altera o job se ele ainda pertence a esta tentativa; caso contrário
+    retorna ``None``.
+    """
+    status_code = getattr(error, "status_code", HTTPStatus.INTERNAL_SERVER_ERROR)
+    retryable = status_code >= HTTPStatus.INTERNAL_SERVER_ERROR
+    if retryable and attempts < settings.TEST_JOB_MAX_ATTEMPTS:
+        status = TestStatus.PENDING
+        available_at = _now() + timedelta(
+            seconds=settings.TEST_JOB_RETRY_DELAY_SECONDS * attempts
+        )
+    else:
+        status = TestStatus.FAILED
+        available_at = None
+
+    failed = session.execute(
+        update(Test)
+        .where(*_owned_job(job_id, attempts))
+        .values(
+            status=status,
+            available_at=available_at,
+            error_message=str(getattr(error, "detail", error)),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+    return status if failed.rowcount else None
+
+
+def _in_session(fn, *args):
+    with Session(engine) as session:
+        return fn(session, *args)
+
+
+async def run_job(job_id: int, test_type: TestType, attempts: int) -> None:
+    """Processa um job já reservado: chama o modelo e grava o resultado."""
+    try:
+        # Dentro do try: sem isso uma mídia ausente deixaria o job PROCESSING
+        # até o lease expirar, em todas as tentativas
+        job_input = await run_in_threadpool(
+            _in_session, load_job_input, job_id, test_type
+        )
+        if test_type == TestType.SPIRAL_TEST:
+            model_result = await ai.get_spiral_image_models_response(
+                job_input, SPIRAL_MODEL_SERVICE_URL
+            )
+        else:
+            model_result = await ai.get_voice_model_response(
+                job_input, VOICE_MODEL_SERVICE_URL
+            )
+    except Exception as e:
+        status = await run_in_threadpool(_in_session, fail_job, job_id, attempts, e)
+        if status is None:
+            logger.warning("Job de teste %s falhou depois de perder o lease: %s", job_id, e)
+        else:
+            logger.warning("Job de teste %s falhou (%s): %s", job_id, status.value, e)
+        return
+
+    completed = await run_in_threadpool(
+        _in_session, complete_job, job_id, attempts, model_result
+    )
+    if not completed:
+        logger.warning("Resultado do job de teste %s descartado: lease perdido", job_id)
+
+
+class TestJobWorker:
+    """
+    Pool de workers asyncio que consome a fila de testes pendentes.
+
+    Os workers dormem até serem acordados por um novo job desta instância ou
+    até ``poll_interval`` (jobs criados por outras réplicas, retentativas e
+    leases expirados).
+    """
+
+    def __init__(self, concurrency: int, poll_interval: float):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._wakeup: asyncio.Event | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._run(), name=f"test-job-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                job = await run_in_threadpool(_in_session, claim_next_job)
+                if job is not None:
+                    await run_job(*job)
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Erro no worker da fila de testes")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+
+test_job_worker = TestJobWorker(
+    concurrency=settings.TEST_JOB_WORKERS, poll_interval=settings.TEST_JOB_POLL_SECONDS
+)
@@ -1,7 +1,10 @@
+from datetime import datetime
 from http import HTTPStatus
 
 from fastapi import HTTPException, UploadFile
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import Session, joinedload, undefer, with_polymorphic
 
 from api.schemas.tests import (
     BasicTestReturn,
@@ -23,13 +26,20 @@ from api.schemas.tests import (
     VoiceTestResult,
 )
 
-from ..enums.test_enum import TestType
+from ..enums.test_enum import ImageSize, TestStatus, TestType
 from ..models import SpiralTest, Test, User, VoiceTest
 from ..utils import ai
+from ..utils.images import RENDITION_CONTENT_TYPE, render_renditions
+from ..utils.media import MediaFile
+from .test_statistics_service import get_test_statistics
 from .user_service import get_user_active_binds
+from infra.storage.blob_store import blob_store
 from infra.settings import settings
 
 SPIRAL_MODEL_SERVICE_URL = f"{settings.SPIRAL_CLASSIFIER_URL}/predict/spiral"
+# Testes de prática não são salvos: usam o subconjunto rápido de modelos, que só
+# recorre ao comitê completo quando o resultado fica perto do threshold
+SPIRAL_PRACTICE_SERVICE_URL = f"{SPIRAL_MODEL_SERVICE_URL}?profile=fast"
 VOICE_MODEL_SERVICE_URL = f"{settings.VOICE_CLASSIFIER_URL}/predict/voice"
 
 # Threshold de classificação: score >= 0.7 = HEALTHY, score < 0.7 = PARKINSON
@@ -37,12 +47,15 @@ VOICE_MODEL_SERVICE_URL = f"{settings.VOICE_CLASSIFIER_URL}/predict/voice"
 HEALTHY_THRESHOLD = 0.7
 
 
-def process_spiral(
+async def process_spiral(
     schema: ProcessSpiralSchema, user: User, doctor_id: int, session: Session
 ) -> tuple[SpiralTestResult, int]:
     """
     Processa teste de espiral e salva no banco de dados.
 
+    A chamada ao serviço de ML é aguardada no event loop; a gravação (síncrona)
+    roda no threadpool.
+
     Args:
         schema: Dados do teste
         user: Paciente que realizou o teste
@@ -52,10 +65,66 @@ def process_spiral(
     Returns:
         tuple: (SpiralTestResult, test_id)
     """
-    model_result = ai.get_spiral_image_models_response(
+    model_result = await ai.get_spiral_image_models_response(
         schema.image, SPIRAL_MODEL_SERVICE_URL
     )
+    test_id = await run_in_threadpool(
+        _save_spiral_test, schema, user, doctor_id, model_result, session
+    )
+    return model_result, test_id
+
+
+def _save_spiral_test(
+    schema: ProcessSpiralSchema,
+    user: User,
+    doctor_id: int,
+    model_result: SpiralTestResult,
+    session: Session,
+) -> int:
+    spiral_test_db = new_spiral_test(schema, user.id, doctor_id)
+    apply_spiral_result(spiral_test_db, model_result)
+
+    session.add(spiral_test_db)
+    session.commit()
+    session.refresh(spiral_test_db)  # Garante que temos o ID gerado
+
+    return spiral_test_db.id
+
 
+def new_spiral_test(
+    schema: ProcessSpiralSchema, patient_id: int, doctor_id: int
+) -> SpiralTest:
+    """Cria o teste de espiral com a imagem enviada, ainda sem resultado do modelo."""
+    spiral_test_db = SpiralTest(
+        test_type=TestType.SPIRAL_TEST,
+        score=None,
+        patient_id=patient_id,
+        doctor_id=doctor_id,
+        draw_duration=schema.draw_duration,
+        method=schema.method,
+    )
+
+    # Armazena a imagem no blob store; o teste guarda só a referência
+    spiral_test_db.spiral_image_key = blob_store.put(schema.image.image_content)
+    spiral_test_db.spiral_image_size = len(schema.image.image_content)
+    spiral_test_db.spiral_image_filename = schema.image.image_filename
+    spiral_test_db.spiral_image_content_type = schema.image.image_content_type
+    store_spiral_renditions(spiral_test_db, schema.image.image_content)
+
+    return spiral_test_db
+
+
+def store_spiral_renditions(spiral_test_db: SpiralTest, image_content: bytes) -> None:
+    """Gera a miniatura e a versão média da imagem e as grava no blob store."""
+    renditions = render_renditions(image_content)
+    if ImageSize.THUMB in renditions:
+        spiral_test_db.spiral_thumb_key = blob_store.put(renditions[ImageSize.THUMB])
+    if ImageSize.MEDIUM in renditions:
+        spiral_test_db.spiral_medium_key = blob_store.put(renditions[ImageSize.MEDIUM])
+
+
+def apply_spiral_result(spiral_test_db: SpiralTest, model_result: SpiralTestResult) -> None:
+    """Grava no teste o resultado dos modelos e o marca como concluído."""
     # Calcular média das probabilidades de Parkinson dos 11 modelos
     parkinson_probabilities = []
     for model_prediction in model_result.model_results.values():
@@ -66,16 +135,9 @@ def process_spiral(
     avg_parkinson_prob = sum(parkinson_probabilities) / len(parkinson_probabilities) if parkinson_probabilities else 0.0
 
     # Score = probabilidade de estar saudável (inverso da probabilidade de Parkinson)
-    score = 1.0 - avg_parkinson_prob
-
-    spiral_test_db = SpiralTest(
-        test_type=TestType.SPIRAL_TEST,
-        score=score,
-        patient_id=user.id,
-        doctor_id=doctor_id,
-        draw_duration=schema.draw_duration,
-        method=schema.method,
-    )
+    spiral_test_db.score = 1.0 - avg_parkinson_prob
+    spiral_test_db.status = TestStatus.COMPLETED
+    spiral_test_db.error_message = None
 
     # Armazena resultados dos modelos (converter Pydantic para dict para serialização JSON)
     spiral_test_db.model_predictions = {
@@ -97,24 +159,16 @@ def process_spiral(
         spiral_test_db.feature_mean_thickness = model_result.extracted_features.mean_thickness
         spiral_test_db.feature_std_thickness = model_result.extracted_features.std_thickness
 
-    # Armazena a imagem no banco de dados
-    spiral_test_db.spiral_image_data = schema.image.image_content
-    spiral_test_db.spiral_image_filename = schema.image.image_filename
-    spiral_test_db.spiral_image_content_type = schema.image.image_content_type
-
-    session.add(spiral_test_db)
-    session.commit()
-    session.refresh(spiral_test_db)  # Garante que temos o ID gerado
-
-    return model_result, spiral_test_db.id
-
 
-def process_voice(
+async def process_voice(
     schema: ProcessVoiceSchema, user: User, doctor_id: int, session: Session
 ) -> tuple[VoiceTestResult, int]:
     """
     Processa teste de voz e salva no banco de dados.
 
+    A chamada ao serviço de ML é aguardada no event loop; a gravação (síncrona)
+    roda no threadpool.
+
     Args:
         schema: Dados do teste
         user: Paciente que realizou o teste
@@ -124,48 +178,81 @@ def process_voice(
     Returns:
         tuple: (VoiceTestResult, test_id)
     """
-    model_result = ai.get_voice_model_response(schema.audio_file, VOICE_MODEL_SERVICE_URL)
+    model_result = await ai.get_voice_model_response(
+        schema.audio_file, VOICE_MODEL_SERVICE_URL
+    )
+    test_id = await run_in_threadpool(
+        _save_voice_test, schema, user, doctor_id, model_result, session
+    )
+    return model_result, test_id
 
+
+def _save_voice_test(
+    schema: ProcessVoiceSchema,
+    user: User,
+    doctor_id: int,
+    model_result: VoiceTestResult,
+    session: Session,
+) -> int:
+    voice_test_db = new_voice_test(schema, user.id, doctor_id)
+    apply_voice_result(voice_test_db, model_result)
+
+    session.add(voice_test_db)
+    session.commit()
+    session.refresh(voice_test_db)  # Garante que temos o ID gerado
+
+    return voice_test_db.id
+
+
+def new_voice_test(schema: ProcessVoiceSchema, patient_id: int, doctor_id: int) -> VoiceTest:
+    """Cria o teste de voz com o áudio enviado, ainda sem resultado do modelo."""
     # Lê o conteúdo do arquivo de áudio para armazenar
     schema.audio_file.file.seek(0)  # Volta ao início do arquivo
     audio_content = schema.audio_file.file.read()
 
-    # model_result.score é a probabilidade de Parkinson (0-100 ou 0-1)
-    # Assumindo que vem em formato 0-100 (percentual)
-    raw_parkinson_prob = model_result.score / 100.0 if model_result.score > 1 else model_result.score
-
-    # Score = probabilidade de estar saudável (inverso da probabilidade de Parkinson)
-    score = 1.0 - raw_parkinson_prob
-
     voice_test_db = VoiceTest(
         test_type=TestType.VOICE_TEST,
-        score=score,
-        patient_id=user.id,
+        score=None,
+        patient_id=patient_id,
         doctor_id=doctor_id,
         record_duration=schema.record_duration,
     )
 
-    # Armazena probabilidade original
-    voice_test_db.raw_parkinson_probability = raw_parkinson_prob
-
-    # Armazena o áudio no banco de dados
-    voice_test_db.voice_audio_data = audio_content
+    # Armazena o áudio no blob store; o teste guarda só a referência
+    voice_test_db.voice_audio_key = blob_store.put(audio_content)
+    voice_test_db.voice_audio_size = len(audio_content)
     voice_test_db.voice_audio_filename = schema.audio_file.filename
     voice_test_db.voice_audio_content_type = schema.audio_file.content_type
 
-    session.add(voice_test_db)
-    session.commit()
-    session.refresh(voice_test_db)  # Garante que temos o ID gerado
+    return voice_test_db
+
+
+def apply_voice_result(voice_test_db: VoiceTest, model_result: VoiceTestResult) -> None:
+    """Grava no teste o resultado do modelo de voz e o marca como concluído."""
+    # model_result.score é a probabilidade de Parkinson (0-100 ou 0-1)
+    # Assumindo que vem em formato 0-100 (percentual)
+    raw_parkinson_prob = model_result.score / 100.0 if model_result.score > 1 else model_result.score
 
-    return model_result, voice_test_db.id
+    # Score = probabilidade de estar saudável (inverso da probabilidade de Parkinson)
+    voice_test_db.score = 1.0 - raw_parkinson_prob
+    voice_test_db.status = TestStatus.COMPLETED
+    voice_test_db.error_message = None
 
+    # Armazena probabilidade original e a análise textual
+    voice_test_db.raw_parkinson_probability = raw_parkinson_prob
+    voice_test_db.voice_analysis = model_result.analysis
 
-def process_spiral_as_practice(schema: SpiralImageSchema) -> SpiralTestResult:
-    return ai.get_spiral_image_models_response(schema, SPIRAL_MODEL_SERVICE_URL)
 
+async def process_spiral_as_practice(schema: SpiralImageSchema) -> SpiralTestResult:
+    return await ai.get_spiral_image_models_response(
+        schema, SPIRAL_PRACTICE_SERVICE_URL, retries=settings.CLASSIFIER_PRACTICE_RETRIES
+    )
 
-def process_voice_as_practice(audio_file: UploadFile) -> VoiceTestResult:
-    return ai.get_voice_model_response(audio_file, VOICE_MODEL_SERVICE_URL)
+
+async def process_voice_as_practice(audio_file: UploadFile) -> VoiceTestResult:
+    return await ai.get_voice_model_response(
+        audio_file, VOICE_MODEL_SERVICE_URL, retries=settings.CLASSIFIER_PRACTICE_RETRIES
+    )
 
 
 def get_patient_tests(
@@ -249,25 +336,8 @@ def get_patient_detaild_tests(
 # Funções para testes clínicos (iniciados pelo médico)
 
 
-def process_clinical_spiral(
-    schema: ClinicalProcessSpiralSchema, doctor: User, session: Session
-) -> ClinicalSpiralTestResult:
-    """
-    Processa teste de espiral clínico iniciado pelo médico.
-
-    Valida se o médico tem vínculo ativo com o paciente antes de processar.
-
-    Args:
-        schema: Dados do teste incluindo patient_id
-        doctor: Médico logado que está conduzindo o teste
-        session: Sessão do banco de dados
-
-    Returns:
-        ClinicalSpiralTestResult com informações detalhadas do teste
-
-    Raises:
-        HTTPException: Se médico não tem vínculo com paciente
-    """
+def get_bound_patient(session: Session, doctor: User, patient_id: int) -> User:
+    """Valida o vínculo do médico com o paciente e retorna o paciente."""
     # Valida se o médico tem acesso ao paciente
     binds = get_user_active_binds(session, doctor)
 
@@ -277,45 +347,63 @@ def process_clinical_spiral(
             detail="Você não possui pacientes vinculados.",
         )
 
-    if schema.patient_id not in [bind.patient_id for bind in binds]:
+    if patient_id not in [bind.patient_id for bind in binds]:
         raise HTTPException(
             status_code=HTTPStatus.FORBIDDEN,
             detail="Você não tem acesso a este paciente.",
         )
 
     # Busca o paciente
-    patient = session.query(User).filter(User.id == schema.patient_id).first()
+    patient = session.query(User).filter(User.id == patient_id).first()
     if not patient:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail="Paciente não encontrado."
         )
 
+    return patient
+
+
+async def process_clinical_spiral(
+    schema: ClinicalProcessSpiralSchema, doctor: User, session: Session
+) -> ClinicalSpiralTestResult:
+    """
+    Processa teste de espiral clínico iniciado pelo médico.
+
+    Valida se o médico tem vínculo ativo com o paciente antes de processar.
+
+    Args:
+        schema: Dados do teste incluindo patient_id
+        doctor: Médico logado que está conduzindo o teste
+        session: Sessão do banco de dados
+
+    Returns:
+        ClinicalSpiralTestResult com informações detalhadas do teste
+
+    Raises:
+        HTTPException: Se médico não tem vínculo com paciente
+    """
+    patient = await run_in_threadpool(
+        get_bound_patient, session, doctor, schema.patient_id
+    )
+
     # Cria schema de processamento normal com os dados do paciente
     process_schema = ProcessSpiralSchema(
         image=schema.image, draw_duration=schema.draw_duration, method=schema.method
     )
 
     # Processa o teste usando a função existente
-    model_result, test_id = process_spiral(process_schema, patient, doctor.id, session)
+    model_result, test_id = await process_spiral(
+        process_schema, patient, doctor.id, session
+    )
 
     # Busca o teste criado para pegar execution_date
-    test_db = session.query(SpiralTest).filter(SpiralTest.id == test_id).first()
+    test_db = await run_in_threadpool(session.get, SpiralTest, test_id)
 
     # Retorna resultado detalhado para o médico
-    return ClinicalSpiralTestResult(
-        test_id=test_id,
-        patient_id=schema.patient_id,
-        doctor_id=doctor.id,
-        majority_decision=model_result.majority_decision,
-        vote_count=model_result.vote_count,
-        model_results=model_result.model_results,
-        extracted_features=model_result.extracted_features,
-        score=test_db.score,
-        execution_date=test_db.execution_date,
-    )
+    return build_clinical_spiral_result(test_db, model_result)
 
 
-def process_clinical_voice(
+async def process_clinical_voice(
     schema: ClinicalProcessVoiceSchema, doctor: User, session: Session
 ) -> ClinicalVoiceTestResult:
     """
@@ -334,27 +422,9 @@ def process_clinical_voice(
     Raises:
         HTTPException: Se médico não tem vínculo com paciente
     """
-    # Valida se o médico tem acesso ao paciente
-    binds = get_user_active_binds(session, doctor)
-
-    if not binds:
-        raise HTTPException(
-            status_code=HTTPStatus.NOT_FOUND,
-            detail="Você não possui pacientes vinculados.",
-        )
-
-    if schema.patient_id not in [bind.patient_id for bind in binds]:
-        raise HTTPException(
-            status_code=HTTPStatus.FORBIDDEN,
-            detail="Você não tem acesso a este paciente.",
-        )
-
-    # Busca o paciente
-    patient = session.query(User).filter(User.id == schema.patient_id).first()
-    if not patient:
-        raise HTTPException(
-            status_code=HTTPStatus.NOT_FOUND, detail="Paciente não encontrado."
-        )
+    patient = await run_in_threadpool(
+        get_bound_patient, session, doctor, schema.patient_id
+    )
 
     # Cria schema de processamento normal com os dados do paciente
     process_schema = ProcessVoiceSchema(
@@ -362,19 +432,79 @@ def process_clinical_voice(
     )
 
     # Processa o teste usando a função existente
-    model_result, test_id = process_voice(process_schema, patient, doctor.id, session)
+    model_result, test_id = await process_voice(
+        process_schema, patient, doctor.id, session
+    )
 
     # Busca o teste criado para pegar execution_date
-    test_db = session.query(VoiceTest).filter(VoiceTest.id == test_id).first()
+    test_db = await run_in_threadpool(session.get, VoiceTest, test_id)
+
+    # Retorna resultado detalhado para o médico
+    return build_clinical_voice_result(test_db, model_result)
+
+
+def build_clinical_spiral_result(
+    test_db: SpiralTest, model_result: SpiralTestResult | None = None
+) -> ClinicalSpiralTestResult:
+    """
+    Monta o resultado clínico do teste de espiral. Sem ``model_result`` (testes
+    processados em segundo plano), o resultado é reconstruído do banco.
+    """
+    if model_result is None:
+        features = None
+        if test_db.feature_area is not None:
+            features = SpiralExtractedFeatures(
+                area=test_db.feature_area,
+                perimeter=test_db.feature_perimeter,
+                circularity=test_db.feature_circularity,
+                aspect_ratio=test_db.feature_aspect_ratio,
+                entropy=test_db.feature_entropy,
+                mean_thickness=test_db.feature_mean_thickness,
+                std_thickness=test_db.feature_std_thickness,
+            )
+        model_result = SpiralTestResult(
+            majority_decision=test_db.majority_vote,
+            vote_count={
+                "Healthy": test_db.healthy_votes,
+                "Parkinson": test_db.parkinson_votes,
+            },
+            model_results=test_db.model_predictions or {},
+            extracted_features=features,
+        )
+
+    return ClinicalSpiralTestResult(
+        test_id=test_db.id,
+        patient_id=test_db.patient_id,
+        doctor_id=test_db.doctor_id,
+        majority_decision=model_result.majority_decision,
+        vote_count=model_result.vote_count,
+        model_results=model_result.model_results,
+        extracted_features=model_result.extracted_features,
+        score=test_db.score,
+        execution_date=test_db.execution_date,
+    )
+
+
+def build_clinical_voice_result(
+    test_db: VoiceTest, model_result: VoiceTestResult | None = None
+) -> ClinicalVoiceTestResult:
+    """
+    Monta o resultado clínico do teste de voz. Sem ``model_result`` (testes
+    processados em segundo plano), o resultado é reconstruído do banco.
+    """
+    if model_result is None:
+        model_result = VoiceTestResult(
+            score=test_db.raw_parkinson_probability,
+            analysis=test_db.voice_analysis or "",
+        )
 
     # Calcula classificação baseado no score invertido (probabilidade de saúde)
     classification = "HEALTHY" if test_db.score >= HEALTHY_THRESHOLD else "PARKINSON"
 
-    # Retorna resultado detalhado para o médico
     return ClinicalVoiceTestResult(
-        test_id=test_id,
-        patient_id=schema.patient_id,
-        doctor_id=doctor.id,
+        test_id=test_db.id,
+        patient_id=test_db.patient_id,
+        doctor_id=test_db.doctor_id,
         score=model_result.score,
         analysis=model_result.analysis,
         execution_date=test_db.execution_date,
@@ -390,125 +520,7 @@ def get_my_tests_statistics(session: Session, patient: User) -> PatientTestStati
     Retorna estatísticas agregadas dos testes do próprio paciente.
     Inclui tendência calculada por regressão linear simples.
     """
-    from datetime import datetime, timezone
-
-    # Busca todos os testes ordenados cronologicamente
-    all_tests = (
-        session.query(Test)
-        .filter(Test.patient_id == patient.id)
-        .order_by(Test.execution_date)
-        .all()
-    )
-
-    if not all_tests:
-        return PatientTestStatistics(
-            total_tests=0,
-            total_spiral_tests=0,
-            total_voice_tests=0,
-            avg_spiral_score=None,
-            avg_voice_score=None,
-            last_test_date=None,
-            days_since_last_test=None,
-            first_test_date=None,
-            trend="stable",
-            trend_percentage=0.0,
-            best_spiral_score=None,
-            worst_spiral_score=None,
-            best_voice_score=None,
-            worst_voice_score=None,
-            healthy_classification_count=0,
-            parkinson_classification_count=0,
-            avg_test_interval_days=None,
-        )
-
-    # Separar por tipo
-    spiral_tests = [t for t in all_tests if t.test_type == TestType.SPIRAL_TEST]
-    voice_tests = [t for t in all_tests if t.test_type == TestType.VOICE_TEST]
-
-    # Calcular estatísticas básicas
-    total_tests = len(all_tests)
-    total_spiral = len(spiral_tests)
-    total_voice = len(voice_tests)
-
-    avg_spiral = (
-        sum(t.score for t in spiral_tests) / total_spiral if total_spiral > 0 else None
-    )
-    avg_voice = sum(t.score for t in voice_tests) / total_voice if total_voice > 0 else None
-
-    # Último teste
-    last_test = all_tests[-1]
-    last_test_date = last_test.execution_date
-    days_since_last = (datetime.now(timezone.utc) - last_test_date).days
-
-    # Primeiro teste
-    first_test_date = all_tests[0].execution_date
-
-    # Calcular tendência (regressão linear simples - sem numpy)
-    scores = [t.score for t in all_tests]
-    if len(scores) >= 2:
-        n = len(scores)
-        x = list(range(n))
-        y = scores
-
-        # Cálculo manual de regressão linear: y = mx + b
-        sum_x = sum(x)
-        sum_y = sum(y)
-        sum_xy = sum(x[i] * y[i] for i in range(n))
-        sum_x2 = sum(xi**2 for xi in x)
-
-        slope = (n * sum_xy - sum_x * sum_y) / (n * sum_x2 - sum_x**2)
-
-        if slope > 0.01:
-            trend = "improving"
-        elif slope < -0.01:
-            trend = "worsening"
-        else:
-            trend = "stable"
-
-        trend_percentage = (slope * n) * 100 if n > 1 else 0.0
-    else:
-        trend = "stable"
-        trend_percentage = 0.0
-
-    # Melhores e piores scores
-    best_spiral = max((t.score for t in spiral_tests), default=None)
-    worst_spiral = min((t.score for t in spiral_tests), default=None)
-    best_voice = max((t.score for t in voice_tests), default=None)
-    worst_voice = min((t.score for t in voice_tests), default=None)
-
-    # Classificações
-    healthy_count = sum(1 for t in all_tests if t.score >= HEALTHY_THRESHOLD)
-    parkinson_count = sum(1 for t in all_tests if t.score < HEALTHY_THRESHOLD)
-
-    # Intervalo médio entre testes
-    if len(all_tests) >= 2:
-        intervals = []
-        for i in range(1, len(all_tests)):
-            interval = (all_tests[i].execution_date - all_tests[i - 1].execution_date).days
-            intervals.append(interval)
-        avg_interval = sum(intervals) / len(intervals)
-    else:
-        avg_interval = None
-
-    return PatientTestStatistics(
-        total_tests=total_tests,
-        total_spiral_tests=total_spiral,
-        total_voice_tests=total_voice,
-        avg_spiral_score=avg_spiral,
-        avg_voice_score=avg_voice,
-        last_test_date=last_test_date,
-        days_since_last_test=days_since_last,
-        first_test_date=first_test_date,
-        trend=trend,
-        trend_percentage=trend_percentage,
-        best_spiral_score=best_spiral,
-        worst_spiral_score=worst_spiral,
-        best_voice_score=best_voice,
-        worst_voice_score=worst_voice,
-        healthy_classification_count=healthy_count,
-        parkinson_classification_count=parkinson_count,
-        avg_test_interval_days=avg_interval,
-    )
+    return get_test_statistics(session, patient.id)
 
 
 def get_patient_test_statistics(
@@ -518,8 +530,6 @@ def get_patient_test_statistics(
     Retorna estatísticas agregadas dos testes de um paciente.
     Inclui tendência calculada por regressão linear simples.
     """
-    from datetime import datetime, timezone
-
     # Valida vínculo
     binds = get_user_active_binds(session, doctor)
     if not binds or patient_id not in [bind.patient_id for bind in binds]:
@@ -528,156 +538,61 @@ def get_patient_test_statistics(
             detail="Você não tem acesso a este paciente.",
         )
 
-    # Busca todos os testes ordenados cronologicamente
-    all_tests = (
-        session.query(Test)
-        .filter(Test.patient_id == patient_id)
-        .order_by(Test.execution_date)
-        .all()
-    )
-
-    if not all_tests:
-        return PatientTestStatistics(
-            total_tests=0,
-            total_spiral_tests=0,
-            total_voice_tests=0,
-            avg_spiral_score=None,
-            avg_voice_score=None,
-            last_test_date=None,
-            days_since_last_test=None,
-            first_test_date=None,
-            trend="stable",
-            trend_percentage=0.0,
-            best_spiral_score=None,
-            worst_spiral_score=None,
-            best_voice_score=None,
-            worst_voice_score=None,
-            healthy_classification_count=0,
-            parkinson_classification_count=0,
-            avg_test_interval_days=None,
-        )
-
-    # Separar por tipo
-    spiral_tests = [t for t in all_tests if t.test_type == TestType.SPIRAL_TEST]
-    voice_tests = [t for t in all_tests if t.test_type == TestType.VOICE_TEST]
+    return get_test_statistics(session, patient_id)
 
-    # Calcular estatísticas básicas
-    total_tests = len(all_tests)
-    total_spiral = len(spiral_tests)
-    total_voice = len(voice_tests)
 
-    avg_spiral = (
-        sum(t.score for t in spiral_tests) / total_spiral if total_spiral > 0 else None
-    )
-    avg_voice = sum(t.score for t in voice_tests) / total_voice if total_voice > 0 else None
-
-    # Último teste
-    last_test = all_tests[-1]
-    last_test_date = last_test.execution_date
-    days_since_last = (datetime.now(timezone.utc) - last_test_date).days
-
-    # Primeiro teste
-    first_test_date = all_tests[0].execution_date
-
-    # Calcular tendência (regressão linear simples - sem numpy)
-    scores = [t.score for t in all_tests]
-    if len(scores) >= 2:
-        n = len(scores)
-        x = list(range(n))
-        y = scores
-
-        # Cálculo manual de regressão linear: y = mx + b
-        sum_x = sum(x)
-        sum_y = sum(y)
-        sum_xy = sum(x[i] * y[i] for i in range(n))
-        sum_x2 = sum(xi**2 for xi in x)
-
-        slope = (n * sum_xy - sum_x * sum_y) / (n * sum_x2 - sum_x**2)
-
-        if slope > 0.01:
-            trend = "improving"
-        elif slope < -0.01:
-            trend = "worsening"
-        else:
-            trend = "stable"
-
-        trend_percentage = (slope * n) * 100 if n > 1 else 0.0
-    else:
-        trend = "stable"
-        trend_percentage = 0.0
-
-    # Melhores e piores scores
-    best_spiral = max((t.score for t in spiral_tests), default=None)
-    worst_spiral = min((t.score for t in spiral_tests), default=None)
-    best_voice = max((t.score for t in voice_tests), default=None)
-    worst_voice = min((t.score for t in voice_tests), default=None)
-
-    # Classificações
-    healthy_count = sum(1 for t in all_tests if t.score >= HEALTHY_THRESHOLD)
-    parkinson_count = sum(1 for t in all_tests if t.score < HEALTHY_THRESHOLD)
-
-    # Intervalo médio entre testes
-    if len(all_tests) >= 2:
-        intervals = []
-        for i in range(1, len(all_tests)):
-            interval = (all_tests[i].execution_date - all_tests[i - 1].execution_date).days
-            intervals.append(interval)
-        avg_interval = sum(intervals) / len(intervals)
-    else:
-        avg_interval = None
-
-    return PatientTestStatistics(
-        total_tests=total_tests,
-        total_spiral_tests=total_spiral,
-        total_voice_tests=total_voice,
-        avg_spiral_score=avg_spiral,
-        avg_voice_score=avg_voice,
-        last_test_date=last_test_date,
-        days_since_last_test=days_since_last,
-        first_test_date=first_test_date,
-        trend=trend,
-        trend_percentage=trend_percentage,
-        best_spiral_score=best_spiral,
-        worst_spiral_score=worst_spiral,
-        best_voice_score=best_voice,
-        worst_voice_score=worst_voice,
-        healthy_classification_count=healthy_count,
-        parkinson_classification_count=parkinson_count,
-        avg_test_interval_days=avg_interval,
-    )
+def _parse_timeline_cursor(before: str) -> tuple[datetime, int]:
+    """Cursor ``execution_date,id`` do último teste da página anterior."""
+    try:
+        execution_date, test_id = before.rsplit(",", 1)
+        # O "+" do fuso horário chega como espaço se a URL não foi codificada
+        return datetime.fromisoformat(execution_date.replace(" ", "+")), int(test_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail="Cursor inválido: use before=<execution_date>,<id>.",
+        ) from None
 
 
-def get_patient_test_timeline(
-    session: Session, doctor: User, patient_id: int
+def _build_timeline(
+    session: Session, patient_id: int, before: str | None, limit: int | None
 ) -> PatientTestTimeline:
     """
-    Retorna timeline completa de testes de um paciente ordenada cronologicamente.
-    Inclui dados completos de cada teste para visualização e gráficos.
+    Monta a timeline com uma única consulta polimórfica (espiral e voz na mesma
+    linha, médico via join), em vez de uma consulta por teste. A paginação é por
+    keyset em (execution_date, id), usando o índice idx_test_patient_date: o
+    custo de cada página não depende de quantos testes o paciente já fez.
     """
-    from sqlalchemy import desc
-    from sqlalchemy.orm import joinedload
-
-    # Valida vínculo
-    binds = get_user_active_binds(session, doctor)
-    if not binds or patient_id not in [bind.patient_id for bind in binds]:
-        raise HTTPException(
-            status_code=HTTPStatus.FORBIDDEN,
-            detail="Você não tem acesso a este paciente.",
-        )
-
-    # Busca todos os testes ordenados cronologicamente (mais recente primeiro)
-    # Inclui joinedload do doctor para obter nome do médico
-    all_tests = (
-        session.query(Test)
-        .options(joinedload(Test.doctor))
-        .filter(Test.patient_id == patient_id)
-        .order_by(desc(Test.execution_date))
-        .all()
+    tests = with_polymorphic(Test, [SpiralTest, VoiceTest])
+    query = (
+        select(tests)
+        .options(joinedload(tests.doctor))
+        .where(tests.patient_id == patient_id)
+        .order_by(tests.execution_date.desc(), tests.id.desc())
     )
+    if before:
+        query = query.where(
+            tuple_(tests.execution_date, tests.id) < _parse_timeline_cursor(before)
+        )
+    if limit:
+        # Um a mais para saber se existe próxima página
+        query = query.limit(limit + 1)
+
+    page = session.scalars(query).unique().all()
+    next_before = None
+    if limit and len(page) > limit:
+        page = page[:limit]
+        last = page[-1]
+        next_before = f"{last.execution_date.isoformat()},{last.id}"
+
+    total_count = len(page)
+    if limit or before:
+        total_count = session.scalar(
+            select(func.count()).select_from(Test).where(Test.patient_id == patient_id)
+        )
 
     timeline_items = []
-
-    for test in all_tests:
+    for test in page:
         classification = "HEALTHY" if test.score >= HEALTHY_THRESHOLD else "PARKINSON"
 
         # Campos base
@@ -691,23 +606,44 @@ def get_patient_test_timeline(
             "doctor_name": test.doctor.name,
         }
 
-        # Adicionar campos específicos por tipo
-        if test.test_type == TestType.SPIRAL_TEST:
-            spiral_test = session.query(SpiralTest).filter(SpiralTest.id == test.id).first()
-            if spiral_test:
-                item_data["draw_duration"] = spiral_test.draw_duration
-                item_data["method"] = spiral_test.method
-                item_data["majority_decision"] = classification
+        # Campos específicos por tipo (já carregados pela consulta polimórfica)
+        if isinstance(test, SpiralTest):
+            item_data["draw_duration"] = test.draw_duration
+            item_data["method"] = test.method
+            item_data["majority_decision"] = classification
 
-        elif test.test_type == TestType.VOICE_TEST:
-            voice_test = session.query(VoiceTest).filter(VoiceTest.id == test.id).first()
-            if voice_test:
-                item_data["record_duration"] = voice_test.record_duration
-                item_data["analysis"] = f"Score de {test.score:.2f} indica {classification}"
+        elif isinstance(test, VoiceTest):
+            item_data["record_duration"] = test.record_duration
+            item_data["analysis"] = f"Score de {test.score:.2f} indica {classification}"
 
         timeline_items.append(TimelineTestItem(**item_data))
 
-    return PatientTestTimeline(tests=timeline_items, total_count=len(timeline_items))
+    return PatientTestTimeline(
+        tests=timeline_items, total_count=total_count, next_before=next_before
+    )
+
+
+def get_patient_test_timeline(
+    session: Session,
+    doctor: User,
+    patient_id: int,
+    before: str | None = None,
+    limit: int | None = None,
+) -> PatientTestTimeline:
+    """
+    Retorna timeline de testes de um paciente, do mais recente ao mais antigo.
+    Inclui dados completos de cada teste para visualização e gráficos.
+    Com ``limit``, retorna uma página; a próxima é pedida com ``before``.
+    """
+    # Valida vínculo
+    binds = get_user_active_binds(session, doctor)
+    if not binds or patient_id not in [bind.patient_id for bind in binds]:
+        raise HTTPException(
+            status_code=HTTPStatus.FORBIDDEN,
+            detail="Você não tem acesso a este paciente.",
+        )
+
+    return _build_timeline(session, patient_id, before, limit)
 
 
 def get_test_detail(
@@ -832,57 +768,15 @@ def get_test_detail(
 # Funções para pacientes visualizarem seus próprios testes
 
 
-def get_my_tests_timeline(session: Session, patient: User) -> PatientTestTimeline:
+def get_my_tests_timeline(
+    session: Session, patient: User, before: str | None = None, limit: int | None = None
+) -> PatientTestTimeline:
     """
-    Retorna timeline completa de testes do próprio paciente ordenada cronologicamente.
+    Retorna timeline de testes do próprio paciente, do mais recente ao mais antigo.
     Paciente visualiza seus próprios testes sem necessidade de validação de vínculos.
+    Com ``limit``, retorna uma página; a próxima é pedida com ``before``.
     """
-    from sqlalchemy import desc
-    from sqlalchemy.orm import joinedload
-
-    # Busca todos os testes do paciente ordenados cronologicamente (mais recente primeiro)
-    # Inclui joinedload do doctor para obter nome do médico
-    all_tests = (
-        session.query(Test)
-        .options(joinedload(Test.doctor))
-        .filter(Test.patient_id == patient.id)
-        .order_by(desc(Test.execution_date))
-        .all()
-    )
-
-    timeline_items = []
-
-    for test in all_tests:
-        classification = "HEALTHY" if test.score >= HEALTHY_THRESHOLD else "PARKINSON"
-
-        # Campos base
-        item_data = {
-            "test_id": test.id,
-            "test_type": test.test_type,
-            "execution_date": test.execution_date,
-            "score": test.score,
-            "classification": classification,
-            "doctor_id": test.doctor_id,
-            "doctor_name": test.doctor.name,
-        }
-
-        # Adicionar campos específicos por tipo
-        if test.test_type == TestType.SPIRAL_TEST:
-            spiral_test = session.query(SpiralTest).filter(SpiralTest.id == test.id).first()
-            if spiral_test:
-                item_data["draw_duration"] = spiral_test.draw_duration
-                item_data["method"] = spiral_test.method
-                item_data["majority_decision"] = classification
-
-        elif test.test_type == TestType.VOICE_TEST:
-            voice_test = session.query(VoiceTest).filter(VoiceTest.id == test.id).first()
-            if voice_test:
-                item_data["record_duration"] = voice_test.record_duration
-                item_data["analysis"] = f"Score de {test.score:.2f} indica {classification}"
-
-        timeline_items.append(TimelineTestItem(**item_data))
-
-    return PatientTestTimeline(tests=timeline_items, total_count=len(timeline_items))
+    return _build_timeline(session, patient.id, before, limit)
 
 
 def get_my_test_detail(
@@ -1001,7 +895,53 @@ def get_my_test_detail(
 # Funções para recuperar mídias (imagens e áudios) dos testes
 
 
-def get_spiral_image(session: Session, doctor: User, test_id: int) -> tuple[bytes, str, str]:
+def _spiral_image_file(session: Session, test_id: int, size: ImageSize) -> MediaFile:
+    """
+    Escolhe a versão pedida da imagem. Testes sem a versão reduzida (upload
+    ilegível ou ainda não processado pelo backfill) recebem o original.
+    """
+    spiral_test = session.query(SpiralTest).filter(SpiralTest.id == test_id).first()
+    if not spiral_test:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail="Imagem não disponível para este teste.",
+        )
+
+    filename = spiral_test.spiral_image_filename or "spiral.png"
+    rendition_key = {
+        ImageSize.THUMB: spiral_test.spiral_thumb_key,
+        ImageSize.MEDIUM: spiral_test.spiral_medium_key,
+    }.get(size)
+    if rendition_key:
+        return MediaFile.stored(
+            rendition_key,
+            None,
+            None,
+            f"{filename.rsplit('.', 1)[0]}-{size.value}.webp",
+            RENDITION_CONTENT_TYPE,
+        )
+
+    if not spiral_test.spiral_image_key:
+        # Bytes legados, ainda não migrados para o blob store
+        session.refresh(spiral_test, ["spiral_image_data"])
+        if not spiral_test.spiral_image_data:
+            raise HTTPException(
+                status_code=HTTPStatus.NOT_FOUND,
+                detail="Imagem não disponível para este teste.",
+            )
+
+    return MediaFile.stored(
+        spiral_test.spiral_image_key,
+        spiral_test.spiral_image_size,
+        None if spiral_test.spiral_image_key else spiral_test.spiral_image_data,
+        filename,
+        spiral_test.spiral_image_content_type or "image/png",
+    )
+
+
+def get_spiral_image(
+    session: Session, doctor: User, test_id: int, size: ImageSize = ImageSize.ORIGINAL
+) -> MediaFile:
     """
     Recupera a imagem de um teste de espiral.
 
@@ -1009,9 +949,10 @@ def get_spiral_image(session: Session, doctor: User, test_id: int) -> tuple[byte
         session: Sessão do banco de dados
         doctor: Médico logado
         test_id: ID do teste
+        size: Versão da imagem (miniatura, média ou original)
 
     Returns:
-        tuple: (image_data, filename, content_type)
+        MediaFile: referência da imagem, nome e content-type
 
     Raises:
         HTTPException: Se teste não existe, não é espiral, médico não tem acesso, ou imagem não disponível
@@ -1038,23 +979,10 @@ def get_spiral_image(session: Session, doctor: User, test_id: int) -> tuple[byte
             detail="Este teste não é um teste de espiral.",
         )
 
-    # Buscar o teste de espiral
-    spiral_test = session.query(SpiralTest).filter(SpiralTest.id == test_id).first()
-
-    if not spiral_test or not spiral_test.spiral_image_data:
-        raise HTTPException(
-            status_code=HTTPStatus.NOT_FOUND,
-            detail="Imagem não disponível para este teste.",
-        )
-
-    return (
-        spiral_test.spiral_image_data,
-        spiral_test.spiral_image_filename or "spiral.png",
-        spiral_test.spiral_image_content_type or "image/png",
-    )
+    return _spiral_image_file(session, test_id, size)
 
 
-def get_voice_audio(session: Session, doctor: User, test_id: int) -> tuple[bytes, str, str]:
+def get_voice_audio(session: Session, doctor: User, test_id: int) -> MediaFile:
     """
     Recupera o áudio de um teste de voz.
 
@@ -1064,7 +992,7 @@ def get_voice_audio(session: Session, doctor: User, test_id: int) -> tuple[bytes
         test_id: ID do teste
 
     Returns:
-        tuple: (audio_data, filename, content_type)
+        MediaFile: referência do áudio, nome e content-type
 
     Raises:
         HTTPException: Se teste não existe, não é voz, médico não tem acesso, ou áudio não disponível
@@ -1091,22 +1019,31 @@ def get_voice_audio(session: Session, doctor: User, test_id: int) -> tuple[bytes
         )
 
     # Buscar o teste de voz
-    voice_test = session.query(VoiceTest).filter(VoiceTest.id == test_id).first()
+    voice_test = (
+        session.query(VoiceTest)
+        .options(undefer(VoiceTest.voice_audio_data))
+        .filter(VoiceTest.id == test_id)
+        .first()
+    )
 
-    if not voice_test or not voice_test.voice_audio_data:
+    if not voice_test or not (voice_test.voice_audio_key or voice_test.voice_audio_data):
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND,
             detail="Áudio não disponível para este teste.",
         )
 
-    return (
+    return MediaFile.stored(
+        voice_test.voice_audio_key,
+        voice_test.voice_audio_size,
         voice_test.voice_audio_data,
         voice_test.voice_audio_filename or "voice.webm",
         voice_test.voice_audio_content_type or "audio/webm",
     )
 
 
-def get_my_spiral_image(session: Session, patient: User, test_id: int) -> tuple[bytes, str, str]:
+def get_my_spiral_image(
+    session: Session, patient: User, test_id: int, size: ImageSize = ImageSize.ORIGINAL
+) -> MediaFile:
     """
     Recupera a imagem de um teste de espiral do próprio paciente.
 
@@ -1114,9 +1051,10 @@ def get_my_spiral_image(session: Session, patient: User, test_id: int) -> tuple[
         session: Sessão do banco de dados
         patient: Paciente logado
         test_id: ID do teste
+        size: Versão da imagem (miniatura, média ou original)
 
     Returns:
-        tuple: (image_data, filename, content_type)
+        MediaFile: referência da imagem, nome e content-type
 
     Raises:
         HTTPException: Se teste não existe, não pertence ao paciente, não é espiral, ou imagem não disponível
@@ -1142,23 +1080,10 @@ def get_my_spiral_image(session: Session, patient: User, test_id: int) -> tuple[
             detail="Este teste não é um teste de espiral.",
         )
 
-    # Buscar o teste de espiral
-    spiral_test = session.query(SpiralTest).filter(SpiralTest.id == test_id).first()
-
-    if not spiral_test or not spiral_test.spiral_image_data:
-        raise HTTPException(
-            status_code=HTTPStatus.NOT_FOUND,
-            detail="Imagem não disponível para este teste.",
-        )
-
-    return (
-        spiral_test.spiral_image_data,
-        spiral_test.spiral_image_filename or "spiral.png",
-        spiral_test.spiral_image_content_type or "image/png",
-    )
+    return _spiral_image_file(session, test_id, size)
 
 
-def get_my_voice_audio(session: Session, patient: User, test_id: int) -> tuple[bytes, str, str]:
+def get_my_voice_audio(session: Session, patient: User, test_id: int) -> MediaFile:
     """
     Recupera o áudio de um teste de voz do próprio paciente.
 
@@ -1168,7 +1093,7 @@ def get_my_voice_audio(session: Session, patient: User, test_id: int) -> tuple[b
         test_id: ID do teste
 
     Returns:
-        tuple: (audio_data, filename, content_type)
+        MediaFile: referência do áudio, nome e content-type
 
     Raises:
         HTTPException: Se teste não existe, não pertence ao paciente, não é voz, ou áudio não disponível
@@ -1194,15 +1119,22 @@ def get_my_voice_audio(session: Session, patient: User, test_id: int) -> tuple[b
         )
 
     # Buscar o teste de voz
-    voice_test = session.query(VoiceTest).filter(VoiceTest.id == test_id).first()
+    voice_test = (
+        session.query(VoiceTest)
+        .options(undefer(VoiceTest.voice_audio_data))
+        .filter(VoiceTest.id == test_id)
+        .first()
+    )
 
-    if not voice_test or not voice_test.voice_audio_data:
+    if not voice_test or not (voice_test.voice_audio_key or voice_test.voice_audio_data):
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND,
             detail="Áudio não disponível para este teste.",
         )
 
-    return (
+    return MediaFile.stored(
+        voice_test.voice_audio_key,
+        voice_test.voice_audio_size,
         voice_test.voice_audio_data,
         voice_test.voice_audio_filename or "voice.webm",
         voice_test.voice_audio_content_type or "audio/webm",
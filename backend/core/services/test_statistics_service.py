@@ -0,0 +1,224 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from api.schemas.tests import PatientTestStatistics
+
+from ..enums.test_enum import TestStatus, TestType
+from ..models import Test
+
+# Threshold de classificação: score >= 0.7 = HEALTHY, score < 0.7 = PARKINSON
+# Score representa probabilidade de estar saudável (0.0-1.0)
+HEALTHY_THRESHOLD = 0.7
+
+# Inclinação (score por teste) a partir da qual a tendência deixa de ser estável
+TREND_SLOPE_THRESHOLD = 0.01
+
+SECONDS_PER_DAY = 86400
+
+# Bancos com FILTER, regr_slope e funções de janela; os demais (SQLite nos
+# testes e scripts locais) usam o cálculo em Python
+SQL_AGGREGATE_DIALECTS = {"postgresql"}
+
+# O Postgres devolve avg/regr_slope como numeric (Decimal)
+_FLOAT_FIELDS = {
+    "avg_spiral_score",
+    "avg_voice_score",
+    "best_spiral_score",
+    "worst_spiral_score",
+    "best_voice_score",
+    "worst_voice_score",
+    "slope",
+    "avg_interval_days",
+}
+
+
+@dataclass(frozen=True)
+class TestAggregates:
+    """Agregados brutos dos testes concluídos de um paciente."""
+
+    total_tests: int
+    total_spiral_tests: int
+    total_voice_tests: int
+    avg_spiral_score: float | None
+    avg_voice_score: float | None
+    best_spiral_score: float | None
+    worst_spiral_score: float | None
+    best_voice_score: float | None
+    worst_voice_score: float | None
+    healthy_count: int
+    first_test_date: datetime | None
+    last_test_date: datetime | None
+    slope: float | None
+    avg_interval_days: float | None
+
+
+def get_test_statistics(session: Session, patient_id: int) -> PatientTestStatistics:
+    """
+    Estatísticas dos testes concluídos do paciente. No Postgres tudo é calculado
+    numa única consulta agregada; nos outros bancos, em Python sobre as colunas
+    necessárias (sem carregar os objetos dos testes).
+    """
+    if session.get_bind().dialect.name in SQL_AGGREGATE_DIALECTS:
+        aggregates = aggregate_in_sql(session, patient_id)
+    else:
+        aggregates = aggregate_in_python(_load_score_series(session, patient_id))
+    return build_statistics(aggregates)
+
+
+def aggregate_in_sql(session: Session, patient_id: int) -> TestAggregates:
+    """
+    Uma consulta: a subconsulta numera os testes em ordem cronológica
+    (``row_number``) e mede o intervalo até o anterior (``lag``); a externa
+    agrega com ``FILTER`` por tipo e ``regr_slope`` para a tendência.
+    """
+    chronological = (Test.execution_date, Test.id)
+    epoch = func.extract("epoch", Test.execution_date)
+    ordered = (
+        select(
+            Test.test_type.label("test_type"),
+            Test.score.label("score"),
+            Test.execution_date.label("execution_date"),
+            (func.row_number().over(order_by=chronological) - 1).label("position"),
+            func.floor(
+                (epoch - func.lag(epoch).over(order_by=chronological)) / SECONDS_PER_DAY
+            ).label("interval_days"),
+        )
+        # Explícito: a subconsulta não deve depender só do critério global do ORM
+        .where(Test.patient_id == patient_id, Test.status == TestStatus.COMPLETED)
+        .subquery()
+    )
+
+    is_spiral = ordered.c.test_type == TestType.SPIRAL_TEST
+    is_voice = ordered.c.test_type == TestType.VOICE_TEST
+    score = ordered.c.score
+    row = session.execute(
+        select(
+            func.count().label("total_tests"),
+            func.count().filter(is_spiral).label("total_spiral_tests"),
+            func.count().filter(is_voice).label("total_voice_tests"),
+            func.avg(score).filter(is_spiral).label("avg_spiral_score"),
+            func.avg(score).filter(is_voice).label("avg_voice_score"),
+            func.max(score).filter(is_spiral).label("best_spiral_score"),
+            func.min(score).filter(is_spiral).label("worst_spiral_score"),
+            func.max(score).filter(is_voice).label("best_voice_score"),
+            func.min(score).filter(is_voice).label("worst_voice_score"),
+            func.count().filter(score >= HEALTHY_THRESHOLD).label("healthy_count"),
+            func.min(ordered.c.execution_date).label("first_test_date"),
+            func.max(ordered.c.execution_date).label("last_test_date"),
+            func.regr_slope(score, ordered.c.position).label("slope"),
+            func.avg(ordered.c.interval_days).label("avg_interval_days"),
+        )
+    ).one()
+
+    return TestAggregates(**{
+        name: float(value) if name in _FLOAT_FIELDS and value is not None else value
+        for name, value in row._mapping.items()
+    })
+
+
+def _load_score_series(
+    session: Session, patient_id: int
+) -> list[tuple[TestType, float, datetime]]:
+    return session.execute(
+        select(Test.test_type, Test.score, Test.execution_date)
+        .where(Test.patient_id == patient_id, Test.status == TestStatus.COMPLETED)
+        .order_by(Test.execution_date, Test.id)
+    ).all()
+
+
+def aggregate_in_python(
+    series: list[tuple[TestType, float, datetime]],
+) -> TestAggregates:
+    """
+    Mesmos agregados de ``aggregate_in_sql`` a partir da série cronológica
+    (tipo, score, data). Os testes de propriedade garantem que os dois batem.
+    """
+    spiral = [score for test_type, score, _ in series if test_type == TestType.SPIRAL_TEST]
+    voice = [score for test_type, score, _ in series if test_type == TestType.VOICE_TEST]
+    scores = [score for _, score, _ in series]
+    dates = [execution_date for _, _, execution_date in series]
+
+    intervals = [
+        (current - previous).total_seconds() // SECONDS_PER_DAY
+        for previous, current in zip(dates, dates[1:])
+    ]
+
+    return TestAggregates(
+        total_tests=len(series),
+        total_spiral_tests=len(spiral),
+        total_voice_tests=len(voice),
+        avg_spiral_score=sum(spiral) / len(spiral) if spiral else None,
+        avg_voice_score=sum(voice) / len(voice) if voice else None,
+        best_spiral_score=max(spiral, default=None),
+        worst_spiral_score=min(spiral, default=None),
+        best_voice_score=max(voice, default=None),
+        worst_voice_score=min(voice, default=None),
+        healthy_count=sum(1 for score in scores if score >= HEALTHY_THRESHOLD),
+        first_test_date=dates[0] if dates else None,
+        last_test_date=dates[-1] if dates else None,
+        slope=_slope(scores),
+        avg_interval_days=sum(intervals) / len(intervals) if intervals else None,
+    )
+
+
+def _slope(scores: list[float]) -> float | None:
+    """Inclinação da regressão linear do score pela posição do teste (0, 1, 2...)."""
+    n = len(scores)
+    if n < 2:
+        return None
+
+    # Em torno da média, como o regr_slope do Postgres, para não perder precisão
+    mean_x = (n - 1) / 2
+    mean_y = sum(scores) / n
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in enumerate(scores))
+    sxx = sum((x - mean_x) ** 2 for x in range(n))
+    return sxy / sxx
+
+
+def _as_utc(value: datetime | None) -> datetime | None:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def build_statistics(aggregates: TestAggregates) -> PatientTestStatistics:
+    """Converte os agregados na resposta da API (tendência, dias desde o último)."""
+    slope = aggregates.slope
+    if slope is None or aggregates.total_tests < 2:
+        trend, trend_percentage = "stable", 0.0
+    else:
+        if slope > TREND_SLOPE_THRESHOLD:
+            trend = "improving"
+        elif slope < -TREND_SLOPE_THRESHOLD:
+            trend = "worsening"
+        else:
+            trend = "stable"
+        trend_percentage = slope * aggregates.total_tests * 100
+
+    last_test_date = _as_utc(aggregates.last_test_date)
+    days_since_last = (
+        (datetime.now(timezone.utc) - last_test_date).days if last_test_date else None
+    )
+
+    return PatientTestStatistics(
+        total_tests=aggregates.total_tests,
+        total_spiral_tests=aggregates.total_spiral_tests,
+        total_voice_tests=aggregates.total_voice_tests,
+        avg_spiral_score=aggregates.avg_spiral_score,
+        avg_voice_score=aggregates.avg_voice_score,
+        last_test_date=last_test_date,
+        days_since_last_test=days_since_last,
+        first_test_date=_as_utc(aggregates.first_test_date),
+        trend=trend,
+        trend_percentage=trend_percentage,
+        best_spiral_score=aggregates.best_spiral_score,
+        worst_spiral_score=aggregates.worst_spiral_score,
+        best_voice_score=aggregates.best_voice_score,
+        worst_voice_score=aggregates.worst_voice_score,
+        healthy_classification_count=aggregates.healthy_count,
+        parkinson_classification_count=aggregates.total_tests - aggregates.healthy_count,
+        avg_test_interval_days=aggregates.avg_interval_days,
+    )
@@ -1,25 +1,203 @@
-import os
+import asyncio
+import time
 from http import HTTPStatus
 
 import httpx
 from fastapi import HTTPException, UploadFile
 
 from api.schemas.tests import SpiralImageSchema, SpiralTestResult, VoiceTestResult
+from infra.settings import settings
 
-from .converter import convert_webm_to_wav
+from .resilience import CircuitBreaker, LatencyWindow, backoff_delay, hedged
 
+SPIRAL_SERVICE = "spiral"
+VOICE_SERVICE = "voice"
 
-def get_spiral_image_models_response(
-    schema: SpiralImageSchema, service_url: str
+# Cada microserviço tem seu próprio pool: uma rajada de testes de voz não pode
+# ocupar as conexões do classificador de espiral (e vice-versa)
+SERVICE_MAX_CONNECTIONS = {
+    SPIRAL_SERVICE: settings.SPIRAL_CLASSIFIER_MAX_CONNECTIONS,
+    VOICE_SERVICE: settings.VOICE_CLASSIFIER_MAX_CONNECTIONS,
+}
+
+SERVICE_LABELS = {
+    SPIRAL_SERVICE: "análise de imagem",
+    VOICE_SERVICE: "análise de voz",
+}
+
+# URL base da primária e da réplica (opcional) de cada serviço
+SERVICE_REPLICAS = {
+    SPIRAL_SERVICE: (settings.SPIRAL_CLASSIFIER_URL, settings.SPIRAL_CLASSIFIER_HEDGE_URL),
+    VOICE_SERVICE: (settings.VOICE_CLASSIFIER_URL, settings.VOICE_CLASSIFIER_HEDGE_URL),
+}
+
+_clients: dict[str, httpx.AsyncClient] = {}
+
+breakers = {
+    service: CircuitBreaker(
+        service,
+        failure_threshold=settings.CLASSIFIER_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=settings.CLASSIFIER_BREAKER_RESET_SECONDS,
+    )
+    for service in SERVICE_MAX_CONNECTIONS
+}
+latencies = {service: LatencyWindow() for service in SERVICE_MAX_CONNECTIONS}
+hedge_counts = {service: {"sent": 0, "won": 0} for service in SERVICE_MAX_CONNECTIONS}
+
+
+def _build_client(service: str) -> httpx.AsyncClient:
+    max_connections = SERVICE_MAX_CONNECTIONS[service]
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=settings.CLASSIFIER_KEEPALIVE_SECONDS,
+        ),
+        timeout=httpx.Timeout(
+            settings.CLASSIFIER_TIMEOUT_SECONDS,
+            connect=settings.CLASSIFIER_CONNECT_TIMEOUT_SECONDS,
+        ),
+    )
+
+
+def get_client(service: str) -> httpx.AsyncClient:
+    """
+    Retorna o cliente compartilhado do serviço, mantendo as conexões abertas
+    (keep-alive) entre as requisições. É criado sob demanda se a aplicação
+    ainda não abriu os clientes no lifespan (scripts, testes).
+    """
+    client = _clients.get(service)
+    if client is None or client.is_closed:
+        client = _clients[service] = _build_client(service)
+    return client
+
+
+def open_clients() -> None:
+    for service in SERVICE_MAX_CONNECTIONS:
+        get_client(service)
+
+
+async def close_clients() -> None:
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
+def _hedge_url(service: str, url: str) -> str | None:
+    primary_base, hedge_base = SERVICE_REPLICAS[service]
+    if not hedge_base or not url.startswith(primary_base):
+        return None
+    return hedge_base.rstrip("/") + url[len(primary_base) :]
+
+
+def _hedge_delay(service: str) -> float:
+    """Espera antes de acionar a réplica: o p95 recente da primária."""
+    window = latencies[service]
+    if len(window) < settings.CLASSIFIER_HEDGE_MIN_SAMPLES:
+        return settings.CLASSIFIER_HEDGE_DEFAULT_DELAY_SECONDS
+    return max(settings.CLASSIFIER_HEDGE_MIN_DELAY_SECONDS, window.percentile(0.95))
+
+
+async def _send(service: str, url: str, files: dict) -> httpx.Response:
+    client = get_client(service)
+    hedge_url = _hedge_url(service, url)
+    start = time.perf_counter()
+
+    if hedge_url is None:
+        response = await client.post(url, files=files)
+    else:
+
+        def send_hedge():
+            hedge_counts[service]["sent"] += 1
+            return client.post(hedge_url, files=files)
+
+        response, winner = await hedged(
+            lambda: client.post(url, files=files), send_hedge, _hedge_delay(service)
+        )
+        hedge_counts[service]["won"] += winner
+
+    latencies[service].record(time.perf_counter() - start)
+    return response
+
+
+async def _post(service: str, url: str, files: dict, retries: int = 0) -> httpx.Response:
+    """
+    Envia a requisição passando pelo circuit breaker do serviço.
+
+    Falhas de conexão, timeouts e respostas 5xx contam como falha do serviço;
+    4xx não (o serviço respondeu, o problema é a entrada). Com ``retries`` > 0
+    essas falhas são repetidas com backoff e jitter, enquanto o circuito
+    permitir. Com o circuito aberto a chamada falha na hora com 503.
+    """
+    breaker = breakers[service]
+
+    for attempt in range(retries + 1):
+        if not breaker.allow():
+            retry_after = breaker.retry_after()
+            raise HTTPException(
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                detail=(
+                    f"Serviço de {SERVICE_LABELS[service]} temporariamente "
+                    f"indisponível. Tente novamente em {retry_after} s."
+                ),
+                headers={"Retry-After": str(retry_after)},
+            )
+
+        try:
+            response = await _send(service, url, files)
+        except httpx.RequestError:
+            breaker.record_failure()
+            if attempt == retries:
+                raise
+        else:
+            if response.status_code < HTTPStatus.INTERNAL_SERVER_ERROR:
+                breaker.record_success()
+                return response
+            breaker.record_failure()
+            if attempt == retries:
+                return response
+
+        await asyncio.sleep(
+            backoff_delay(
+                attempt,
+                settings.CLASSIFIER_RETRY_BASE_DELAY_SECONDS,
+                settings.CLASSIFIER_RETRY_MAX_DELAY_SECONDS,
+            )
+        )
+
+
+def get_services_status() -> dict:
+    """Estado do circuit breaker, latência e hedging de cada serviço de ML."""
+    status = {}
+    for service, breaker in breakers.items():
+        p95 = latencies[service].percentile(0.95)
+        _, hedge_base = SERVICE_REPLICAS[service]
+        status[service] = {
+            "breaker": breaker.snapshot(),
+            "latency": {
+                "samples": len(latencies[service]),
+                "p95_ms": p95 * 1000 if p95 is not None else None,
+            },
+            "hedge": {
+                "enabled": bool(hedge_base),
+                "delay_ms": _hedge_delay(service) * 1000 if hedge_base else None,
+                **hedge_counts[service],
+            },
+        }
+    return status
+
+
+async def get_spiral_image_models_response(
+    schema: SpiralImageSchema, service_url: str, retries: int = 0
 ) -> SpiralTestResult:
     files = {
         "image": (schema.image_filename, schema.image_content, schema.image_content_type)
     }
 
     try:
-        with httpx.Client() as client:
-            response = client.post(service_url, files=files, timeout=30.0)
-            response.raise_for_status()
+        response = await _post(SPIRAL_SERVICE, service_url, files, retries)
+        response.raise_for_status()
 
         return SpiralTestResult(**response.json())
 
@@ -36,22 +214,25 @@ def get_spiral_image_models_response(
         )
 
 
-def get_voice_model_response(audio_file: UploadFile, service_url: str) -> VoiceTestResult:
+async def get_voice_model_response(
+    audio_file: UploadFile, service_url: str, retries: int = 0
+) -> VoiceTestResult:
     """
-    Processa um arquivo de voz recebido do frontend:
-    - Converte .webm -> .wav
-    - Envia o WAV para o microserviço de análise (voice-classifier)
-    - Retorna o resultado
+    Envia o arquivo de voz recebido do frontend (WebM/Opus) sem conversão para o
+    microserviço de análise (voice-classifier), que decodifica o áudio em memória.
+    Retorna o resultado.
     """
-    wav_path = ""
     try:
-        wav_path = convert_webm_to_wav(audio_file)
-
-        with open(wav_path, "rb") as f:
-            files = {"audio": ("audio.wav", f, "audio/wav")}
-            with httpx.Client() as client:
-                response = client.post(service_url, files=files, timeout=30.0)
-                response.raise_for_status()
+        await audio_file.seek(0)
+        files = {
+            "audio": (
+                audio_file.filename or "audio.webm",
+                await audio_file.read(),
+                audio_file.content_type or "audio/webm",
+            )
+        }
+        response = await _post(VOICE_SERVICE, service_url, files, retries)
+        response.raise_for_status()
 
         return VoiceTestResult(**response.json())
 
@@ -66,8 +247,7 @@ def get_voice_model_response(audio_file: UploadFile, service_url: str) -> VoiceT
             status_code=503,
             detail=f"Não foi possível comunicar com o serviço de análise de voz: {e}",
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro no processamento do áudio: {e}")
-    finally:
-        if wav_path and os.path.exists(wav_path):
-            os.remove(wav_path)
@@ -0,0 +1,47 @@
+import cv2
+import numpy as np
+
+from ..enums.test_enum import ImageSize
+
+# Lado maior (px) de cada versão reduzida da imagem da espiral
+RENDITION_MAX_SIDE = {
+    ImageSize.THUMB: 160,
+    ImageSize.MEDIUM: 640,
+}
+
+RENDITION_CONTENT_TYPE = "image/webp"
+WEBP_QUALITY = 80
+
+
+def _downscale_webp(img: np.ndarray, max_side: int) -> bytes | None:
+    height, width = img.shape[:2]
+    scale = max_side / max(height, width)
+    if scale < 1:
+        # INTER_AREA evita serrilhado no traço fino da espiral ao reduzir
+        img = cv2.resize(
+            img,
+            (max(1, round(width * scale)), max(1, round(height * scale))),
+            interpolation=cv2.INTER_AREA,
+        )
+
+    ok, encoded = cv2.imencode(".webp", img, [cv2.IMWRITE_WEBP_QUALITY, WEBP_QUALITY])
+    return encoded.tobytes() if ok else None
+
+
+def render_renditions(image_content: bytes) -> dict[ImageSize, bytes]:
+    """
+    Gera as versões reduzidas (WebP) da imagem da espiral, decodificando o
+    original uma única vez. Imagens menores que o limite só são recodificadas.
+    Retorna um dicionário vazio se os bytes não forem uma imagem legível; nesse
+    caso o original continua sendo servido em todos os tamanhos.
+    """
+    img = cv2.imdecode(np.frombuffer(image_content, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        return {}
+
+    renditions = {}
+    for size, max_side in RENDITION_MAX_SIDE.items():
+        rendition = _downscale_webp(img, max_side)
+        if rendition is not None:
+            renditions[size] = rendition
+    return renditions
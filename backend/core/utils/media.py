@@ -0,0 +1,148 @@
+import re
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Iterator
+
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+from infra.storage import blob_store as storage
+from infra.storage.blob_store import CHUNK_SIZE, BlobStore
+
+# A mídia de um teste nunca muda depois de gravada; o cache é privado por ser
+# dado de saúde e o ETag permite revalidar sem baixar de novo
+MEDIA_CACHE_CONTROL = "private, max-age=3600"
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class MediaFile:
+    """
+    Mídia de um teste pronta para ser servida: a chave no blob store ou, para
+    testes ainda não migrados, os bytes da coluna legada.
+    """
+
+    filename: str
+    content_type: str
+    size: int
+    key: str | None = None
+    legacy_data: bytes | None = None
+
+    @classmethod
+    def stored(
+        cls,
+        key: str | None,
+        size: int | None,
+        legacy_data: bytes | None,
+        filename: str,
+        content_type: str,
+    ) -> "MediaFile":
+        if key:
+            if size is None:
+                size = storage.blob_store.size(key)
+            return cls(filename, content_type, size, key=key)
+        return cls(filename, content_type, len(legacy_data), legacy_data=legacy_data)
+
+    @property
+    def etag(self) -> str:
+        # ETag forte: o próprio hash do conteúdo
+        return f'"{self.key or BlobStore.key_for(self.legacy_data)}"'
+
+    def iter_range(self, start: int, end: int) -> Iterator[bytes]:
+        """Conteúdo de ``start`` até ``end`` (inclusivo), em pedaços."""
+        if self.key:
+            yield from storage.blob_store.iter_chunks(self.key, start, end)
+            return
+
+        view = memoryview(self.legacy_data)
+        for offset in range(start, end + 1, CHUNK_SIZE):
+            yield bytes(view[offset : min(offset + CHUNK_SIZE, end + 1)])
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """
+    Interpreta o cabeçalho Range (um único intervalo de bytes). Retorna
+    ``(início, fim)`` inclusivo, ou None quando o cabeçalho deve ser ignorado
+    (ausente, malformado ou com vários intervalos) e a mídia servida inteira.
+    """
+    if not header:
+        return None
+
+    match = _RANGE_PATTERN.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+
+    first, last = match.groups()
+    if first == "":
+        # Sufixo: os últimos N bytes
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiable
+        return max(size - suffix, 0), size - 1
+
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    end = min(int(last), size - 1) if last else size - 1
+    return start, end
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match usa comparação fraca: W/"x" casa com "x"
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def media_response(request: Request, media: MediaFile) -> Response:
+    """
+    Serve a mídia em streaming, com ETag, revalidação (304) e requisições
+    parciais (Range/206), para o player de áudio buscar só o trecho do seek.
+    """
+    headers = {
+        "ETag": media.etag,
+        "Cache-Control": MEDIA_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, media.etag):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+    headers["Content-Disposition"] = f'inline; filename="{media.filename}"'
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range and if_range.strip() != media.etag:
+        # A cópia parcial do cliente é de outra versão: manda tudo
+        range_header = None
+
+    try:
+        byte_range = parse_range(range_header, media.size)
+    except RangeNotSatisfiable:
+        return Response(
+            status_code=HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={**headers, "Content-Range": f"bytes */{media.size}"},
+        )
+
+    if byte_range is None:
+        start, end = 0, media.size - 1
+        status_code = HTTPStatus.OK
+    else:
+        start, end = byte_range
+        status_code = HTTPStatus.PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{media.size}"
+
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        media.iter_range(start, end),
+        status_code=status_code,
+        media_type=media.content_type,
+        headers=headers,
+    )
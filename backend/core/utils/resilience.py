@@ -0,0 +1,155 @@
+import asyncio
+import math
+import random
+import time
+from collections import deque
+from enum import Enum
+
+
+class BreakerState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker de um serviço externo.
+
+    Após ``failure_threshold`` falhas seguidas o circuito abre e as chamadas são
+    recusadas na hora, sem ocupar conexões nem esperar o timeout. Passados
+    ``reset_timeout`` segundos uma única chamada de teste é liberada (half-open):
+    se ela der certo o circuito fecha, se falhar ele abre de novo.
+
+    Só é usado a partir do event loop, por isso não precisa de lock.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = BreakerState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: float | None = None
+        self._probe_started_at: float | None = None
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        if self.state == BreakerState.OPEN:
+            if now - self.opened_at < self.reset_timeout:
+                self.rejected += 1
+                return False
+            self.state = BreakerState.HALF_OPEN
+            self._probe_started_at = None
+
+        if self.state == BreakerState.HALF_OPEN:
+            # Uma chamada de teste por vez; se ela se perder (cancelamento),
+            # outra é liberada depois de reset_timeout
+            probe_pending = (
+                self._probe_started_at is not None
+                and now - self._probe_started_at < self.reset_timeout
+            )
+            if probe_pending:
+                self.rejected += 1
+                return False
+            self._probe_started_at = now
+
+        return True
+
+    def record_success(self) -> None:
+        self.successes += 1
+        self.consecutive_failures = 0
+        self.state = BreakerState.CLOSED
+        self.opened_at = None
+        self._probe_started_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.consecutive_failures += 1
+        if (
+            self.state == BreakerState.HALF_OPEN
+            or self.consecutive_failures >= self.failure_threshold
+        ):
+            if self.state != BreakerState.OPEN:
+                self.times_opened += 1
+            self.state = BreakerState.OPEN
+            self.opened_at = time.monotonic()
+            self._probe_started_at = None
+
+    def retry_after(self) -> int:
+        """Segundos até o circuito aceitar uma nova chamada de teste."""
+        if self.state != BreakerState.OPEN:
+            return 0
+        remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+        return max(1, math.ceil(remaining))
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_timeout_seconds": self.reset_timeout,
+            "retry_after_seconds": self.retry_after(),
+            "successes": self.successes,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "times_opened": self.times_opened,
+        }
+
+
+class LatencyWindow:
+    """Janela com as latências mais recentes de um serviço, para estimar o p95."""
+
+    def __init__(self, size: int = 200):
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> float | None:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)
+        return ordered[max(index, 0)]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Backoff exponencial com jitter completo (0 até base * 2^attempt)."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+async def hedged(primary, secondary, delay: float):
+    """
+    Executa ``primary()`` e, se ela não terminar em ``delay`` segundos, dispara
+    ``secondary()`` em paralelo. Retorna ``(resultado, índice)`` da primeira que
+    concluir com sucesso (0 = primária, 1 = secundária) e cancela a outra.
+    """
+    tasks = [asyncio.ensure_future(primary())]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done:
+            return tasks[0].result(), 0
+
+        tasks.append(asyncio.ensure_future(secondary()))
+        pending = set(tasks)
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task.result(), tasks.index(task)
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,37 @@
+"""
+Recalcula os agregados por coorte e os sketches de percentil.
+
+Uso (a partir de backend/):
+
+    python -m infra.db.rebuild_cohorts
+
+As tabelas cohort_aggregate e score_sketch_bucket, usadas pelas estatísticas
+comparativas, são mantidas incrementalmente a cada teste concluído e a cada
+mudança de consentimento ou de dados do paciente, mas a faixa etária muda com
+os aniversários sem nenhuma escrita no banco. Rode este comando uma vez por dia
+(e uma vez após criar as tabelas, para preenchê-las). O recálculo é feito numa
+única transação; as leituras continuam vendo a versão anterior até o commit.
+"""
+
+import argparse
+
+from sqlalchemy.orm import Session
+
+from core.services.cohort_service import rebuild_cohort_aggregates
+
+from .connection import engine
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.parse_args()
+
+    with Session(engine) as session:
+        print("Recalculando os agregados por coorte...")
+        cohorts = rebuild_cohort_aggregates(session)
+        session.commit()
+        print(f"  {cohorts} coortes gravadas")
+
+
+if __name__ == "__main__":
+    main()
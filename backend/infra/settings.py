@@ -33,7 +33,51 @@ class Settings(BaseSettings):
         "VOICE_CLASSIFIER_URL", "http://voice-classifier:8002"
     )
 
+    # Pool de conexões HTTP com os serviços de ML (um pool por serviço)
+    SPIRAL_CLASSIFIER_MAX_CONNECTIONS: int = 20
+    VOICE_CLASSIFIER_MAX_CONNECTIONS: int = 20
+    CLASSIFIER_KEEPALIVE_SECONDS: float = 30.0
+    CLASSIFIER_TIMEOUT_SECONDS: float = 30.0
+    CLASSIFIER_CONNECT_TIMEOUT_SECONDS: float = 5.0
+
+    # Resiliência das chamadas aos serviços de ML
+    CLASSIFIER_BREAKER_FAILURE_THRESHOLD: int = 5
+    CLASSIFIER_BREAKER_RESET_SECONDS: float = 30.0
+    # Retentativas só para testes de prática (nada é gravado, a chamada é idempotente)
+    CLASSIFIER_PRACTICE_RETRIES: int = 2
+    CLASSIFIER_RETRY_BASE_DELAY_SECONDS: float = 0.2
+    CLASSIFIER_RETRY_MAX_DELAY_SECONDS: float = 2.0
+    # Réplica opcional para requisições "hedged": disparada quando a primária
+    # passa do p95 recente sem responder
+    SPIRAL_CLASSIFIER_HEDGE_URL: str | None = None
+    VOICE_CLASSIFIER_HEDGE_URL: str | None = None
+    CLASSIFIER_HEDGE_DEFAULT_DELAY_SECONDS: float = 2.0
+    CLASSIFIER_HEDGE_MIN_DELAY_SECONDS: float = 0.05
+    CLASSIFIER_HEDGE_MIN_SAMPLES: int = 20
+
+    # Fila de processamento assíncrono de testes (0 workers = desativada)
+    TEST_JOB_WORKERS: int = 4
+    TEST_JOB_POLL_SECONDS: float = 2.0
+    TEST_JOB_LEASE_SECONDS: float = 300.0
+    TEST_JOB_MAX_ATTEMPTS: int = 3
+    TEST_JOB_RETRY_DELAY_SECONDS: float = 15.0
+
+    # Percentil das estatísticas comparativas: "sketch" (histogramas
+    # persistidos) ou "exact" (lê a média de todos os pacientes; validação)
+    PERCENTILE_MODE: str = "sketch"
+
+    # Cache do dashboard do médico: "memory" (LRU no processo), "redis" ou "off"
+    DASHBOARD_CACHE_BACKEND: str = "memory"
+    DASHBOARD_CACHE_REDIS_URL: str | None = None
+    DASHBOARD_CACHE_MAX_ENTRIES: int = 2048
+    DASHBOARD_CACHE_TTL_SECONDS: float = 300.0
+
     BASE_DIR: str = os.path.dirname(os.path.abspath(__file__))
+
+    # Armazenamento das mídias dos testes e documentos (endereçado por SHA-256)
+    BLOB_STORE_BACKEND: str = "local"
+    BLOB_STORE_PATH: str = os.path.join(os.path.dirname(BASE_DIR), "data", "blobs")
+
     MODEL_PATH: str = os.path.join(BASE_DIR, "models", "rf_model.pkl")
     EMAIL_TEMPLATES_PATH: str = os.path.join(
         os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
@@ -0,0 +1,95 @@
+"""
+Gera as versões reduzidas (miniatura e média) das imagens de espiral antigas.
+
+Uso (a partir de backend/):
+
+    python -m infra.storage.backfill_renditions [--batch-size 50]
+
+Processa os testes sem miniatura em lotes por id, lendo um original por vez do
+blob store (ou da coluna bytea legada). Cada lote é um commit, então o job pode
+ser interrompido e retomado. Imagens ilegíveis ou ausentes do blob store são
+contadas e puladas; elas continuam sendo servidas no tamanho original.
+"""
+
+import argparse
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from core.models import SpiralTest
+from core.services.test_service import store_spiral_renditions
+
+from ..db.connection import engine
+from .blob_store import BlobNotFoundError, blob_store
+
+# Inclui testes ainda na fila de processamento
+UNFINISHED = {"include_unfinished_tests": True}
+
+
+def backfill_renditions(session: Session, batch_size: int) -> dict:
+    stats = {"rows": 0, "skipped": 0}
+    last_id = 0
+
+    while True:
+        spiral_tests = session.scalars(
+            select(SpiralTest)
+            .where(
+                SpiralTest.id > last_id,
+                SpiralTest.spiral_thumb_key.is_(None),
+                or_(
+                    SpiralTest.spiral_image_key.is_not(None),
+                    SpiralTest.spiral_image_data.is_not(None),
+                ),
+            )
+            .order_by(SpiralTest.id)
+            .limit(batch_size)
+            .execution_options(**UNFINISHED)
+        ).all()
+        if not spiral_tests:
+            break
+
+        for spiral_test in spiral_tests:
+            if spiral_test.spiral_image_key:
+                try:
+                    image_content = blob_store.read(spiral_test.spiral_image_key)
+                except BlobNotFoundError:
+                    stats["rows"] += 1
+                    stats["skipped"] += 1
+                    continue
+            else:
+                image_content = session.scalar(
+                    select(SpiralTest.spiral_image_data)
+                    .where(SpiralTest.id == spiral_test.id)
+                    .execution_options(**UNFINISHED)
+                )
+
+            store_spiral_renditions(spiral_test, image_content)
+            stats["rows"] += 1
+            if spiral_test.spiral_thumb_key is None:
+                stats["skipped"] += 1
+
+        session.commit()
+        last_id = spiral_tests[-1].id
+        # Libera as imagens já processadas da memória da sessão
+        session.expunge_all()
+        print(f"  {stats['rows']} testes até id {last_id}")
+
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=50)
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        print("Gerando miniaturas das imagens de espiral...")
+        stats = backfill_renditions(session, args.batch_size)
+        print(
+            f"  {stats['rows']} imagens processadas, "
+            f"{stats['skipped']} ilegíveis ou ausentes"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import abc
+import hashlib
+import mmap
+import os
+import re
+import tempfile
+from typing import BinaryIO, Iterator
+
+from ..settings import settings
+
+CHUNK_SIZE = 64 * 1024
+
+_KEY_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobNotFoundError(KeyError):
+    pass
+
+
+class BlobStore(abc.ABC):
+    """
+    Armazenamento de mídia endereçado por conteúdo.
+
+    A chave de um blob é o SHA-256 dos seus bytes: o mesmo arquivo enviado duas
+    vezes é gravado uma vez só, e a chave serve de ETag forte. As linhas do
+    banco guardam apenas a chave, o tamanho e o content-type.
+    """
+
+    @staticmethod
+    def key_for(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    @abc.abstractmethod
+    def put(self, data: bytes) -> str:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def size(self, key: str) -> int:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def read(self, key: str) -> bytes:
+        with self.open(key) as f:
+            return f.read()
+
+    def read_range(self, key: str, start: int, end: int) -> bytes:
+        """Bytes de ``start`` até ``end`` (inclusivo)."""
+        with self.open(key) as f:
+            f.seek(start)
+            return f.read(end - start + 1)
+
+    def iter_chunks(
+        self, key: str, start: int = 0, end: int | None = None, chunk_size: int = CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """Lê o blob (ou o intervalo ``start``-``end`` inclusivo) em pedaços."""
+        with self.open(key) as f:
+            f.seek(start)
+            remaining = (end - start + 1) if end is not None else None
+            while remaining is None or remaining > 0:
+                chunk = f.read(
+                    chunk_size if remaining is None else min(chunk_size, remaining)
+                )
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+
+class LocalBlobStore(BlobStore):
+    """
+    Blobs em arquivos sob ``root``, espalhados em dois níveis de diretório pelo
+    prefixo do hash (``ab/cd/abcd...``). A gravação é atômica (arquivo
+    temporário + rename), então um leitor nunca vê um blob pela metade.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        if not _KEY_PATTERN.match(key):
+            raise ValueError(f"Chave de blob inválida: {key!r}")
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def put(self, data: bytes) -> str:
+        key = self.key_for(data)
+        path = self._path(key)
+        if os.path.exists(path):
+            return key
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return key
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def size(self, key: str) -> int:
+        try:
+            return os.path.getsize(self._path(key))
+        except FileNotFoundError:
+            raise BlobNotFoundError(key) from None
+
+    def open(self, key: str) -> BinaryIO:
+        try:
+            return open(self._path(key), "rb")
+        except FileNotFoundError:
+            raise BlobNotFoundError(key) from None
+
+    def read_range(self, key: str, start: int, end: int) -> bytes:
+        # mmap evita ler o arquivo inteiro para servir um trecho
+        with self.open(key) as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b""
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return mapped[start : end + 1]
+
+    def delete(self, key: str) -> None:
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+def get_blob_store() -> BlobStore:
+    if settings.BLOB_STORE_BACKEND == "local":
+        return LocalBlobStore(settings.BLOB_STORE_PATH)
+    raise ValueError(
+        f"Backend de armazenamento desconhecido: {settings.BLOB_STORE_BACKEND!r}"
+    )
+
+
+blob_store = get_blob_store()
+
+
+def read_blob_or_legacy(key: str | None, legacy_data: bytes | None) -> bytes | None:
+    """Bytes da mídia: do blob store ou, se ainda não migrada, da coluna bytea legada."""
+    if key:
+        return blob_store.read(key)
+    return legacy_data
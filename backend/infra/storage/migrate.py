@@ -0,0 +1,118 @@
+"""
+Move as mídias legadas (colunas bytea) para o blob store.
+
+Uso (a partir de backend/):
+
+    python -m infra.storage.migrate [--batch-size 100] [--dry-run]
+
+Percorre cada tabela por id em lotes, carregando um blob por vez: grava no blob
+store, preenche chave e tamanho e zera a coluna bytea. Cada lote é um commit,
+então a migração pode ser interrompida e retomada a qualquer momento.
+"""
+
+import argparse
+from dataclasses import dataclass
+
+from sqlalchemy import Table, select, update
+from sqlalchemy.orm import Session
+
+from core.models import SpiralTest, VoiceTest
+from core.models.doctor_utils import DoctorDocument
+
+from ..db.connection import engine
+from .blob_store import BlobStore, blob_store
+
+
+@dataclass(frozen=True)
+class MediaColumns:
+    table: Table
+    data: str
+    key: str
+    size: str | None
+
+
+TARGETS = [
+    MediaColumns(
+        SpiralTest.__table__, "spiral_image_data", "spiral_image_key", "spiral_image_size"
+    ),
+    MediaColumns(
+        VoiceTest.__table__, "voice_audio_data", "voice_audio_key", "voice_audio_size"
+    ),
+    # O tamanho do documento já era gravado no upload
+    MediaColumns(DoctorDocument.__table__, "file_data", "file_key", None),
+]
+
+
+def migrate_table(
+    session: Session,
+    store: BlobStore,
+    target: MediaColumns,
+    batch_size: int,
+    dry_run: bool = False,
+) -> dict:
+    columns = target.table.c
+    stats = {"rows": 0, "bytes": 0, "deduplicated": 0}
+    last_id = 0
+
+    while True:
+        ids = session.scalars(
+            select(columns.id)
+            .where(
+                columns.id > last_id,
+                columns[target.data].is_not(None),
+                columns[target.key].is_(None),
+            )
+            .order_by(columns.id)
+            .limit(batch_size)
+        ).all()
+        if not ids:
+            break
+
+        for row_id in ids:
+            data = session.scalar(select(columns[target.data]).where(columns.id == row_id))
+            key = store.key_for(data)
+            stats["rows"] += 1
+            stats["bytes"] += len(data)
+            if store.exists(key):
+                stats["deduplicated"] += 1
+            if dry_run:
+                continue
+
+            store.put(data)
+            values = {target.key: key, target.data: None}
+            if target.size:
+                values[target.size] = len(data)
+            session.execute(
+                update(target.table).where(columns.id == row_id).values(values)
+            )
+
+        if not dry_run:
+            session.commit()
+        last_id = ids[-1]
+        print(f"  {target.table.name}: {stats['rows']} linhas até id {last_id}")
+
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Só conta o que seria migrado"
+    )
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        for target in TARGETS:
+            print(f"Migrando {target.table.name}.{target.data}...")
+            stats = migrate_table(
+                session, blob_store, target, args.batch_size, args.dry_run
+            )
+            print(
+                f"  {stats['rows']} blobs, {stats['bytes'] / 1024 / 1024:.1f} MiB, "
+                f"{stats['deduplicated']} já existentes no blob store"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,26 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from api.router import api_router
+from core.services.test_job_service import test_job_worker
+from core.utils import ai
 from infra.settings import settings
 
-app = FastAPI(title="ParkinsonCheck API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Clientes HTTP dos serviços de ML compartilhados por todas as requisições
+    ai.open_clients()
+    # Workers da fila de testes enviados com ?async=true
+    test_job_worker.start()
+    yield
+    await test_job_worker.stop()
+    await ai.close_clients()
+
+
+app = FastAPI(title="ParkinsonCheck API", lifespan=lifespan)
 
 origins = [
     "https://parkinson.gabi-alves.com",
@@ -19,6 +35,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cabeçalhos do streaming de mídia (cache e requisições parciais)
+    expose_headers=["ETag", "Content-Range", "Accept-Ranges"],
 )
 
 app.include_router(api_router)
@@ -1,12 +1,21 @@
-from datetime import date, datetime
+import math
+from datetime import date, datetime, timezone
 from unittest.mock import MagicMock
 
 import pytest
 from core.enums.doctor_enum import DoctorStatus
 from faker import Faker
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 
-from core.enums import BindEnum, UserType
-from core.models import Address, Bind, Doctor, Patient, SpiralTest, User, VoiceTest
+from core.enums import BindEnum, Gender, SpiralMethods, TestStatus, TestType, UserType
+from core.models import Address, Bind, Doctor, Patient, SpiralTest, Test, User, VoiceTest
+from core.models.table_registry import table_registry
+from core.services import dashboard_cache_service
+from infra.storage.blob_store import LocalBlobStore
 
 fake = Faker("pt_BR")
 
@@ -18,6 +27,295 @@ def mock_session():
     return session
 
 
+@pytest.fixture(autouse=True)
+def blob_store(tmp_path, monkeypatch):
+    """Blob store local em diretório temporário, para os testes não gravarem no repositório."""
+    store = LocalBlobStore(str(tmp_path / "blobs"))
+    monkeypatch.setattr("infra.storage.blob_store.blob_store", store)
+    monkeypatch.setattr("core.services.test_service.blob_store", store)
+    monkeypatch.setattr("core.services.file_service.blob_store", store)
+    return store
+
+
+@pytest.fixture(autouse=True)
+def dashboard_cache():
+    """Cache do dashboard vazio em cada teste, para um não ver os resultados do outro."""
+    dashboard_cache_service.clear()
+    yield dashboard_cache_service
+    dashboard_cache_service.clear()
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+class _RegrSlope:
+    """regr_slope(y, x) do Postgres, que o SQLite não tem."""
+
+    def __init__(self):
+        self.points = []
+
+    def step(self, y, x):
+        if y is not None and x is not None:
+            self.points.append((x, y))
+
+    def finalize(self):
+        n = len(self.points)
+        if n < 2:
+            return None
+        mean_x = sum(x for x, _ in self.points) / n
+        mean_y = sum(y for _, y in self.points) / n
+        sxx = sum((x - mean_x) ** 2 for x, _ in self.points)
+        if sxx == 0:
+            return None
+        return sum((x - mean_x) * (y - mean_y) for x, y in self.points) / sxx
+
+
+@pytest.fixture
+def sqlite_session(tmp_path):
+    """
+    Sessão real em SQLite, para testes que precisam inspecionar o SQL gerado
+    pelo ORM. Os comandos executados (de todas as conexões) ficam em
+    ``session.info["sql"]``. O banco fica num arquivo temporário para que outras
+    sessões do mesmo engine, em outras threads, vejam os dados gravados.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+
+    @event.listens_for(engine, "connect")
+    def register_functions(dbapi_connection, connection_record):
+        dbapi_connection.create_aggregate("regr_slope", 2, _RegrSlope)
+        # O floor que o SQLAlchemy registra falha com NULL; no Postgres devolve NULL
+        dbapi_connection.create_function(
+            "floor", 1, lambda value: None if value is None else math.floor(value)
+        )
+
+    table_registry.metadata.create_all(engine)
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with Session(engine) as session:
+        session.info["sql"] = statements
+
+        @event.listens_for(session, "loaded_as_persistent")
+        def as_timestamptz(session, instance):
+            # O SQLite não guarda fuso; no Postgres (TIMESTAMPTZ) as datas vêm em UTC
+            date_value = getattr(instance, "execution_date", None)
+            if isinstance(instance, Test) and date_value and date_value.tzinfo is None:
+                set_committed_value(
+                    instance, "execution_date", date_value.replace(tzinfo=timezone.utc)
+                )
+
+        yield session
+    engine.dispose()
+
+
+@pytest.fixture
+def seeded_session(sqlite_session):
+    """
+    Sessão SQLite com um médico, um paciente vinculado e três testes concluídos
+    (duas espirais e um voz), um deles ainda com a mídia na coluna bytea legada.
+    """
+    address = Address(
+        cep="12345-678",
+        street="Rua Exemplo",
+        number="123",
+        complement=None,
+        neighborhood="Centro",
+        city="São Paulo",
+        state="SP",
+    )
+    sqlite_session.add(address)
+    sqlite_session.flush()
+
+    common = dict(
+        birthdate=date(1960, 1, 1),
+        gender=Gender.FEMALE,
+        hashed_password="hash",
+        address_id=address.id,
+    )
+    doctor = Doctor(
+        name="Dra. Maria Santos",
+        cpf="98765432100",
+        email="maria@example.com",
+        user_type=UserType.DOCTOR,
+        crm="123456",
+        expertise_area="Neurologia",
+        approval_date=None,
+        rejection_reason=None,
+        status=DoctorStatus.APPROVED,
+        **common,
+    )
+    patient = Patient(
+        name="Carlos Oliveira",
+        cpf="11122233344",
+        email="carlos@example.com",
+        user_type=UserType.PATIENT,
+        **common,
+    )
+    for user in (doctor, patient):
+        # server_default do Postgres; no SQLite viraria o texto literal
+        user.created_at = datetime(2024, 1, 1)
+    sqlite_session.add_all([doctor, patient])
+    sqlite_session.flush()
+    sqlite_session.add(
+        Bind(
+            doctor_id=doctor.id,
+            patient_id=patient.id,
+            status=BindEnum.ACTIVE,
+            created_by_type=UserType.DOCTOR,
+        )
+    )
+
+    ids = dict(patient_id=patient.id, doctor_id=doctor.id)
+    legacy_spiral = SpiralTest(
+        test_type=TestType.SPIRAL_TEST,
+        score=0.8,
+        draw_duration=10.0,
+        method=SpiralMethods.PAPER,
+        **ids,
+    )
+    legacy_spiral.execution_date = datetime(2025, 1, 1, 10, 0)
+    legacy_spiral.spiral_image_data = b"legacy-png"
+    spiral = SpiralTest(
+        test_type=TestType.SPIRAL_TEST,
+        score=0.4,
+        draw_duration=12.0,
+        method=SpiralMethods.WEBCAM,
+        **ids,
+    )
+    spiral.execution_date = datetime(2025, 2, 1, 10, 0)
+    spiral.spiral_image_key = "a" * 64
+    voice = VoiceTest(
+        test_type=TestType.VOICE_TEST, score=0.6, record_duration=5.0, **ids
+    )
+    voice.execution_date = datetime(2025, 3, 1, 10, 0)
+    voice.voice_audio_data = b"legacy-webm"
+    sqlite_session.add_all([legacy_spiral, spiral, voice])
+    sqlite_session.commit()
+
+    sqlite_session.info["doctor"] = doctor
+    sqlite_session.info["patient"] = patient
+    sqlite_session.info["sql"].clear()
+    return sqlite_session
+
+
+class DbFactory:
+    """
+    Cria endereços, usuários, vínculos e testes na sessão semeada. Médico e
+    endereço padrão são os do `seeded_session`; o commit fica a cargo do teste.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.addresses = 0
+
+    def address(self, city="São Paulo", state="SP"):
+        address = Address(
+            cep="22222-222",
+            street="Rua Teste",
+            number=str(self.addresses),
+            complement=None,
+            neighborhood="Centro",
+            city=city,
+            state=state,
+        )
+        self.addresses += 1
+        self.session.add(address)
+        self.session.flush()
+        return address
+
+    def patient(
+        self,
+        cpf,
+        birthdate=date(1958, 5, 10),
+        gender=Gender.MALE,
+        address_id=None,
+        share=True,
+    ):
+        patient = Patient(
+            name=f"Paciente {cpf}",
+            cpf=cpf,
+            email=f"{cpf}@example.com",
+            birthdate=birthdate,
+            gender=gender,
+            hashed_password="hash",
+            user_type=UserType.PATIENT,
+            address_id=address_id or self.session.info["patient"].address_id,
+        )
+        patient.share_data_for_statistics = share
+        # server_default do Postgres; no SQLite viraria o texto literal
+        patient.created_at = datetime(2024, 1, 1)
+        self.session.add(patient)
+        self.session.flush()
+        return patient
+
+    def doctor(self, cpf, name, crm):
+        doctor = Doctor(
+            name=name,
+            cpf=cpf,
+            email=f"{cpf}@example.com",
+            birthdate=date(1970, 1, 1),
+            gender=Gender.MALE,
+            hashed_password="hash",
+            address_id=self.session.info["patient"].address_id,
+            user_type=UserType.DOCTOR,
+            crm=crm,
+            expertise_area="Neurologia",
+            approval_date=None,
+            rejection_reason=None,
+            status=DoctorStatus.APPROVED,
+        )
+        doctor.created_at = datetime(2024, 1, 1)
+        self.session.add(doctor)
+        self.session.flush()
+        return doctor
+
+    def bind(self, patient_id=None, doctor_id=None, status=BindEnum.ACTIVE):
+        bind = Bind(
+            doctor_id=doctor_id or self.session.info["doctor"].id,
+            patient_id=patient_id or self.session.info["patient"].id,
+            status=status,
+            created_by_type=UserType.DOCTOR,
+        )
+        self.session.add(bind)
+        return bind
+
+    def voice_test(self, score, patient_id=None, status=TestStatus.COMPLETED):
+        test = VoiceTest(
+            test_type=TestType.VOICE_TEST,
+            score=score,
+            patient_id=patient_id or self.session.info["patient"].id,
+            doctor_id=self.session.info["doctor"].id,
+            record_duration=5.0,
+        )
+        test.status = status
+        self.session.add(test)
+        return test
+
+    def spiral_test(self, score, patient_id=None, status=TestStatus.COMPLETED):
+        test = SpiralTest(
+            test_type=TestType.SPIRAL_TEST,
+            score=score,
+            draw_duration=10.0,
+            method=SpiralMethods.PAPER,
+            patient_id=patient_id or self.session.info["patient"].id,
+            doctor_id=self.session.info["doctor"].id,
+        )
+        test.status = status
+        self.session.add(test)
+        return test
+
+
+@pytest.fixture
+def db_factory(seeded_session):
+    """Fábrica de registros ligada ao `seeded_session` do mesmo teste."""
+    return DbFactory(seeded_session)
+
+
 @pytest.fixture
 def sample_address():
     """Fixture para criar um endereço de exemplo."""
@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+from infra.storage.blob_store import BlobNotFoundError, BlobStore, read_blob_or_legacy
+
+
+class TestLocalBlobStore:
+    """Testes para o armazenamento de mídia endereçado por conteúdo."""
+
+    def test_put_deduplicates_same_content(self, blob_store):
+        """Testa que o mesmo conteúdo gera a mesma chave e um único arquivo."""
+        # Arrange
+        data = b"spiral-image-bytes"
+
+        # Act
+        first_key = blob_store.put(data)
+        second_key = blob_store.put(data)
+
+        # Assert
+        assert first_key == second_key == blob_store.key_for(data)
+        stored_files = [name for _, _, files in os.walk(blob_store.root) for name in files]
+        assert stored_files == [first_key]
+        assert blob_store.size(first_key) == len(data)
+
+    def test_read_range_and_chunks(self, blob_store):
+        """Testa a leitura parcial (intervalo inclusivo) e em pedaços."""
+        # Arrange
+        key = blob_store.put(b"0123456789")
+
+        # Act & Assert
+        assert blob_store.read_range(key, 2, 5) == b"2345"
+        assert b"".join(blob_store.iter_chunks(key, 3, 8, chunk_size=2)) == b"345678"
+        assert b"".join(blob_store.iter_chunks(key, chunk_size=4)) == b"0123456789"
+
+    def test_missing_and_invalid_keys(self, blob_store):
+        """Testa que chaves ausentes e malformadas não acessam o disco indevidamente."""
+        # Act & Assert
+        with pytest.raises(BlobNotFoundError):
+            blob_store.read("a" * 64)
+        with pytest.raises(ValueError):
+            blob_store.read("../../etc/passwd")
+
+    def test_read_blob_or_legacy(self, blob_store):
+        """Testa que mídias ainda não migradas vêm da coluna bytea legada."""
+        # Arrange
+        key = blob_store.put(b"novo")
+
+        # Act & Assert
+        assert read_blob_or_legacy(key, None) == b"novo"
+        assert read_blob_or_legacy(None, b"legado") == b"legado"
+        assert read_blob_or_legacy(None, None) is None
+
+    def test_incomplete_backend_cannot_be_instantiated(self):
+        """Testa que um backend sem todas as operações falha já na criação."""
+        # Arrange
+        class PutOnlyBlobStore(BlobStore):
+            def put(self, data: bytes) -> str:
+                return self.key_for(data)
+
+        # Act & Assert
+        with pytest.raises(TypeError, match="exists"):
+            PutOnlyBlobStore()
@@ -0,0 +1,136 @@
+import pytest
+from sqlalchemy import select
+
+from core.enums import Gender, TestStatus
+from core.models import CohortAggregate, ScoreSketchBucket
+from core.services import cohort_service, statistics_service
+
+
+def _cohort_rows(session):
+    return {
+        (row.age_group, row.gender, row.city, row.state): (
+            row.patient_count,
+            pytest.approx(row.score_sum),
+            row.score_count,
+        )
+        for row in session.scalars(select(CohortAggregate))
+        if row.patient_count or row.score_count
+    }
+
+
+def _sketch_rows(session):
+    return {
+        (row.sketch, row.bucket): row.patients
+        for row in session.scalars(select(ScoreSketchBucket))
+        if row.patients
+    }
+
+
+def _assert_matches_rebuild(session):
+    incremental = _cohort_rows(session), _sketch_rows(session)
+    cohort_service.rebuild_cohort_aggregates(session)
+    session.expire_all()
+    rebuilt = _cohort_rows(session), _sketch_rows(session)
+    session.rollback()
+    assert incremental == rebuilt
+
+
+class TestCohortService:
+    """Testes para os agregados por coorte das estatísticas comparativas."""
+
+    def test_incremental_updates_match_rebuild(self, seeded_session, db_factory):
+        """Testa que cada alteração deixa a tabela igual a um recálculo completo."""
+        # Arrange
+        patient = seeded_session.info["patient"]
+        niteroi = db_factory.address("Niterói", "RJ")
+        other = db_factory.patient("55566677788", address_id=niteroi.id)
+        seeded_session.commit()
+        _assert_matches_rebuild(seeded_session)
+
+        # Act & Assert: teste concluído na criação
+        db_factory.voice_test(0.9, other.id)
+        seeded_session.commit()
+        _assert_matches_rebuild(seeded_session)
+
+        # Act & Assert: teste da fila concluído depois
+        queued = db_factory.voice_test(None, status=TestStatus.PENDING)
+        seeded_session.commit()
+        queued.score = 0.3
+        queued.status = TestStatus.COMPLETED
+        seeded_session.commit()
+        _assert_matches_rebuild(seeded_session)
+
+        # Act & Assert: mudança de coorte e de consentimento
+        patient.gender = Gender.MALE
+        other.share_data_for_statistics = False
+        seeded_session.commit()
+        _assert_matches_rebuild(seeded_session)
+
+        other.share_data_for_statistics = True
+        other.address_id = patient.address_id
+        seeded_session.commit()
+        _assert_matches_rebuild(seeded_session)
+
+        rows = _cohort_rows(seeded_session)
+        assert rows == {
+            ("61-75", Gender.MALE, "São Paulo", "SP"): (2, pytest.approx(3.0), 5),
+        }
+        # Médias 0.525 (paciente semeado) e 0.9
+        assert _sketch_rows(seeded_session)[("gender:MALE", 52)] == 1
+        assert _sketch_rows(seeded_session)[("city:SP:São Paulo", 90)] == 1
+
+    def test_comparative_statistics_from_cohorts(self, seeded_session, db_factory):
+        """Testa as médias comparativas com número fixo de consultas."""
+        # Arrange
+        patient = seeded_session.info["patient"]
+        niteroi = db_factory.address("Niterói", "RJ")
+        male = db_factory.patient("55566677788", address_id=niteroi.id)
+        private = db_factory.patient(
+            "99988877766",
+            gender=Gender.FEMALE,
+            address_id=db_factory.address().id,
+            share=False,
+        )
+        db_factory.voice_test(0.9, male.id)
+        db_factory.voice_test(0.1, private.id)
+        seeded_session.commit()
+        seeded_session.refresh(patient)
+        executed = seeded_session.info["sql"]
+        executed.clear()
+
+        # Act
+        result = statistics_service.get_comparative_statistics(seeded_session, patient)
+
+        # Assert
+        assert len(executed) == 4
+        assert result.patient_avg_score == pytest.approx(0.6)
+        assert result.global_avg_score == pytest.approx(2.7 / 4)
+        assert result.age_group_avg_score == pytest.approx(2.7 / 4)
+        assert result.regional_avg.city == pytest.approx(0.6)
+        assert result.regional_avg.state == pytest.approx(0.6)
+        assert result.gender_avg.male == pytest.approx(0.9)
+        assert result.gender_avg.female == pytest.approx(0.6)
+        assert result.patient_percentile == 0
+        assert result.patient_percentile_max_error == 0
+        assert result.total_patients_in_system == 3
+        assert result.total_patients_sharing_data == 2
+        assert result.total_patients_in_age_group == 2
+
+    def test_comparative_statistics_report_percentile_error(self, seeded_session, db_factory):
+        """Testa que o erro máximo do percentil estimado chega à resposta."""
+        # Arrange: outro paciente com média no mesmo balde do paciente semeado
+        patient = seeded_session.info["patient"]
+        other = db_factory.patient("55566677788", gender=Gender.FEMALE)
+        db_factory.voice_test(0.605, other.id)
+        seeded_session.commit()
+        seeded_session.refresh(patient)
+
+        # Act
+        result = statistics_service.get_comparative_statistics(seeded_session, patient)
+
+        # Assert
+        assert result.patient_percentile == pytest.approx(0, abs=1e-9)
+        assert result.patient_percentile_max_error == pytest.approx(100)
+        assert result.cohort_percentiles.gender == pytest.approx(0, abs=1e-9)
+        assert result.cohort_percentiles_max_error.gender == pytest.approx(100)
+        assert result.cohort_percentiles_max_error.city == pytest.approx(100)
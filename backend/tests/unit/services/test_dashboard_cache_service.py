@@ -0,0 +1,140 @@
+from pydantic import TypeAdapter
+
+from core.enums import BindEnum, TestStatus
+from core.services import dashboard_cache_service, doctor_dashboard_service
+from core.services.dashboard_cache_service import _MISSING, MemoryCacheBackend
+
+ADAPTER = TypeAdapter(int)
+
+
+def _overview(session, doctor):
+    """Visão geral e número de consultas feitas para obtê-la."""
+    # Recarrega o médico expirado pelo commit antes de limpar o log
+    session.refresh(doctor)
+    executed = session.info["sql"]
+    executed.clear()
+    overview = doctor_dashboard_service.get_dashboard_overview(session, doctor)
+    return overview, len(executed)
+
+
+class TestDashboardCacheService:
+    """Testes para o cache do dashboard do médico e sua invalidação."""
+
+    def test_repeated_call_is_served_from_cache(self, seeded_session):
+        """Testa que a segunda chamada com os mesmos parâmetros não consulta o banco."""
+        # Arrange
+        doctor = seeded_session.info["doctor"]
+
+        # Act
+        first, first_queries = _overview(seeded_session, doctor)
+        second, second_queries = _overview(seeded_session, doctor)
+        doctor_dashboard_service.get_rankings(seeded_session, doctor, limit=3)
+
+        # Assert
+        assert (first_queries, second_queries) == (1, 0)
+        assert second == first
+        status = dashboard_cache_service.get_cache_status()
+        assert status["hits"] == 1
+        assert status["misses"] == 2
+        assert status["entries"] == 2
+        assert status["sections"]["overview"]["hit_rate"] == 0.5
+        assert status["sections"]["rankings"]["hit_rate"] == 0.0
+
+    def test_completed_test_invalidates_bound_doctors(self, seeded_session, db_factory):
+        """Testa que só a conclusão de um teste, após o commit, invalida o cache."""
+        # Arrange
+        doctor = seeded_session.info["doctor"]
+        other_doctor = db_factory.doctor("12312312312", "Dr. João Lima", "654321")
+        db_factory.bind(doctor_id=other_doctor.id)
+        seeded_session.commit()
+        _overview(seeded_session, doctor)
+        _overview(seeded_session, other_doctor)
+
+        # Act & Assert: teste na fila não muda o dashboard
+        queued = db_factory.voice_test(None, status=TestStatus.PENDING)
+        seeded_session.commit()
+        assert _overview(seeded_session, doctor)[1] == 0
+
+        # Act & Assert: gravado mas sem commit, o cache continua valendo
+        queued.score = 0.2
+        queued.status = TestStatus.COMPLETED
+        seeded_session.flush()
+        assert _overview(seeded_session, doctor)[1] == 0
+
+        # Act & Assert: depois do commit, os dois médicos vinculados recalculam
+        seeded_session.commit()
+        overview, queries = _overview(seeded_session, doctor)
+        assert queries == 1
+        assert overview.total_tests == 4
+        assert _overview(seeded_session, other_doctor)[1] == 1
+
+    def test_bind_change_invalidates_only_its_doctor(self, seeded_session, db_factory):
+        """Testa que desfazer um vínculo invalida apenas o médico do vínculo."""
+        # Arrange
+        doctor = seeded_session.info["doctor"]
+        other_doctor = db_factory.doctor("12312312312", "Dr. João Lima", "654321")
+        other_bind = db_factory.bind(doctor_id=other_doctor.id)
+        seeded_session.commit()
+        _overview(seeded_session, doctor)
+        _overview(seeded_session, other_doctor)
+        invalidations = dashboard_cache_service.get_cache_status()["invalidations"]
+
+        # Act
+        other_bind.status = BindEnum.REVERSED
+        seeded_session.commit()
+
+        # Assert
+        assert _overview(seeded_session, doctor)[1] == 0
+        overview, queries = _overview(seeded_session, other_doctor)
+        assert queries == 1
+        assert overview.total_patients == 0
+        status = dashboard_cache_service.get_cache_status()
+        assert status["invalidations"] == invalidations + 1
+
+    def test_rollback_does_not_invalidate(self, seeded_session, db_factory):
+        """Testa que alterações desfeitas não invalidam o cache."""
+        # Arrange
+        doctor = seeded_session.info["doctor"]
+        _overview(seeded_session, doctor)
+        invalidations = dashboard_cache_service.get_cache_status()["invalidations"]
+
+        # Act
+        db_factory.voice_test(0.9)
+        seeded_session.flush()
+        seeded_session.rollback()
+
+        # Assert
+        assert _overview(seeded_session, doctor)[1] == 0
+        status = dashboard_cache_service.get_cache_status()
+        assert status["invalidations"] == invalidations
+
+    def test_result_loaded_during_invalidation_is_not_stored(self):
+        """Testa que um resultado calculado antes de uma invalidação é descartado."""
+        # Arrange
+        backend = MemoryCacheBackend(max_entries=10, ttl_seconds=60)
+        value, generation = backend.get(1, "overview", ADAPTER)
+
+        # Act
+        backend.invalidate({1})
+        backend.put(1, "overview", 42, ADAPTER, generation)
+
+        # Assert
+        assert value is _MISSING
+        assert backend.get(1, "overview", ADAPTER)[0] is _MISSING
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Testa a remoção da entrada usada há mais tempo quando o cache enche."""
+        # Arrange
+        backend = MemoryCacheBackend(max_entries=2, ttl_seconds=60)
+        for doctor_id in (1, 2):
+            backend.put(doctor_id, "overview", doctor_id, ADAPTER, 0)
+        backend.get(1, "overview", ADAPTER)
+
+        # Act
+        backend.put(3, "overview", 3, ADAPTER, 0)
+
+        # Assert
+        assert backend.get(1, "overview", ADAPTER)[0] == 1
+        assert backend.get(2, "overview", ADAPTER)[0] is _MISSING
+        assert backend.get(3, "overview", ADAPTER)[0] == 3
+        assert backend.evictions == 1
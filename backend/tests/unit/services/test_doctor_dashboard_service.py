@@ -0,0 +1,268 @@
+import asyncio
+import threading
+from datetime import date, datetime, timedelta
+from http import HTTPStatus
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, literal, select
+
+from core.enums import BindEnum, TestStatus
+from core.services import doctor_dashboard_service
+from core.services.cohort_service import calculate_age, get_age_group
+
+
+def _years_ago(years):
+    today = date.today()
+    if (today.month, today.day) == (2, 29):
+        today -= timedelta(days=1)
+    return today.replace(year=today.year - years)
+
+
+@pytest.fixture
+def dashboard_session(seeded_session, db_factory):
+    """
+    Sessão semeada com mais um paciente vinculado (jovem, um teste espiral
+    concluído hoje e um pendente) e um paciente desvinculado, que não entra.
+    """
+    young = db_factory.patient("55566677788", birthdate=date(1995, 6, 1))
+    db_factory.bind(young.id)
+    db_factory.spiral_test(0.9, young.id)
+    db_factory.voice_test(None, young.id, TestStatus.PENDING)
+    unlinked = db_factory.patient("99988877766", birthdate=date(1950, 1, 1))
+    db_factory.bind(unlinked.id, status=BindEnum.REVERSED)
+    db_factory.spiral_test(0.1, unlinked.id)
+    seeded_session.commit()
+
+    seeded_session.info["young"] = young
+    # Recarrega antes de limpar o log: o refresh não conta como consulta do widget
+    seeded_session.refresh(seeded_session.info["doctor"])
+    seeded_session.info["sql"].clear()
+    return seeded_session
+
+
+class TestDoctorDashboardService:
+    """Testes para os widgets do dashboard do médico, uma consulta cada."""
+
+    def test_overview_in_one_statement(self, dashboard_session):
+        """Testa a visão geral e o status dos pacientes numa única consulta."""
+        # Arrange
+        doctor = dashboard_session.info["doctor"]
+
+        # Act
+        overview = doctor_dashboard_service.get_dashboard_overview(
+            dashboard_session, doctor
+        )
+
+        # Assert
+        assert len(dashboard_session.info["sql"]) == 1
+        assert overview.total_patients == 2
+        # Carlos: média 0.6 (attention); paciente jovem: 0.9 (stable)
+        assert overview.patients_by_status.model_dump() == {
+            "stable": 1,
+            "attention": 1,
+            "critical": 0,
+        }
+        assert overview.total_tests == 4
+        assert overview.total_tests_this_month == 1
+        assert overview.avg_score_all_patients == pytest.approx(2.7 / 4)
+
+    def test_overview_without_patients(self, dashboard_session):
+        """Testa a visão geral de um médico sem pacientes vinculados."""
+        # Arrange
+        doctor = dashboard_session.info["patient"]
+
+        # Act
+        overview = doctor_dashboard_service.get_dashboard_overview(
+            dashboard_session, doctor
+        )
+
+        # Assert
+        assert overview.total_patients == 0
+        assert overview.patients_by_status.stable == 0
+        assert overview.total_tests == 0
+        assert overview.avg_score_all_patients is None
+
+    def test_rankings_in_one_statement(self, dashboard_session):
+        """Testa os três rankings numa única consulta."""
+        # Arrange
+        doctor = dashboard_session.info["doctor"]
+        carlos = dashboard_session.info["patient"].id
+        young = dashboard_session.info["young"].id
+        dashboard_session.info["sql"].clear()
+
+        # Act
+        rankings = doctor_dashboard_service.get_rankings(dashboard_session, doctor, limit=1)
+        full = doctor_dashboard_service.get_rankings(dashboard_session, doctor)
+
+        # Assert
+        assert len(dashboard_session.info["sql"]) == 2
+        assert [r.patient_id for r in rankings.top_spiral_scores] == [young]
+        assert [r.patient_id for r in rankings.top_voice_scores] == [carlos]
+        assert [r.patient_id for r in rankings.top_overall_scores] == [young]
+        assert [r.patient_id for r in full.top_spiral_scores] == [young, carlos]
+        assert [r.patient_id for r in full.top_voice_scores] == [carlos]
+        assert full.top_spiral_scores[1].avg_score == pytest.approx(0.6)
+        assert full.top_spiral_scores[1].total_tests == 2
+        assert full.top_overall_scores[1].total_tests == 3
+        assert full.top_overall_scores[1].last_test_date == datetime(2025, 3, 1, 10, 0)
+
+    def test_score_evolution_in_one_statement(self, dashboard_session):
+        """Testa a evolução das pontuações numa única consulta."""
+        # Arrange
+        doctor = dashboard_session.info["doctor"]
+
+        # Act
+        evolution = doctor_dashboard_service.get_score_evolution(dashboard_session, doctor)
+
+        # Assert
+        assert len(dashboard_session.info["sql"]) == 1
+        assert len(evolution.time_series) == 1
+        assert evolution.time_series[0].avg_score == pytest.approx(0.9)
+        assert evolution.time_series[0].test_count == 1
+
+    def test_age_group_analysis_in_one_statement(self, dashboard_session):
+        """Testa a análise por faixa etária numa única consulta."""
+        # Arrange
+        doctor = dashboard_session.info["doctor"]
+
+        # Act
+        analysis = doctor_dashboard_service.get_age_group_analysis(
+            dashboard_session, doctor
+        )
+
+        # Assert
+        assert len(dashboard_session.info["sql"]) == 1
+        groups = {group.age_range: group for group in analysis.age_groups}
+        assert [group.age_range for group in analysis.age_groups] == ["0-40", "61-75"]
+        assert groups["0-40"].patient_count == 1
+        assert groups["0-40"].avg_score == pytest.approx(0.9)
+        assert groups["0-40"].avg_voice_score is None
+        assert groups["61-75"].patient_count == 1
+        assert groups["61-75"].avg_spiral_score == pytest.approx(0.6)
+        assert groups["61-75"].avg_voice_score == pytest.approx(0.6)
+
+    def test_test_distribution_in_one_statement(self, dashboard_session):
+        """Testa a distribuição de testes numa única consulta."""
+        # Arrange
+        doctor = dashboard_session.info["doctor"]
+
+        # Act
+        distribution = doctor_dashboard_service.get_test_distribution(
+            dashboard_session, doctor
+        )
+
+        # Assert
+        assert len(dashboard_session.info["sql"]) == 1
+        assert distribution.total_tests == 4
+        assert distribution.spiral_tests.count == 3
+        assert distribution.spiral_tests.avg_score == pytest.approx(0.7)
+        assert distribution.voice_tests.percentage == pytest.approx(25.0)
+        assert distribution.by_classification == {"healthy": 2, "parkinson": 2}
+
+    def test_summary_runs_sections_concurrently(self, dashboard_session):
+        """Testa o resumo com todas as seções, uma consulta por seção."""
+        # Arrange
+        doctor = dashboard_session.info["doctor"]
+        engine = dashboard_session.get_bind()
+        threads = set()
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def record_thread(conn, cursor, statement, parameters, context, executemany):
+            threads.add(threading.get_ident())
+
+        # Act
+        summary = asyncio.run(
+            doctor_dashboard_service.get_dashboard_summary(
+                engine, doctor, doctor_dashboard_service.parse_sections(None), limit=5
+            )
+        )
+
+        # Assert
+        assert len(dashboard_session.info["sql"]) == 5
+        assert threading.get_ident() not in threads
+        assert summary.overview == doctor_dashboard_service.get_dashboard_overview(
+            dashboard_session, doctor
+        )
+        assert summary.rankings == doctor_dashboard_service.get_rankings(
+            dashboard_session, doctor, limit=5
+        )
+        assert summary.age_group_analysis == (
+            doctor_dashboard_service.get_age_group_analysis(dashboard_session, doctor)
+        )
+        assert summary.test_distribution.total_tests == 4
+        assert len(summary.score_evolution.time_series) == 1
+
+    def test_summary_with_selected_sections(self, dashboard_session):
+        """Testa que só as seções pedidas em ``?sections=`` são consultadas."""
+        # Arrange
+        doctor = dashboard_session.info["doctor"]
+        sections = doctor_dashboard_service.parse_sections("test_distribution, overview")
+
+        # Act
+        summary = asyncio.run(
+            doctor_dashboard_service.get_dashboard_summary(
+                dashboard_session.get_bind(), doctor, sections
+            )
+        )
+
+        # Assert
+        assert sections == ["overview", "test_distribution"]
+        assert len(dashboard_session.info["sql"]) == 2
+        assert summary.overview.total_patients == 2
+        assert summary.test_distribution.total_tests == 4
+        assert summary.rankings is None
+        assert summary.score_evolution is None
+
+    def test_summary_sections_receive_detached_doctor(self, dashboard_session, monkeypatch):
+        """Testa que as threads das seções recebem só o ID, não o User da sessão."""
+        # Arrange
+        doctor = dashboard_session.info["doctor"]
+        received = []
+
+        def fake_overview(session, doctor):
+            received.append(doctor)
+
+        monkeypatch.setattr(
+            doctor_dashboard_service, "get_dashboard_overview", fake_overview
+        )
+
+        # Act
+        asyncio.run(
+            doctor_dashboard_service.get_dashboard_summary(
+                dashboard_session.get_bind(), doctor, ["overview"]
+            )
+        )
+
+        # Assert
+        assert received == [doctor_dashboard_service.DoctorRef(doctor.id)]
+        assert not isinstance(received[0], type(doctor))
+
+    def test_parse_sections_rejects_unknown(self):
+        """Testa que uma seção desconhecida é rejeitada."""
+        # Act & Assert
+        with pytest.raises(HTTPException) as exc_info:
+            doctor_dashboard_service.parse_sections("overview,patients")
+
+        assert exc_info.value.status_code == HTTPStatus.BAD_REQUEST
+        assert "patients" in exc_info.value.detail
+
+    @pytest.mark.parametrize(
+        "birthdate",
+        # Aniversários de ontem, hoje e amanhã nas bordas das faixas
+        [
+            _years_ago(years) + timedelta(days=days)
+            for years in (40, 41, 60, 61, 75, 76)
+            for days in (-1, 0, 1)
+        ]
+        + [date(1952, 2, 29), date(1985, 12, 31)],
+    )
+    def test_age_group_case_matches_python(self, sqlite_session, birthdate):
+        """Testa que a faixa etária calculada no banco é a mesma do Python."""
+        # Act
+        age_range = sqlite_session.scalar(
+            select(doctor_dashboard_service._age_group_case(literal(birthdate)))
+        )
+
+        # Assert
+        assert age_range == get_age_group(calculate_age(birthdate))
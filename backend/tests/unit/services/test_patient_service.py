@@ -1,4 +1,4 @@
-from datetime import date
+from datetime import date, datetime
 from http import HTTPStatus
 from unittest.mock import MagicMock, patch
 
@@ -7,9 +7,9 @@ from fastapi import HTTPException
 
 from api.schemas.binding import RequestBinding
 from api.schemas.users import PatientSchema
-from core.enums import BindEnum, UserType
-from core.models import Bind
-from core.services import patient_service
+from core.enums import BindEnum, TestStatus, TestType, UserType
+from core.models import Bind, VoiceTest
+from core.services import doctor_dashboard_service, patient_service
 
 
 class TestPatientService:
@@ -363,3 +363,60 @@ class TestPatientService:
                             assert result == patient_data
                             mock_session.add.assert_called_once()
                             mock_session.commit.assert_called_once()
+
+    def test_get_patients_status_uses_last_five_tests(self, seeded_session):
+        """Testa que o status usa só os 5 testes mais recentes, numa única consulta."""
+        # Arrange
+        patient_id = seeded_session.info["patient"].id
+        doctor_id = seeded_session.info["doctor"].id
+        for day, score in enumerate([0.1, 0.2, 0.3, 0.2, 0.1], start=1):
+            test = VoiceTest(
+                test_type=TestType.VOICE_TEST,
+                score=score,
+                patient_id=patient_id,
+                doctor_id=doctor_id,
+                record_duration=5.0,
+            )
+            test.execution_date = datetime(2025, 6, day)
+            seeded_session.add(test)
+        pending = VoiceTest(
+            test_type=TestType.VOICE_TEST,
+            score=None,
+            patient_id=patient_id,
+            doctor_id=doctor_id,
+            record_duration=5.0,
+        )
+        pending.status = TestStatus.PENDING
+        seeded_session.add(pending)
+        seeded_session.commit()
+        executed = seeded_session.info["sql"]
+        executed.clear()
+
+        # Act
+        statuses = patient_service.get_patients_status(seeded_session, [patient_id, 999])
+
+        # Assert
+        assert statuses == {patient_id: "critical", 999: "stable"}
+        assert len(executed) == 1
+        assert "row_number() OVER (PARTITION BY test.patient_id" in executed[0]
+
+    def test_dashboard_data_and_overview_share_batched_status(self, seeded_session):
+        """Testa o dashboard dos pacientes e a visão geral sem consultas por paciente."""
+        # Arrange
+        doctor = seeded_session.info["doctor"]
+        patient_id = seeded_session.info["patient"].id
+
+        # Act
+        dashboard = patient_service.get_patients_dashboard_data(seeded_session, doctor)
+        overview = doctor_dashboard_service.get_dashboard_overview(seeded_session, doctor)
+
+        # Assert
+        # Últimos testes: 0.8, 0.4 e 0.6 (média 0.6)
+        assert len(dashboard) == 1
+        assert dashboard[0].id == patient_id
+        assert dashboard[0].status == "attention"
+        assert dashboard[0].tests_count == 3
+        assert dashboard[0].last_test_type == "voice"
+        assert dashboard[0].last_test_date.startswith("2025-03-01")
+        assert overview.patients_by_status.attention == 1
+        assert overview.patients_by_status.stable == 0
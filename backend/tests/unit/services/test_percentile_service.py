@@ -0,0 +1,107 @@
+import random
+from datetime import date
+
+import pytest
+
+from core.enums import Gender
+from core.services import percentile_service
+from core.services.cohort_service import CohortKey, bucket_of
+from core.services.percentile_service import ScoreSketch
+
+STATES = {"SP": ["São Paulo", "Campinas"], "RJ": ["Niterói"]}
+
+
+def _exact_percentile(averages, score):
+    return sum(1 for average in averages if average < score) / len(averages) * 100
+
+
+def _add_random_population(db_factory, rng):
+    """Pacientes com coorte, consentimento e testes aleatórios."""
+    addresses = [
+        db_factory.address(city, state)
+        for state, cities in STATES.items()
+        for city in cities
+    ]
+
+    for index in range(rng.randint(20, 60)):
+        patient = db_factory.patient(
+            f"{index:011d}",
+            birthdate=date(rng.randint(1940, 2000), rng.randint(1, 12), 1),
+            gender=rng.choice(list(Gender)),
+            address_id=rng.choice(addresses).id,
+            share=rng.random() < 0.8,
+        )
+        for _ in range(rng.randint(0, 4)):
+            db_factory.voice_test(round(rng.random(), 4), patient.id)
+        # Um commit por paciente: exercita as atualizações incrementais
+        db_factory.session.commit()
+
+
+class TestPercentileService:
+    """Testes para o percentil estimado pelos sketches."""
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_sketch_estimate_within_error_bound(self, seed):
+        """Propriedade: o percentil estimado fica dentro do erro informado."""
+        # Arrange
+        rng = random.Random(seed)
+        averages = [rng.betavariate(2, 2) for _ in range(rng.randint(1, 500))]
+        score = rng.random()
+
+        # Act
+        estimate = ScoreSketch.of(averages).percentile(score)
+
+        # Assert
+        exact = _exact_percentile(averages, score)
+        assert abs(estimate.percentile - exact) <= estimate.max_error + 1e-9
+
+    def test_sketches_are_mergeable(self):
+        """Testa que mesclar sketches equivale a um sketch das duas amostras."""
+        # Arrange
+        rng = random.Random(7)
+        first = [rng.random() for _ in range(100)]
+        second = [rng.random() for _ in range(50)]
+
+        # Act
+        merged = ScoreSketch.of(first).merge(ScoreSketch.of(second))
+
+        # Assert
+        assert merged.counts == ScoreSketch.of(first + second).counts
+        assert merged.total == 150
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_persisted_sketches_match_exact_mode(
+        self, seeded_session, db_factory, monkeypatch, seed
+    ):
+        """Propriedade: em cada recorte, o modo sketch fica dentro do erro do modo exato."""
+        # Arrange
+        rng = random.Random(seed)
+        _add_random_population(db_factory, rng)
+        patient = seeded_session.info["patient"]
+        key = CohortKey("61-75", Gender.FEMALE, "São Paulo", "SP")
+        score = 0.6
+
+        # Act
+        estimated = percentile_service.patient_percentiles(
+            seeded_session, key, score, patient.id, in_sketches=True
+        )
+        monkeypatch.setattr(percentile_service.settings, "PERCENTILE_MODE", "exact")
+        exact = percentile_service.patient_percentiles(
+            seeded_session, key, score, patient.id, in_sketches=True
+        )
+
+        # Assert
+        assert estimated.keys() == exact.keys()
+        sketches = percentile_service.load_sketches(
+            seeded_session, list(percentile_service.sketch_names(key).values())
+        )
+        for dimension, name in percentile_service.sketch_names(key).items():
+            if exact[dimension] is None:
+                continue
+            sketch = sketches[name]
+            sketch.remove(score)
+            bound = sketch.counts[bucket_of(score)] / sketch.total * 100
+            assert exact[dimension].max_error == 0
+            assert estimated[dimension].max_error == pytest.approx(bound)
+            error = abs(estimated[dimension].percentile - exact[dimension].percentile)
+            assert error <= estimated[dimension].max_error + 1e-9
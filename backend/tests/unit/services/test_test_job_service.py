@@ -0,0 +1,275 @@
+import asyncio
+from datetime import datetime
+from http import HTTPStatus
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+
+from api.schemas.tests import ClinicalProcessSpiralSchema, SpiralImageSchema
+from core.enums import SpiralMethods, TestStatus, TestType
+from core.models import SpiralTest, VoiceTest
+from core.services import test_job_service
+
+
+def _make_voice_test(status=TestStatus.PENDING, attempts=1):
+    """Cria um teste de voz na fila, como o worker o encontra no banco."""
+    voice_test = VoiceTest(
+        test_type=TestType.VOICE_TEST,
+        score=None,
+        patient_id=10,
+        doctor_id=20,
+        record_duration=5.0,
+    )
+    voice_test.id = 1
+    voice_test.status = status
+    voice_test.attempts = attempts
+    voice_test.execution_date = datetime(2025, 1, 1, 10, 0)
+    voice_test.voice_audio_data = b"webm_content"
+    voice_test.voice_audio_filename = "audio.webm"
+    voice_test.voice_audio_content_type = "audio/webm"
+    return voice_test
+
+
+def _add_claimed_voice_test(db_factory, status=TestStatus.PROCESSING, attempts=1):
+    """Grava um teste de voz reservado por um worker (tentativa ``attempts``)."""
+    voice_test = db_factory.voice_test(None, status=status)
+    voice_test.attempts = attempts
+    db_factory.session.commit()
+    return voice_test.id
+
+
+def _reload(session, job_id):
+    session.expire_all()
+    return session.get(VoiceTest, job_id, execution_options=test_job_service.UNFINISHED)
+
+
+def _run_in(session):
+    """Executa as etapas do worker com a sessão simulada."""
+    return lambda fn, *args: fn(session, *args)
+
+
+class TestTestJobService:
+    """Testes para a fila de processamento assíncrono de testes."""
+
+    def test_enqueue_clinical_spiral_creates_pending_test(self, mock_session, blob_store):
+        """Testa que o teste é salvo como PENDING, sem chamar o modelo."""
+        # Arrange
+        doctor = MagicMock(id=20)
+        schema = ClinicalProcessSpiralSchema(
+            patient_id=10,
+            image=SpiralImageSchema(
+                image_content=b"png",
+                image_filename="spiral.png",
+                image_content_type="image/png",
+            ),
+            draw_duration=12.5,
+            method=SpiralMethods.WEBCAM,
+        )
+
+        def refresh(test_db):
+            test_db.id = 42
+
+        mock_session.refresh.side_effect = refresh
+
+        with (
+            patch.object(
+                test_job_service, "get_bound_patient", return_value=MagicMock(id=10)
+            ),
+            patch.object(test_job_service, "test_job_worker") as mock_worker,
+            patch.object(test_job_service.ai, "get_spiral_image_models_response") as ai_call,
+        ):
+            # Act
+            job = asyncio.run(
+                test_job_service.enqueue_clinical_spiral(schema, doctor, mock_session)
+            )
+
+            # Assert
+            saved = mock_session.add.call_args.args[0]
+            assert isinstance(saved, SpiralTest)
+            assert saved.status == TestStatus.PENDING
+            assert saved.score is None
+            assert saved.spiral_image_data is None
+            assert blob_store.read(saved.spiral_image_key) == b"png"
+            assert saved.spiral_image_size == 3
+            assert job.job_id == 42
+            assert job.status == TestStatus.PENDING
+            assert job.status_url == "/api/tests/jobs/42"
+            mock_worker.notify.assert_called_once()
+            ai_call.assert_not_called()
+
+    def test_get_test_job_hidden_from_other_users(self, mock_session):
+        """Testa que só o médico e o paciente do teste enxergam o job."""
+        # Arrange
+        mock_session.get.return_value = _make_voice_test()
+
+        # Act & Assert
+        with pytest.raises(HTTPException) as exc_info:
+            test_job_service.get_test_job(mock_session, MagicMock(id=99), job_id=1)
+
+        assert exc_info.value.status_code == HTTPStatus.NOT_FOUND
+
+    def test_get_test_job_completed_includes_result(self, mock_session):
+        """Testa que um job concluído retorna o resultado clínico."""
+        # Arrange
+        voice_test = _make_voice_test(status=TestStatus.COMPLETED)
+        voice_test.score = 0.8
+        voice_test.raw_parkinson_probability = 0.2
+        voice_test.voice_analysis = "Análise"
+        mock_session.get.return_value = voice_test
+
+        # Act
+        job = test_job_service.get_test_job(mock_session, MagicMock(id=20), job_id=1)
+
+        # Assert
+        assert job.status == TestStatus.COMPLETED
+        assert job.result.classification == "HEALTHY"
+        assert job.result.analysis == "Análise"
+
+    def test_claim_next_job_empty_queue(self, mock_session):
+        """Testa que a fila vazia não reserva nada."""
+        # Arrange
+        mock_session.execute.return_value.first.return_value = None
+
+        # Act
+        job = test_job_service.claim_next_job(mock_session)
+
+        # Assert
+        assert job is None
+        mock_session.commit.assert_not_called()
+
+    def test_claim_next_job_reserves_row(self, mock_session):
+        """Testa que o job reservado vira PROCESSING numa única transação."""
+        # Arrange
+        row = MagicMock(id=7, test_type=TestType.SPIRAL_TEST, attempts=0)
+        mock_session.execute.return_value.first.return_value = row
+
+        # Act
+        job = test_job_service.claim_next_job(mock_session)
+
+        # Assert
+        assert job == (7, TestType.SPIRAL_TEST, 1)
+        claim_sql = str(mock_session.execute.call_args_list[0].args[0])
+        assert "FOR UPDATE" in claim_sql
+        mock_session.commit.assert_called_once()
+
+    def test_fail_job_retries_service_errors(self, seeded_session, db_factory):
+        """Testa que indisponibilidade do serviço devolve o job para a fila."""
+        # Arrange
+        job_id = _add_claimed_voice_test(db_factory, attempts=1)
+        error = HTTPException(status_code=HTTPStatus.SERVICE_UNAVAILABLE, detail="Fora")
+
+        # Act
+        status = test_job_service.fail_job(seeded_session, job_id, 1, error)
+
+        # Assert
+        voice_test = _reload(seeded_session, job_id)
+        assert status == TestStatus.PENDING
+        assert voice_test.status == TestStatus.PENDING
+        assert voice_test.available_at is not None
+        assert voice_test.error_message == "Fora"
+
+    def test_fail_job_rejected_input_fails(self, seeded_session, db_factory):
+        """Testa que uma entrada rejeitada pelo modelo não é tentada de novo."""
+        # Arrange
+        job_id = _add_claimed_voice_test(db_factory, attempts=1)
+        error = HTTPException(status_code=HTTPStatus.UNPROCESSABLE_ENTITY, detail="Inválido")
+
+        # Act
+        status = test_job_service.fail_job(seeded_session, job_id, 1, error)
+
+        # Assert
+        voice_test = _reload(seeded_session, job_id)
+        assert status == TestStatus.FAILED
+        assert voice_test.status == TestStatus.FAILED
+        assert voice_test.available_at is None
+
+    def test_late_fail_job_keeps_completed_test(self, seeded_session, db_factory):
+        """Testa que a falha de um worker que perdeu o lease não desfaz a conclusão."""
+        # Arrange
+        job_id = _add_claimed_voice_test(db_factory, TestStatus.COMPLETED, attempts=1)
+        error = HTTPException(status_code=HTTPStatus.SERVICE_UNAVAILABLE, detail="Fora")
+
+        # Act
+        status = test_job_service.fail_job(seeded_session, job_id, 1, error)
+
+        # Assert
+        voice_test = _reload(seeded_session, job_id)
+        assert status is None
+        assert voice_test.status == TestStatus.COMPLETED
+        assert voice_test.error_message is None
+
+    def test_complete_job_after_lease_lost_is_discarded(self, seeded_session, db_factory):
+        """Testa que o resultado de uma tentativa que perdeu o lease é descartado."""
+        # Arrange: o lease da tentativa 1 expirou e outro worker reservou a 2
+        job_id = _add_claimed_voice_test(db_factory, attempts=2)
+        model_result = MagicMock(score=0.1, analysis="Tarde demais")
+
+        # Act
+        stale = test_job_service.complete_job(seeded_session, job_id, 1, model_result)
+        current = test_job_service.complete_job(
+            seeded_session, job_id, 2, MagicMock(score=0.3, analysis="Análise")
+        )
+
+        # Assert
+        voice_test = _reload(seeded_session, job_id)
+        assert (stale, current) == (False, True)
+        assert voice_test.status == TestStatus.COMPLETED
+        assert voice_test.score == pytest.approx(0.7)
+        assert voice_test.voice_analysis == "Análise"
+        assert voice_test.available_at is None
+
+    def test_run_job_completes_voice_test(self, mock_session):
+        """Testa que o worker envia o áudio salvo e grava o resultado."""
+        # Arrange
+        voice_test = _make_voice_test(status=TestStatus.PROCESSING)
+        mock_session.get.return_value = voice_test
+        mock_session.execute.return_value.rowcount = 1
+        model_result = MagicMock(score=0.1, analysis="Análise")
+
+        with (
+            patch.object(test_job_service, "_in_session", _run_in(mock_session)),
+            patch.object(
+                test_job_service.ai,
+                "get_voice_model_response",
+                AsyncMock(return_value=model_result),
+            ) as ai_call,
+        ):
+            # Act
+            asyncio.run(test_job_service.run_job(1, TestType.VOICE_TEST, 1))
+
+            # Assert
+            sent_audio = ai_call.call_args.args[0]
+            assert sent_audio.filename == "audio.webm"
+            assert voice_test.status == TestStatus.COMPLETED
+            assert voice_test.score == pytest.approx(0.9)
+            assert voice_test.voice_analysis == "Análise"
+            mock_session.commit.assert_called_once()
+
+    def test_run_job_missing_media_fails_without_retry(self, seeded_session, db_factory):
+        """Testa que um job sem mídia no blob store falha já na primeira tentativa."""
+        # Arrange
+        spiral_test = db_factory.spiral_test(None, status=TestStatus.PROCESSING)
+        spiral_test.attempts = 1
+        spiral_test.spiral_image_key = "b" * 64
+        seeded_session.commit()
+        job_id = spiral_test.id
+        # O worker carrega o teste numa sessão própria
+        seeded_session.expunge(spiral_test)
+
+        with (
+            patch.object(test_job_service, "_in_session", _run_in(seeded_session)),
+            patch.object(test_job_service.ai, "get_spiral_image_models_response") as ai_call,
+        ):
+            # Act
+            asyncio.run(test_job_service.run_job(job_id, TestType.SPIRAL_TEST, 1))
+
+        # Assert
+        seeded_session.expire_all()
+        failed = seeded_session.get(
+            SpiralTest, job_id, execution_options=test_job_service.UNFINISHED
+        )
+        assert failed.status == TestStatus.FAILED
+        assert failed.available_at is None
+        assert failed.error_message == "Mídia do teste não encontrada."
+        ai_call.assert_not_called()
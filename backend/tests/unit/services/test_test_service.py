@@ -1,14 +1,61 @@
+import asyncio
 from http import HTTPStatus
-from unittest.mock import MagicMock, mock_open, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import cv2
 import httpx
+import numpy as np
 import pytest
 from fastapi import HTTPException, UploadFile
+from sqlalchemy.exc import InvalidRequestError
 
-from api.schemas.tests import SpiralImageSchema
-from core.enums import BindEnum, TestType
+from api.schemas.tests import ProcessSpiralSchema, SpiralImageSchema
+from core.enums import BindEnum, ImageSize, SpiralMethods, TestType
 from core.models import Bind, SpiralTest, Test, VoiceTest
 from core.services import test_service
+from core.utils import ai
+from core.utils.resilience import BreakerState, CircuitBreaker
+from infra.storage import backfill_renditions
+
+
+def _make_audio_upload():
+    """Cria um UploadFile simulado com o WebM gravado pelo navegador."""
+    mock_audio = MagicMock(spec=UploadFile)
+    mock_audio.filename = "audio.webm"
+    mock_audio.content_type = "audio/webm"
+    mock_audio.seek = AsyncMock()
+    mock_audio.read = AsyncMock(return_value=b"webm_content")
+    return mock_audio
+
+
+def _make_png(width=2000, height=1500):
+    """Cria uma foto de espiral grande, como as enviadas pela câmera."""
+    img = np.full((height, width, 3), 255, np.uint8)
+    cv2.circle(img, (width // 2, height // 2), height // 3, (0, 0, 0), 8)
+    return cv2.imencode(".png", img)[1].tobytes()
+
+
+def _image_shape(data):
+    return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR).shape[:2]
+
+
+def _patch_client():
+    """Substitui o cliente HTTP compartilhado dos serviços de ML."""
+    mock_client = MagicMock()
+    mock_client.post = AsyncMock()
+    return patch("core.utils.ai.get_client", return_value=mock_client), mock_client.post
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    """Circuit breakers novos a cada teste e retentativas sem espera."""
+    breakers = {
+        service: CircuitBreaker(service, failure_threshold=5, reset_timeout=30.0)
+        for service in ai.breakers
+    }
+    monkeypatch.setattr(ai, "breakers", breakers)
+    monkeypatch.setattr(ai.settings, "CLASSIFIER_RETRY_BASE_DELAY_SECONDS", 0.0)
+    return breakers
 
 
 class TestTestService:
@@ -23,23 +70,24 @@ class TestTestService:
             image_content_type="image/png",
         )
 
-        mock_response = MagicMock()
+        mock_response = MagicMock(status_code=200)
         mock_response.json.return_value = {
-            "prediction": "healthy",
-            "confidence": 0.95,
+            "model_results": {},
+            "vote_count": {"Healthy": 3, "Parkinson": 0},
+            "majority_decision": "Healthy",
         }
 
-        with patch("core.services.test_service.httpx.Client") as mock_client:
-            mock_client.return_value.__enter__.return_value.post.return_value = (
-                mock_response
-            )
+        client_patch, mock_post = _patch_client()
+        mock_post.return_value = mock_response
 
+        with client_patch as mock_get_client:
             # Act
-            result = test_service.process_spiral_as_practice(schema)
+            result = asyncio.run(test_service.process_spiral_as_practice(schema))
 
             # Assert
-            assert result["prediction"] == "healthy"
-            assert result["confidence"] == 0.95
+            assert result.majority_decision == "Healthy"
+            mock_get_client.assert_called_once_with("spiral")
+            assert mock_post.call_args.args[0] == test_service.SPIRAL_PRACTICE_SERVICE_URL
 
     def test_process_spiral_as_practice_http_error(self):
         """Testa processamento de espiral quando serviço retorna erro HTTP."""
@@ -55,15 +103,16 @@ class TestTestService:
         mock_response.json.return_value = {"detail": "Internal server error"}
         mock_response.text = "Error occurred"
 
-        with patch("core.services.test_service.httpx.Client") as mock_client:
-            mock_post = mock_client.return_value.__enter__.return_value.post
+        client_patch, mock_post = _patch_client()
+
+        with client_patch:
             mock_post.side_effect = httpx.HTTPStatusError(
                 "Error", request=MagicMock(), response=mock_response
             )
 
             # Act & Assert
             with pytest.raises(HTTPException) as exc_info:
-                test_service.process_spiral_as_practice(schema)
+                asyncio.run(test_service.process_spiral_as_practice(schema))
 
             assert "Erro no serviço de análise de imagem" in exc_info.value.detail
 
@@ -76,76 +125,140 @@ class TestTestService:
             image_content_type="image/png",
         )
 
-        with patch("core.services.test_service.httpx.Client") as mock_client:
-            mock_post = mock_client.return_value.__enter__.return_value.post
+        client_patch, mock_post = _patch_client()
+
+        with client_patch:
             mock_post.side_effect = httpx.RequestError("Connection failed")
 
             # Act & Assert
             with pytest.raises(HTTPException) as exc_info:
-                test_service.process_spiral_as_practice(schema)
+                asyncio.run(test_service.process_spiral_as_practice(schema))
 
             assert exc_info.value.status_code == HTTPStatus.SERVICE_UNAVAILABLE
             assert "Não foi possível comunicar com o serviço" in exc_info.value.detail
+            # Prática é idempotente: tentativa original + retentativas
+            assert mock_post.await_count == 1 + ai.settings.CLASSIFIER_PRACTICE_RETRIES
 
-    def test_process_voice_as_practice_success(self):
-        """Testa processamento de voz como prática com sucesso."""
+    def test_process_spiral_as_practice_retries_until_success(self):
+        """Testa que uma falha transitória na prática é repetida com sucesso."""
         # Arrange
-        mock_audio = MagicMock(spec=UploadFile)
-        mock_response = MagicMock()
+        schema = SpiralImageSchema(
+            image_filename="spiral.png",
+            image_content=b"fake_image_content",
+            image_content_type="image/png",
+        )
+        mock_response = MagicMock(status_code=200)
         mock_response.json.return_value = {
-            "prediction": "parkinson",
-            "confidence": 0.88,
+            "model_results": {},
+            "vote_count": {"Healthy": 0, "Parkinson": 3},
+            "majority_decision": "Parkinson",
         }
 
-        with patch(
-            "core.services.test_service.convert_webm_to_wav", return_value="/tmp/audio.wav"
-        ):
-            with patch("builtins.open", mock_open(read_data=b"wav_content")):
-                with patch("core.services.test_service.httpx.Client") as mock_client:
-                    mock_client.return_value.__enter__.return_value.post.return_value = (
-                        mock_response
+        client_patch, mock_post = _patch_client()
+        mock_post.side_effect = [httpx.ConnectError("Connection reset"), mock_response]
+
+        with client_patch:
+            # Act
+            result = asyncio.run(test_service.process_spiral_as_practice(schema))
+
+            # Assert
+            assert result.majority_decision == "Parkinson"
+            assert mock_post.await_count == 2
+
+    def test_process_spiral_as_practice_breaker_open(self, fresh_breakers):
+        """Testa que, com o circuito aberto, a chamada falha na hora sem ir à rede."""
+        # Arrange
+        schema = SpiralImageSchema(
+            image_filename="spiral.png",
+            image_content=b"fake_image_content",
+            image_content_type="image/png",
+        )
+        breaker = fresh_breakers[ai.SPIRAL_SERVICE]
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+
+        client_patch, mock_post = _patch_client()
+
+        with client_patch:
+            # Act & Assert
+            with pytest.raises(HTTPException) as exc_info:
+                asyncio.run(test_service.process_spiral_as_practice(schema))
+
+            assert breaker.state == BreakerState.OPEN
+            assert exc_info.value.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+            assert "Retry-After" in exc_info.value.headers
+            mock_post.assert_not_awaited()
+
+    def test_classifier_failures_open_breaker(self, fresh_breakers):
+        """Testa que falhas seguidas do serviço abrem o circuito."""
+        # Arrange
+        schema = SpiralImageSchema(
+            image_filename="spiral.png",
+            image_content=b"fake_image_content",
+            image_content_type="image/png",
+        )
+        breaker = fresh_breakers[ai.SPIRAL_SERVICE]
+        client_patch, mock_post = _patch_client()
+        mock_post.side_effect = httpx.ConnectTimeout("Timeout")
+
+        with client_patch:
+            # Act
+            for _ in range(breaker.failure_threshold):
+                with pytest.raises(HTTPException):
+                    asyncio.run(
+                        ai.get_spiral_image_models_response(
+                            schema, test_service.SPIRAL_MODEL_SERVICE_URL
+                        )
                     )
-                    with patch(
-                        "core.services.test_service.os.path.exists", return_value=True
-                    ):
-                        with patch("core.services.test_service.os.remove") as mock_remove:
-                            # Act
-                            result = test_service.process_voice_as_practice(mock_audio)
-
-                            # Assert
-                            assert result["prediction"] == "parkinson"
-                            assert result["confidence"] == 0.88
-                            mock_remove.assert_called_once_with("/tmp/audio.wav")
+
+            # Assert: chamadas clínicas não são repetidas
+            assert mock_post.await_count == breaker.failure_threshold
+            assert breaker.state == BreakerState.OPEN
+            assert ai.get_services_status()["spiral"]["breaker"]["state"] == "open"
+
+    def test_process_voice_as_practice_success(self):
+        """Testa processamento de voz como prática com sucesso (WebM enviado sem conversão)."""
+        # Arrange
+        mock_audio = _make_audio_upload()
+        mock_response = MagicMock(status_code=200)
+        mock_response.json.return_value = {"score": 0.88, "analysis": "Análise"}
+
+        client_patch, mock_post = _patch_client()
+
+        with client_patch:
+            mock_post.return_value = mock_response
+
+            # Act
+            result = asyncio.run(test_service.process_voice_as_practice(mock_audio))
+
+            # Assert
+            assert result.score == 0.88
+            assert result.analysis == "Análise"
+            mock_audio.seek.assert_awaited_once_with(0)
+            sent_files = mock_post.call_args.kwargs["files"]
+            assert sent_files["audio"] == ("audio.webm", b"webm_content", "audio/webm")
 
     def test_process_voice_as_practice_http_error(self):
         """Testa processamento de voz quando serviço retorna erro HTTP."""
         # Arrange
-        mock_audio = MagicMock(spec=UploadFile)
+        mock_audio = _make_audio_upload()
         mock_response = MagicMock()
         mock_response.status_code = 500
         mock_response.json.return_value = {"detail": "Internal error"}
         mock_response.text = "Error"
 
-        with patch(
-            "core.services.test_service.convert_webm_to_wav", return_value="/tmp/audio.wav"
-        ):
-            with patch("builtins.open", mock_open(read_data=b"wav_content")):
-                with patch("core.services.test_service.httpx.Client") as mock_client:
-                    mock_post = mock_client.return_value.__enter__.return_value.post
-                    mock_post.side_effect = httpx.HTTPStatusError(
-                        "Error", request=MagicMock(), response=mock_response
-                    )
-                    with patch(
-                        "core.services.test_service.os.path.exists", return_value=True
-                    ):
-                        with patch("core.services.test_service.os.remove"):
-                            # Act & Assert
-                            with pytest.raises(HTTPException) as exc_info:
-                                test_service.process_voice_as_practice(mock_audio)
-
-                            assert (
-                                "Erro no serviço de análise de voz" in exc_info.value.detail
-                            )
+        client_patch, mock_post = _patch_client()
+
+        with client_patch:
+            mock_post.side_effect = httpx.HTTPStatusError(
+                "Error", request=MagicMock(), response=mock_response
+            )
+
+            # Act & Assert
+            with pytest.raises(HTTPException) as exc_info:
+                asyncio.run(test_service.process_voice_as_practice(mock_audio))
+
+            assert "Erro no serviço de análise de voz" in exc_info.value.detail
 
     def test_get_patient_tests_success(self, mock_session, sample_doctor, sample_patient):
         """Testa busca de testes de um paciente com sucesso."""
@@ -295,75 +408,35 @@ class TestTestService:
         assert exc_info.value.status_code == HTTPStatus.NOT_FOUND
         assert "Paciente não encontrado." in exc_info.value.detail
 
-    def test_process_voice_cleans_up_temp_file(self):
-        """Testa se arquivo temporário é removido após processamento."""
+    def test_process_voice_as_practice_connection_error(self):
+        """Testa processamento de voz quando há erro de conexão."""
         # Arrange
-        mock_audio = MagicMock(spec=UploadFile)
-        temp_file = "/tmp/test_audio.wav"
-
-        with patch(
-            "core.services.test_service.convert_webm_to_wav", return_value=temp_file
-        ):
-            with patch("builtins.open", mock_open(read_data=b"wav_content")):
-                with patch("core.services.test_service.httpx.Client") as mock_client:
-                    mock_response = MagicMock()
-                    mock_response.json.return_value = {"prediction": "healthy"}
-                    mock_client.return_value.__enter__.return_value.post.return_value = (
-                        mock_response
-                    )
+        mock_audio = _make_audio_upload()
 
-                    with patch(
-                        "core.services.test_service.os.path.exists", return_value=True
-                    ):
-                        with patch("core.services.test_service.os.remove") as mock_remove:
-                            # Act
-                            test_service.process_voice_as_practice(mock_audio)
+        client_patch, mock_post = _patch_client()
 
-                            # Assert
-                            mock_remove.assert_called_once_with(temp_file)
+        with client_patch:
+            mock_post.side_effect = httpx.RequestError("Connection failed")
 
-    def test_process_voice_as_practice_connection_error(self):
-        """Testa processamento de voz quando há erro de conexão."""
-        # Arrange
-        mock_audio = MagicMock(spec=UploadFile)
-
-        with patch(
-            "core.services.test_service.convert_webm_to_wav", return_value="/tmp/audio.wav"
-        ):
-            with patch("builtins.open", mock_open(read_data=b"wav_content")):
-                with patch("core.services.test_service.httpx.Client") as mock_client:
-                    mock_post = mock_client.return_value.__enter__.return_value.post
-                    mock_post.side_effect = httpx.RequestError("Connection failed")
-                    with patch(
-                        "core.services.test_service.os.path.exists", return_value=True
-                    ):
-                        with patch("core.services.test_service.os.remove"):
-                            # Act & Assert
-                            with pytest.raises(HTTPException) as exc_info:
-                                test_service.process_voice_as_practice(mock_audio)
-
-                            assert exc_info.value.status_code == 503
-                            assert (
-                                "Não foi possível comunicar com o serviço"
-                                in exc_info.value.detail
-                            )
+            # Act & Assert
+            with pytest.raises(HTTPException) as exc_info:
+                asyncio.run(test_service.process_voice_as_practice(mock_audio))
+
+            assert exc_info.value.status_code == 503
+            assert "Não foi possível comunicar com o serviço" in exc_info.value.detail
 
     def test_process_voice_as_practice_generic_error(self):
         """Testa processamento de voz quando há erro genérico."""
         # Arrange
-        mock_audio = MagicMock(spec=UploadFile)
+        mock_audio = _make_audio_upload()
+        mock_audio.read.side_effect = Exception("Unexpected error")
 
-        with patch(
-            "core.services.test_service.convert_webm_to_wav",
-            side_effect=Exception("Unexpected error"),
-        ):
-            with patch("core.services.test_service.os.path.exists", return_value=False):
-                # Act & Assert
-                with pytest.raises(HTTPException) as exc_info:
-                    test_service.process_voice_as_practice(mock_audio)
+        # Act & Assert
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(test_service.process_voice_as_practice(mock_audio))
 
-                assert exc_info.value.status_code == 500
-                assert "Erro no processamento do áudio" in exc_info.value.detail
+        assert exc_info.value.status_code == 500
+        assert "Erro no processamento do áudio" in exc_info.value.detail
 
     def test_get_patient_detaild_tests_forbidden_access(
         self, mock_session, sample_doctor, sample_patient
@@ -390,3 +463,180 @@ class TestTestService:
 
         assert exc_info.value.status_code == HTTPStatus.FORBIDDEN
         assert "O médico não tem acesso ao paciente informado." in exc_info.value.detail
+
+    def test_timeline_and_statistics_never_select_media_bytes(self, seeded_session):
+        """Testa que timeline e estatísticas não trazem as colunas bytea de mídia."""
+        # Arrange
+        doctor = seeded_session.info["doctor"]
+        patient = seeded_session.info["patient"]
+        patient_id = patient.id
+
+        # Act
+        test_service.get_my_tests_timeline(seeded_session, patient)
+        test_service.get_my_tests_statistics(seeded_session, patient)
+        test_service.get_patient_test_timeline(seeded_session, doctor, patient_id)
+        test_service.get_patient_test_statistics(seeded_session, doctor, patient_id)
+        test_service.get_patient_detaild_tests(seeded_session, doctor, patient_id)
+
+        # Assert
+        executed = seeded_session.info["sql"]
+        assert any("spiral_test" in sql for sql in executed)
+        media_columns = ("spiral_image_data", "voice_audio_data")
+        assert not [sql for sql in executed if any(col in sql for col in media_columns)]
+
+    def test_media_endpoints_load_legacy_bytes(self, seeded_session):
+        """Testa que os endpoints de mídia carregam os bytes legados explicitamente."""
+        # Arrange
+        doctor = seeded_session.info["doctor"]
+        patient = seeded_session.info["patient"]
+        legacy_spiral, _, voice = seeded_session.query(Test).order_by(Test.id).all()
+
+        # Act
+        image = test_service.get_my_spiral_image(seeded_session, patient, legacy_spiral.id)
+        audio = test_service.get_voice_audio(seeded_session, doctor, voice.id)
+
+        # Assert
+        assert image.legacy_data == b"legacy-png"
+        assert image.content_type == "image/png"
+        assert audio.legacy_data == b"legacy-webm"
+        assert audio.size == len(b"legacy-webm")
+
+    def test_media_bytes_raise_without_loader_option(self, seeded_session):
+        """Testa que acessar os bytes sem undefer() falha em vez de consultar às escondidas."""
+        # Arrange
+        spiral_test = seeded_session.query(SpiralTest).first()
+
+        # Act & Assert
+        with pytest.raises(InvalidRequestError):
+            spiral_test.spiral_image_data
+
+    def test_new_spiral_test_stores_renditions(self, blob_store):
+        """Testa que o upload gera miniatura e versão média em WebP."""
+        # Arrange
+        original = _make_png()
+        schema = ProcessSpiralSchema(
+            image=SpiralImageSchema(
+                image_content=original,
+                image_filename="spiral.png",
+                image_content_type="image/png",
+            ),
+            draw_duration=10.0,
+            method=SpiralMethods.PAPER,
+        )
+
+        # Act
+        spiral_test = test_service.new_spiral_test(schema, patient_id=1, doctor_id=2)
+
+        # Assert
+        thumb = blob_store.read(spiral_test.spiral_thumb_key)
+        medium = blob_store.read(spiral_test.spiral_medium_key)
+        assert thumb[8:12] == b"WEBP"
+        assert _image_shape(thumb) == (120, 160)
+        assert _image_shape(medium) == (480, 640)
+        assert len(thumb) < len(medium) < len(original)
+
+    def test_get_spiral_image_serves_requested_size(self, seeded_session, blob_store):
+        """Testa ``?size=thumb`` e o fallback para o original sem miniatura."""
+        # Arrange
+        doctor = seeded_session.info["doctor"]
+        legacy_spiral, spiral, _ = seeded_session.query(Test).order_by(Test.id).all()
+        spiral.spiral_thumb_key = blob_store.put(b"thumb-webp")
+        seeded_session.commit()
+
+        # Act
+        thumb = test_service.get_spiral_image(
+            seeded_session, doctor, spiral.id, ImageSize.THUMB
+        )
+        fallback = test_service.get_spiral_image(
+            seeded_session, doctor, legacy_spiral.id, ImageSize.THUMB
+        )
+
+        # Assert
+        assert thumb.key == spiral.spiral_thumb_key
+        assert thumb.content_type == "image/webp"
+        assert thumb.size == len(b"thumb-webp")
+        assert fallback.legacy_data == b"legacy-png"
+
+    def test_backfill_renditions(self, seeded_session, blob_store, monkeypatch):
+        """Testa o backfill: gera as miniaturas e pula imagens ilegíveis."""
+        # Arrange
+        monkeypatch.setattr(backfill_renditions, "blob_store", blob_store)
+        legacy_spiral, spiral, _ = seeded_session.query(Test).order_by(Test.id).all()
+        spiral.spiral_image_key = blob_store.put(_make_png())
+        seeded_session.commit()
+        spiral_id, legacy_id = spiral.id, legacy_spiral.id
+
+        # Act
+        stats = backfill_renditions.backfill_renditions(seeded_session, batch_size=1)
+
+        # Assert
+        assert stats == {"rows": 2, "skipped": 1}
+        assert seeded_session.get(SpiralTest, spiral_id).spiral_thumb_key
+        assert seeded_session.get(SpiralTest, legacy_id).spiral_thumb_key is None
+
+    def test_timeline_runs_constant_number_of_queries(self, seeded_session):
+        """Testa que a timeline não faz uma consulta por teste (N+1)."""
+        # Arrange
+        patient = seeded_session.info["patient"]
+        patient_id, doctor_id = patient.id, seeded_session.info["doctor"].id
+        executed = seeded_session.info["sql"]
+
+        executed.clear()
+        small = test_service.get_my_tests_timeline(seeded_session, MagicMock(id=patient_id))
+        queries_for_three_tests = len(executed)
+
+        seeded_session.add_all([
+            VoiceTest(
+                test_type=TestType.VOICE_TEST,
+                score=0.9,
+                patient_id=patient_id,
+                doctor_id=doctor_id,
+                record_duration=4.0,
+            )
+            for _ in range(20)
+        ])
+        seeded_session.commit()
+        seeded_session.expunge_all()
+
+        # Act
+        executed.clear()
+        large = test_service.get_my_tests_timeline(seeded_session, MagicMock(id=patient_id))
+
+        # Assert
+        assert len(small.tests) == 3
+        assert len(large.tests) == 23
+        assert len(executed) == queries_for_three_tests == 1
+        spiral_item = next(t for t in small.tests if t.test_type == TestType.SPIRAL_TEST)
+        assert spiral_item.draw_duration is not None
+        assert spiral_item.doctor_name == "Dra. Maria Santos"
+
+    def test_timeline_keyset_pagination(self, seeded_session):
+        """Testa a paginação por cursor (execution_date, id), da mais recente à mais antiga."""
+        # Arrange
+        patient = MagicMock(id=seeded_session.info["patient"].id)
+
+        # Act
+        first = test_service.get_my_tests_timeline(seeded_session, patient, limit=2)
+        second = test_service.get_my_tests_timeline(
+            seeded_session, patient, before=first.next_before, limit=2
+        )
+
+        # Assert
+        assert [t.test_type for t in first.tests] == [
+            TestType.VOICE_TEST,
+            TestType.SPIRAL_TEST,
+        ]
+        assert first.total_count == 3
+        assert len(second.tests) == 1
+        assert second.tests[0].execution_date < first.tests[-1].execution_date
+        assert second.next_before is None
+
+    def test_timeline_invalid_cursor(self, seeded_session):
+        """Testa que um cursor malformado retorna 400."""
+        # Act & Assert
+        with pytest.raises(HTTPException) as exc_info:
+            test_service.get_my_tests_timeline(
+                seeded_session, MagicMock(id=1), before="ontem", limit=2
+            )
+
+        assert exc_info.value.status_code == HTTPStatus.BAD_REQUEST
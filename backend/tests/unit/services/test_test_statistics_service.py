@@ -0,0 +1,143 @@
+import random
+import statistics
+from dataclasses import fields
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from core.enums import TestStatus, TestType
+from core.models import VoiceTest
+from core.services import test_statistics_service as engine
+
+
+def _add_random_tests(session, seed):
+    """Grava uma série aleatória de testes concluídos para o paciente semeado."""
+    rng = random.Random(seed)
+    patient_id = session.info["patient"].id
+    doctor_id = session.info["doctor"].id
+    execution_date = datetime(2025, 4, 1, 8, 0)
+
+    for _ in range(rng.randint(0, 30)):
+        # Intervalos de minutos a semanas, incluindo testes no mesmo dia
+        execution_date += timedelta(seconds=rng.randint(0, 21 * 86400))
+        test = VoiceTest(
+            test_type=TestType.VOICE_TEST,
+            score=round(rng.random(), 4),
+            patient_id=patient_id,
+            doctor_id=doctor_id,
+            record_duration=5.0,
+        )
+        test.execution_date = execution_date
+        session.add(test)
+    session.commit()
+    return patient_id
+
+
+def _assert_same_aggregates(actual, expected):
+    for field in fields(engine.TestAggregates):
+        actual_value = getattr(actual, field.name)
+        expected_value = getattr(expected, field.name)
+        if isinstance(expected_value, float):
+            assert actual_value == pytest.approx(expected_value, abs=1e-9), field.name
+        else:
+            assert actual_value == expected_value, field.name
+
+
+class TestTestStatisticsService:
+    """Testes para o cálculo das estatísticas de testes do paciente."""
+
+    @pytest.mark.parametrize("seed", range(25))
+    def test_sql_matches_python_fallback(self, seeded_session, seed):
+        """Propriedade: a consulta agregada e o cálculo em Python coincidem."""
+        # Arrange
+        patient_id = _add_random_tests(seeded_session, seed)
+
+        # Act
+        in_sql = engine.aggregate_in_sql(seeded_session, patient_id)
+        in_python = engine.aggregate_in_python(
+            engine._load_score_series(seeded_session, patient_id)
+        )
+
+        # Assert
+        _assert_same_aggregates(in_sql, in_python)
+
+    @pytest.mark.parametrize("seed", range(25))
+    def test_python_fallback_matches_reference(self, seed):
+        """Propriedade: contagens, médias e inclinação batem com a biblioteca padrão."""
+        # Arrange
+        rng = random.Random(seed)
+        start = datetime(2025, 1, 1)
+        series = [
+            (
+                rng.choice([TestType.SPIRAL_TEST, TestType.VOICE_TEST]),
+                rng.random(),
+                start + timedelta(days=i * 3),
+            )
+            for i in range(rng.randint(2, 40))
+        ]
+        scores = [score for _, score, _ in series]
+        spiral = [
+            score for test_type, score, _ in series if test_type == TestType.SPIRAL_TEST
+        ]
+
+        # Act
+        aggregates = engine.aggregate_in_python(series)
+
+        # Assert
+        expected_slope = statistics.linear_regression(range(len(scores)), scores).slope
+        assert aggregates.slope == pytest.approx(expected_slope)
+        assert aggregates.total_tests == len(series)
+        assert aggregates.total_spiral_tests + aggregates.total_voice_tests == len(series)
+        assert aggregates.avg_interval_days == 3
+        if spiral:
+            assert aggregates.avg_spiral_score == pytest.approx(statistics.fmean(spiral))
+            assert aggregates.best_spiral_score == max(spiral)
+
+    def test_unfinished_tests_are_ignored(self, seeded_session):
+        """Testa que testes na fila (sem score) não entram nas estatísticas."""
+        # Arrange
+        patient_id = seeded_session.info["patient"].id
+        pending = VoiceTest(
+            test_type=TestType.VOICE_TEST,
+            score=None,
+            patient_id=patient_id,
+            doctor_id=seeded_session.info["doctor"].id,
+            record_duration=5.0,
+        )
+        pending.status = TestStatus.PENDING
+        seeded_session.add(pending)
+        seeded_session.commit()
+
+        # Act
+        aggregates = engine.aggregate_in_sql(seeded_session, patient_id)
+
+        # Assert
+        assert aggregates.total_tests == 3
+        assert aggregates.total_voice_tests == 1
+
+    def test_statistics_single_statement_on_postgres(self, mock_session):
+        """Testa que no Postgres as estatísticas saem de uma única consulta."""
+        # Arrange
+        mock_session.get_bind.return_value.dialect.name = "postgresql"
+        row = mock_session.execute.return_value.one.return_value
+        row._mapping = {field.name: None for field in fields(engine.TestAggregates)}
+        row._mapping.update(
+            total_tests=0, total_spiral_tests=0, total_voice_tests=0, healthy_count=0
+        )
+
+        # Act
+        result = engine.get_test_statistics(mock_session, patient_id=3)
+
+        # Assert
+        mock_session.execute.assert_called_once()
+        sql = str(
+            mock_session.execute.call_args.args[0].compile(dialect=postgresql.dialect())
+        )
+        assert "FILTER (WHERE" in sql
+        assert "regr_slope" in sql
+        assert "lag(" in sql
+        assert "test.status = " in sql
+        assert result.total_tests == 0
+        assert result.trend == "stable"
+        assert result.days_since_last_test is None
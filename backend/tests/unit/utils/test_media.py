@@ -0,0 +1,121 @@
+import asyncio
+from http import HTTPStatus
+
+from starlette.requests import Request
+
+from core.utils.media import MediaFile, media_response
+
+AUDIO = bytes(range(256)) * 1024  # 256 KiB, mais de um pedaço de leitura
+
+
+def _request(**headers):
+    """Cria uma requisição GET com os cabeçalhos informados."""
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "headers": [
+                (name.replace("_", "-").encode(), value.encode())
+                for name, value in headers.items()
+            ],
+        }
+    )
+
+
+def _body(response):
+    """Consome o corpo de uma StreamingResponse."""
+
+    async def collect():
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    return asyncio.run(collect())
+
+
+def _stored_audio(blob_store):
+    key = blob_store.put(AUDIO)
+    return MediaFile.stored(key, len(AUDIO), None, "voice.webm", "audio/webm")
+
+
+class TestMediaResponse:
+    """Testes para o streaming das mídias dos testes."""
+
+    def test_full_response_streams_with_etag(self, blob_store):
+        """Testa a resposta completa, com ETag forte igual ao hash do conteúdo."""
+        # Arrange
+        media = _stored_audio(blob_store)
+
+        # Act
+        response = media_response(_request(), media)
+
+        # Assert
+        assert response.status_code == HTTPStatus.OK
+        assert response.headers["etag"] == f'"{media.key}"'
+        assert response.headers["accept-ranges"] == "bytes"
+        assert response.headers["content-length"] == str(len(AUDIO))
+        assert _body(response) == AUDIO
+
+    def test_range_request_returns_partial_content(self, blob_store):
+        """Testa que um seek do player recebe só o trecho pedido (206)."""
+        # Arrange
+        media = _stored_audio(blob_store)
+
+        # Act
+        response = media_response(_request(range="bytes=100000-100099"), media)
+
+        # Assert
+        assert response.status_code == HTTPStatus.PARTIAL_CONTENT
+        assert response.headers["content-range"] == f"bytes 100000-100099/{len(AUDIO)}"
+        assert response.headers["content-length"] == "100"
+        assert _body(response) == AUDIO[100000:100100]
+
+    def test_suffix_and_open_ranges(self, blob_store):
+        """Testa os intervalos abertos (``500-``) e de sufixo (``-10``)."""
+        # Arrange
+        media = MediaFile.stored(None, None, AUDIO[:1000], "voice.webm", "audio/webm")
+
+        # Act
+        open_range = media_response(_request(range="bytes=500-"), media)
+        suffix = media_response(_request(range="bytes=-10"), media)
+
+        # Assert
+        assert _body(open_range) == AUDIO[500:1000]
+        assert suffix.headers["content-range"] == "bytes 990-999/1000"
+        assert _body(suffix) == AUDIO[990:1000]
+
+    def test_unsatisfiable_range(self, blob_store):
+        """Testa que um intervalo além do fim do arquivo retorna 416."""
+        # Arrange
+        media = _stored_audio(blob_store)
+
+        # Act
+        response = media_response(_request(range=f"bytes={len(AUDIO)}-"), media)
+
+        # Assert
+        assert response.status_code == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+        assert response.headers["content-range"] == f"bytes */{len(AUDIO)}"
+
+    def test_matching_etag_returns_not_modified(self, blob_store):
+        """Testa a revalidação: ETag igual retorna 304 sem corpo."""
+        # Arrange
+        media = _stored_audio(blob_store)
+
+        # Act
+        response = media_response(_request(if_none_match=f'W/{media.etag}'), media)
+
+        # Assert
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert response.body == b""
+
+    def test_stale_if_range_ignores_range(self, blob_store):
+        """Testa que um If-Range de outra versão recebe o arquivo inteiro."""
+        # Arrange
+        media = _stored_audio(blob_store)
+
+        # Act
+        response = media_response(
+            _request(range="bytes=0-9", if_range='"outra-versao"'), media
+        )
+
+        # Assert
+        assert response.status_code == HTTPStatus.OK
+        assert response.headers["content-length"] == str(len(AUDIO))
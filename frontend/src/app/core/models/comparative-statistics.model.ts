@@ -9,6 +9,13 @@ export interface GenderAverages {
   female: number | null;
 }
 
+export interface CohortPercentiles {
+  age_group: number | null;
+  gender: number | null;
+  state: number | null;
+  city: number | null;
+}
+
 export interface PatientDemographics {
   age: number;
   age_group: string;
@@ -34,6 +41,11 @@ export interface ComparativeStatistics {
 
   // Posição do paciente
   patient_percentile: number | null;
+  cohort_percentiles: CohortPercentiles;
+
+  // Erro máximo dos percentis acima, em pontos percentuais (0 no modo exato)
+  patient_percentile_max_error: number | null;
+  cohort_percentiles_max_error: CohortPercentiles;
 
   // Informações demográficas do paciente
   demographics: PatientDemographics;
@@ -63,6 +63,21 @@ export interface TestDistribution {
   by_classification: { [key: string]: number };
 }
 
+export type DashboardSection =
+  | 'overview'
+  | 'rankings'
+  | 'score_evolution'
+  | 'age_group_analysis'
+  | 'test_distribution';
+
+export interface DashboardSummary {
+  overview: DashboardOverview | null;
+  rankings: Rankings | null;
+  score_evolution: ScoreEvolution | null;
+  age_group_analysis: AgeGroupAnalysis | null;
+  test_distribution: TestDistribution | null;
+}
+
 export interface DashboardFilters {
   period: '7d' | '30d' | '3m' | '6m' | '1y';
   testType: 'all' | 'spiral' | 'voice';
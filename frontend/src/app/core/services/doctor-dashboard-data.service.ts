@@ -9,6 +9,8 @@ import {
   ScoreEvolution,
   AgeGroupAnalysis,
   TestDistribution,
+  DashboardSection,
+  DashboardSummary,
 } from '../models/doctor-dashboard.model';
 
 @Injectable({
@@ -127,4 +129,41 @@ export class DoctorDashboardDataService {
         })
       );
   }
+
+  getDashboardSummary(
+    options: {
+      sections?: DashboardSection[];
+      rankingType?: string;
+      limit?: number;
+      timePeriod?: string;
+      testType?: string;
+    } = {}
+  ): Observable<DashboardSummary> {
+    const params: { [key: string]: string } = {
+      ranking_type: options.rankingType ?? 'overall',
+      limit: (options.limit ?? 10).toString(),
+      time_period: options.timePeriod ?? 'month',
+      test_type: options.testType ?? 'all',
+    };
+    if (options.sections?.length) {
+      params['sections'] = options.sections.join(',');
+    }
+    return this.http
+      .get<DashboardSummary>(`${this.apiUrl}/summary`, {
+        ...this.getHttpOptions(),
+        params,
+      })
+      .pipe(
+        map((resp: HttpResponse<DashboardSummary>) => {
+          if (resp.status === 200 && resp.body) {
+            return resp.body;
+          }
+          throw new Error('Failed to fetch dashboard summary');
+        }),
+        catchError((err) => {
+          console.error('Erro ao buscar resumo do dashboard:', err);
+          return throwError(() => err);
+        })
+      );
+  }
 }
@@ -91,75 +91,50 @@ export class DoctorDashboardComponent implements OnInit {
   private loadDashboardData() {
     this.isLoading.set(true);
 
-    // 1. Carregar Overview (para KPIs)
-    this.doctorDashboardDataService.getDashboardOverview().subscribe({
-      next: (overview) => {
-        this.calculateKPIs(overview);
-      },
-      error: (err) => {
-        console.error('Erro ao carregar overview:', err);
-        this.toastService.error('Erro ao carregar dados do dashboard', 'Erro');
-      },
-    });
-
-    // 2. Carregar evolução de scores (gráfico de linha dupla)
-    this.doctorDashboardDataService.getScoreEvolution('month', 'all').subscribe({
-      next: (evolution) => {
-        this.setupScoreEvolutionChart(evolution);
-      },
-      error: (err) => {
-        console.error('Erro ao carregar evolução:', err);
-        this.toastService.error('Erro ao carregar evolução de scores', 'Erro');
-      },
-    });
-
-    // 3. Carregar distribuição por status (donut)
-    this.doctorDashboardDataService.getTestDistribution().subscribe({
-      next: (distribution) => {
-        this.setupStatusDistributionChart(distribution);
-      },
-      error: (err) => console.error('Erro ao carregar distribuição:', err),
-    });
-
-    // 4. Carregar evolução para frequência de testes (área)
-    this.doctorDashboardDataService.getScoreEvolution('month', 'all').subscribe({
-      next: (evolution) => {
-        this.setupTestFrequencyChart(evolution);
-      },
-      error: (err) => console.error('Erro ao carregar frequência:', err),
-    });
-
-    // 5. Carregar rankings invertidos (pacientes que precisam atenção)
-    this.doctorDashboardDataService.getRankings('overall', 5).subscribe({
-      next: (rankings) => {
-        this.loadPatientsNeedingAttention(rankings);
-      },
-      error: (err) => {
-        console.error('Erro ao carregar rankings:', err);
-        this.toastService.error('Erro ao carregar dados de pacientes', 'Erro');
-      },
-    });
-
-    // 6. Carregar análise por faixa etária (CA5)
-    this.doctorDashboardDataService.getAgeGroupAnalysis().subscribe({
-      next: (analysis) => {
-        this.ageGroupAnalysis.set(analysis);
-      },
-      error: (err) => console.error('Erro ao carregar análise etária:', err),
-    });
-
-    // 7. Carregar distribuição de testes por tipo (CA5)
-    this.doctorDashboardDataService.getTestDistribution().subscribe({
-      next: (distribution) => {
-        this.testDistribution.set(distribution);
-        this.isLoading.set(false);
-        this.toastService.success('Dashboard carregado com sucesso!', 'Sucesso');
-      },
-      error: (err) => {
-        console.error('Erro ao carregar distribuição:', err);
-        this.isLoading.set(false);
-      },
-    });
+    // Todas as seções numa única requisição; o backend as consulta em paralelo
+    this.doctorDashboardDataService
+      .getDashboardSummary({
+        rankingType: 'overall',
+        limit: 5,
+        timePeriod: 'month',
+        testType: 'all',
+      })
+      .subscribe({
+        next: (summary) => {
+          // 1. Overview (para KPIs)
+          if (summary.overview) {
+            this.calculateKPIs(summary.overview);
+          }
+
+          // 2. Evolução de scores (linha dupla) e frequência de testes (área)
+          if (summary.score_evolution) {
+            this.setupScoreEvolutionChart(summary.score_evolution);
+            this.setupTestFrequencyChart(summary.score_evolution);
+          }
+
+          // 3. Distribuição por status (donut) e por tipo de teste (CA5)
+          if (summary.test_distribution) {
+            this.setupStatusDistributionChart(summary.test_distribution);
+            this.testDistribution.set(summary.test_distribution);
+          }
+
+          // 4. Rankings invertidos (pacientes que precisam atenção)
+          if (summary.rankings) {
+            this.loadPatientsNeedingAttention(summary.rankings);
+          }
+
+          // 5. Análise por faixa etária (CA5)
+          this.ageGroupAnalysis.set(summary.age_group_analysis);
+
+          this.isLoading.set(false);
+          this.toastService.success('Dashboard carregado com sucesso!', 'Sucesso');
+        },
+        error: (err) => {
+          console.error('Erro ao carregar dashboard:', err);
+          this.toastService.error('Erro ao carregar dados do dashboard', 'Erro');
+          this.isLoading.set(false);
+        },
+      });
   }
 
   private calculateKPIs(overview: any) {
@@ -169,7 +169,7 @@ export class TestDetailComponent implements OnInit, OnDestroy {
 
     if (this.isSpiralTest(test)) {
       // Carregar imagem da espiral
-      this.testDetailService.getSpiralImage(testId).subscribe({
+      this.testDetailService.getSpiralImage(testId, 'medium').subscribe({
         next: (blob) => {
           const url = URL.createObjectURL(blob);
           this.mediaUrl.set(url);
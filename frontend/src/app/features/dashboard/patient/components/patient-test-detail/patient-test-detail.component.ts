@@ -112,7 +112,7 @@ export class PatientTestDetailComponent implements OnInit, OnDestroy {
 
     if (this.isSpiralTest(test)) {
       // Carregar imagem da espiral (paciente usa endpoint específico)
-      this.testDetailService.getMySpiralImage(testId).subscribe({
+      this.testDetailService.getMySpiralImage(testId, 'medium').subscribe({
         next: (blob) => {
           const url = URL.createObjectURL(blob);
           this.mediaUrl.set(url);
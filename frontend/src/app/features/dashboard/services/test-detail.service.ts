@@ -6,6 +6,8 @@ import { TestDetail } from '../../../core/models/test-detail.model';
 import { PatientTimeline } from '../../../core/models/patient-timeline.model';
 import { PatientStatistics } from '../../../core/models/patient-statistics.model';
 
+export type SpiralImageSize = 'thumb' | 'medium' | 'original';
+
 @Injectable({
   providedIn: 'root',
 })
@@ -69,9 +71,11 @@ export class TestDetailService {
   /**
    * Busca a imagem da espiral de um teste específico (médico).
    * Retorna um Blob que pode ser convertido em URL para exibição.
+   * Para exibição em tela use 'medium' (640 px, WebP); o download usa o original.
    */
-  getSpiralImage(testId: number): Observable<Blob> {
+  getSpiralImage(testId: number, size: SpiralImageSize = 'original'): Observable<Blob> {
     return this.http.get(`${this.apiUrl}/tests/test/${testId}/spiral-image`, {
+      params: { size },
       responseType: 'blob',
       withCredentials: true,
     });
@@ -91,9 +95,11 @@ export class TestDetailService {
   /**
    * Busca a imagem da espiral de um teste do próprio paciente.
    * Retorna um Blob que pode ser convertido em URL para exibição.
+   * Para exibição em tela use 'medium' (640 px, WebP); o download usa o original.
    */
-  getMySpiralImage(testId: number): Observable<Blob> {
+  getMySpiralImage(testId: number, size: SpiralImageSize = 'original'): Observable<Blob> {
     return this.http.get(`${this.apiUrl}/tests/my-tests/${testId}/spiral-image`, {
+      params: { size },
       responseType: 'blob',
       withCredentials: true,
     });
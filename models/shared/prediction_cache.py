@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+
+
+def artifacts_fingerprint(path):
+    """Hashes name, size and mtime of every file under ``path``; any artifact
+    swap yields a new fingerprint."""
+    digest = hashlib.sha256()
+    for root, _, files in sorted(os.walk(path)):
+        for filename in sorted(files):
+            stat = os.stat(os.path.join(root, filename))
+            rel = os.path.relpath(os.path.join(root, filename), path)
+            digest.update(f"{rel}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:16]
+
+
+# Written when a version becomes current; its mtime orders the version directories
+VERSION_MARKER = ".current-since"
+
+
+class PredictionCache:
+    """
+    Content-addressed LRU cache for prediction results.
+
+    Keys are the SHA-256 of the raw upload plus the model version, so the same
+    bytes scored by the same artifacts are only inferred once. Entries expire
+    after ``ttl_seconds`` and the least recently used ones are evicted past
+    ``max_entries``. When ``disk_dir`` is set, results are also written there as
+    JSON, one directory per model version, and survive restarts.
+
+    Entries of different versions live side by side: requests still scoring
+    with the previous models during a reload neither drop nor miss the new
+    version's entries, and the old ones age out through the LRU and the TTL.
+    Only ``use_version``, called when models are (re)loaded, deletes the disk
+    directories of versions older than the current one.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600, disk_dir=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        # (version, key) -> (expires_at, value)
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(data, *parts):
+        digest = hashlib.sha256(data).hexdigest()
+        return ":".join([digest, *(str(p) for p in parts)])
+
+    def use_version(self, version):
+        """Marks ``version`` as current and deletes older version directories."""
+        with self._lock:
+            self._version = version
+        if not self.disk_dir:
+            return
+
+        marker = os.path.join(self.disk_dir, version, VERSION_MARKER)
+        try:
+            os.makedirs(os.path.dirname(marker), exist_ok=True)
+            if not os.path.exists(marker):
+                open(marker, "w").close()
+            current_since = os.path.getmtime(marker)
+            for name in os.listdir(self.disk_dir):
+                path = os.path.join(self.disk_dir, name)
+                if (
+                    name != version
+                    and os.path.isdir(path)
+                    and self._version_since(path) < current_since
+                ):
+                    shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _version_since(path):
+        # Directories recreated by a late write of an old version have no marker
+        marker = os.path.join(path, VERSION_MARKER)
+        return os.path.getmtime(marker if os.path.exists(marker) else path)
+
+    def _disk_path(self, version, key):
+        return os.path.join(self.disk_dir, version, key.replace(":", "_") + ".json")
+
+    def _read_disk(self, version, key):
+        path = self._disk_path(version, key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                os.unlink(path)
+                return None
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, version, key, value):
+        path = self._disk_path(version, key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    def get(self, version, key):
+        with self._lock:
+            entry = self._entries.get((version, key))
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at >= time.monotonic():
+                    self._entries.move_to_end((version, key))
+                    self.hits += 1
+                    return value
+                del self._entries[version, key]
+
+        if self.disk_dir:
+            value = self._read_disk(version, key)
+            if value is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                    self._store(version, key, value)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, version, key, value):
+        with self._lock:
+            self._store(version, key, value)
+        if self.disk_dir:
+            self._write_disk(version, key, value)
+
+    def _store(self, version, key, value):
+        self._entries[version, key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end((version, key))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self.disk_dir:
+                shutil.rmtree(self.disk_dir, ignore_errors=True)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "version": self._version,
+                "entries": len(self._entries),
+                "current_version_entries": sum(
+                    1 for version, _ in self._entries if version == self._version
+                ),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "disk_dir": self.disk_dir,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+
+def cache_from_env(prefix):
+    return PredictionCache(
+        max_entries=int(os.getenv(f"{prefix}_CACHE_MAX_ENTRIES", "1024")),
+        ttl_seconds=float(os.getenv(f"{prefix}_CACHE_TTL_SECONDS", "3600")),
+        disk_dir=os.getenv(f"{prefix}_CACHE_DIR") or None,
+    )
@@ -0,0 +1,45 @@
+import os
+
+from prediction_cache import PredictionCache
+
+
+def test_entries_of_other_versions_are_kept(tmp_path):
+    cache = PredictionCache(disk_dir=str(tmp_path))
+    cache.use_version("v1")
+    cache.set("v1", "key", {"score": 1})
+
+    cache.use_version("v2")
+    cache.set("v2", "key", {"score": 2})
+
+    # A request still on the old snapshot does not evict the new version
+    assert cache.get("v1", "key") == {"score": 1}
+    assert cache.get("v2", "key") == {"score": 2}
+    assert cache.stats()["current_version_entries"] == 1
+
+
+def test_old_versions_age_out_through_the_lru():
+    cache = PredictionCache(max_entries=2)
+    cache.set("v1", "a", 1)
+    cache.set("v2", "a", 2)
+    cache.set("v2", "b", 3)
+
+    assert cache.get("v1", "a") is None
+    assert cache.get("v2", "a") == 2
+    assert cache.evictions == 1
+
+
+def test_use_version_deletes_only_older_directories(tmp_path):
+    cache = PredictionCache(disk_dir=str(tmp_path))
+    # Versions made current at t=1000, 2000 and 3000, e.g. by other workers
+    for version, since in (("old", 1_000), ("current", 2_000), ("newer", 3_000)):
+        cache.set(version, "key", {"version": version})
+        marker = tmp_path / version / ".current-since"
+        marker.touch()
+        os.utime(marker, (since, since))
+
+    # Lookups and writes never prune
+    assert cache.get("old", "key") == {"version": "old"}
+
+    cache.use_version("current")
+
+    assert sorted(os.listdir(tmp_path)) == ["current", "newer"]
@@ -0,0 +1,179 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from app.registry import ModelRegistry
+
+EXECUTION_MODES = ("sequential", "thread", "process")
+
+# Models held by a process-pool worker, loaded once by the pool initializer
+_worker_snapshot = None
+
+
+def _init_worker(base_path):
+    global _worker_snapshot
+    _worker_snapshot = ModelRegistry(base_path).load()
+
+
+def _worker_ready():
+    return os.getpid()
+
+
+def _timed(predict_fn, name, loaded, Xs):
+    start = time.perf_counter()
+    try:
+        rows = predict_fn(loaded, Xs)
+    except Exception as e:
+        rows = [{"error": str(e)} for _ in range(Xs.shape[0])]
+    return name, rows, time.perf_counter() - start
+
+
+def _run_in_worker(predict_fn, name, Xs):
+    return _timed(predict_fn, name, _worker_snapshot.models[name], Xs)
+
+
+class ModelExecutor:
+    """
+    Fans the per-model predictions out according to the configured mode:
+
+    - ``sequential``: one estimator after the other, in the request thread;
+    - ``thread``: a bounded thread pool (numpy/sklearn release the GIL in
+      their hot loops, so the tree ensembles overlap);
+    - ``process``: a pool of pre-forked workers that each keep their own
+      resident copy of the models, so only the scaled feature matrix and the
+      predictions cross the process boundary.
+    """
+
+    def __init__(self, mode="sequential", max_workers=None):
+        if mode not in EXECUTION_MODES:
+            raise ValueError(
+                f"Unknown execution mode '{mode}'. Use one of {EXECUTION_MODES}."
+            )
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool = None
+        self._lock = threading.Lock()
+        self._timings = {}
+
+    def start(self, base_path):
+        pool = self._create_pool(base_path)
+        with self._lock:
+            self._pool = pool
+
+    def _create_pool(self, base_path):
+        if self.mode == "thread":
+            return ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="spiral-model"
+            )
+        if self.mode == "process":
+            pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                # Pools are also built by /models/reload inside a threaded server,
+                # where forking could copy a held lock into the children; every
+                # worker loads its own models through _init_worker anyway
+                mp_context=multiprocessing.get_context("forkserver"),
+                initializer=_init_worker,
+                initargs=(base_path,),
+            )
+            # Spawn every worker now so none pays the model load on a request
+            for future in [pool.submit(_worker_ready) for _ in range(self.max_workers)]:
+                future.result()
+            return pool
+        return None
+
+    def restart(self, base_path):
+        """
+        Recycles the pool so process workers pick up freshly reloaded models.
+
+        The new pool is built before the swap, so requests never wait on the
+        worker spawn. Requests submit under the same lock as the swap, so every
+        future lands on a live pool; the old one is drained in the background.
+        """
+        new_pool = self._create_pool(base_path)
+        with self._lock:
+            old_pool, self._pool = self._pool, new_pool
+        if old_pool is not None:
+            threading.Thread(
+                target=old_pool.shutdown,
+                kwargs={"wait": True},
+                name="spiral-pool-drain",
+                daemon=True,
+            ).start()
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def run(self, predict_fn, snapshot, Xs):
+        """
+        Runs ``predict_fn(loaded_model, Xs)`` for every model of the snapshot.
+
+        Returns ``(rows_by_model, seconds_by_model)``, both keyed by model name
+        in the snapshot's order.
+        """
+        items = list(snapshot.models.items())
+
+        with self._lock:
+            pool = self._pool
+            if self.mode == "sequential" or pool is None:
+                futures = None
+            elif self.mode == "thread":
+                futures = [
+                    pool.submit(_timed, predict_fn, name, loaded, Xs)
+                    for name, loaded in items
+                ]
+            else:
+                futures = [
+                    # Models that failed to load never reach the workers
+                    pool.submit(_run_in_worker, predict_fn, name, Xs)
+                    if loaded.estimator is not None
+                    else None
+                    for name, loaded in items
+                ]
+
+        if futures is None:
+            outputs = [_timed(predict_fn, name, loaded, Xs) for name, loaded in items]
+        else:
+            outputs = [
+                f.result() if f is not None else _timed(predict_fn, name, loaded, Xs)
+                for f, (name, loaded) in zip(futures, items)
+            ]
+
+        rows_by_model = {name: rows for name, rows, _ in outputs}
+        seconds_by_model = {name: seconds for name, _, seconds in outputs}
+        self._record(seconds_by_model)
+        return rows_by_model, seconds_by_model
+
+    def _record(self, seconds_by_model):
+        with self._lock:
+            for name, seconds in seconds_by_model.items():
+                stats = self._timings.setdefault(
+                    name, {"calls": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+                )
+                stats["calls"] += 1
+                stats["total_seconds"] += seconds
+                stats["max_seconds"] = max(stats["max_seconds"], seconds)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "max_workers": self.max_workers,
+                "models": {
+                    name: {
+                        **stats,
+                        "avg_seconds": stats["total_seconds"] / stats["calls"],
+                    }
+                    for name, stats in self._timings.items()
+                },
+            }
+
+
+executor = ModelExecutor(
+    mode=os.getenv("SPIRAL_EXECUTION_MODE", "sequential"),
+    max_workers=int(os.getenv("SPIRAL_MAX_WORKERS", "0")) or None,
+)
@@ -1,28 +1,94 @@
-import tempfile
-import shutil
 import os
 import traceback
-from fastapi import FastAPI, UploadFile, HTTPException, File
-from .predictor import predict_all_models
+from contextlib import asynccontextmanager
 
-app = FastAPI()
+from fastapi import FastAPI, UploadFile, HTTPException, File, Query
+from fastapi.concurrency import run_in_threadpool
+from prediction_cache import cache_from_env
+
+from .predictor import PROFILES, predict_all_models, predict_batch
+from .executor import executor
+from .registry import registry
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load every artifact once, before the first request is accepted
+    snapshot = registry.load()
+    prediction_cache.use_version(snapshot.fingerprint)
+    executor.start(registry.base_path)
+    yield
+    executor.shutdown()
+
+
+MAX_BATCH_SIZE = int(os.getenv("SPIRAL_MAX_BATCH_SIZE", "64"))
+
+prediction_cache = cache_from_env("SPIRAL")
+
+# Describe how this request was served, not the prediction: never cached
+PER_REQUEST_FIELDS = ("escalated", "model_timings_ms")
+
+app = FastAPI(lifespan=lifespan)
 
 
 @app.post("/predict/spiral")
-async def predict_spiral(image: UploadFile = File(...)):
-    tmp_path = None
+async def predict_spiral(
+    image: UploadFile = File(...), profile: str = Query("full")
+):
+    if profile not in PROFILES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Perfil de inferência inválido. Use um de: {', '.join(PROFILES)}.",
+        )
+
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
-            shutil.copyfileobj(image.file, tmp)
-            tmp_path = tmp.name
+        image_bytes = await image.read()
+        snapshot = registry.snapshot()
+
+        return await run_in_threadpool(_predict_cached, image_bytes, snapshot, profile)
+
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=500, detail=f"Erro interno no servidor: {str(e)}"
+        )
+
 
-        results, vote_count, majority, extracted_features = predict_all_models(tmp_path)
+def _predict_cached(image_bytes, snapshot, profile):
+    key = prediction_cache.make_key(image_bytes, profile)
+    cached = prediction_cache.get(snapshot.fingerprint, key)
+    if cached is not None:
+        # No model ran for this request
+        return {**cached, "escalated": False, "model_timings_ms": {}, "cached": True}
+
+    result = predict_all_models(memoryview(image_bytes), snapshot, profile)
+    prediction_cache.set(
+        snapshot.fingerprint,
+        key,
+        {k: v for k, v in result.items() if k not in PER_REQUEST_FIELDS},
+    )
+    return {**result, "cached": False}
+
+
+@app.post("/predict/spiral/batch")
+async def predict_spiral_batch(images: list[UploadFile] = File(...)):
+    if len(images) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Lote excede o limite de {MAX_BATCH_SIZE} imagens.",
+        )
+
+    try:
+        buffers = [memoryview(await image.read()) for image in images]
+
+        outputs, timings = await run_in_threadpool(predict_batch, buffers)
 
         return {
-            "model_results": results,
-            "vote_count": dict(vote_count),
-            "majority_decision": majority,
-            "extracted_features": extracted_features,
+            "results": [
+                {"filename": image.filename, **output}
+                for image, output in zip(images, outputs)
+            ],
+            "model_timings_ms": timings,
         }
 
     except Exception as e:
@@ -31,9 +97,33 @@ async def predict_spiral(image: UploadFile = File(...)):
             status_code=500, detail=f"Erro interno no servidor: {str(e)}"
         )
 
-    finally:
-        if tmp_path and os.path.exists(tmp_path):
-            os.unlink(tmp_path)
+
+@app.get("/models")
+def get_models():
+    return {
+        **registry.snapshot().stats(),
+        "execution": executor.stats(),
+        "cache": prediction_cache.stats(),
+    }
+
+
+@app.get("/cache")
+def get_cache_stats():
+    return prediction_cache.stats()
+
+
+@app.post("/models/reload")
+async def reload_models():
+    try:
+        snapshot = await run_in_threadpool(registry.reload)
+        await run_in_threadpool(executor.restart, registry.base_path)
+        await run_in_threadpool(prediction_cache.use_version, snapshot.fingerprint)
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=500, detail=f"Erro ao recarregar os modelos: {str(e)}"
+        )
+    return snapshot.stats()
 
 
 @app.get("/")
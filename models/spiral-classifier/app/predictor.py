@@ -1,6 +1,11 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 import joblib
-from app.processing import preprocess_image, extract_features
+from app.processing import decode_image, extract_features, preprocess_image, read_image
+from app.executor import executor
+from app.registry import registry
 from collections import Counter
 
 
@@ -20,7 +25,7 @@ def predict_image(model_path, scaler_path, image_path):
         model = joblib.load(model_path)
         scaler = joblib.load(scaler_path)
 
-        img = preprocess_image(image_path)
+        img = preprocess_image(read_image(image_path))
 
         feats = extract_features(img)
 
@@ -45,70 +50,94 @@ def predict_image(model_path, scaler_path, image_path):
         raise
 
 
-def predict_all_models(image_path, model_base_path="infra"):
-    scaler_path = f"{model_base_path}/scaler.pkl"
-    models = {
-        "Logistic Regression": f"{model_base_path}/log_reg.pkl",
-        "Random Forest": f"{model_base_path}/random_forest.pkl",
-        "SVM": f"{model_base_path}/svm.pkl",
-        "MLP": f"{model_base_path}/mlp.pkl",
-        "KNN": f"{model_base_path}/knn.pkl",
-        "Extra Trees": f"{model_base_path}/extra_trees.pkl",
-        "Gradient Boosting": f"{model_base_path}/gb.pkl",
-        "AdaBoost": f"{model_base_path}/adaboost.pkl",
-        "LinearSVC Calib.": f"{model_base_path}/linearsvc_calibrated.pkl",
-        "Ensemble": f"{model_base_path}/ensemble.pkl",
-        "Stacking": f"{model_base_path}/stacking.pkl",
-    }
+FEATURE_NAMES = [
+    "area",
+    "perimeter",
+    "circularity",
+    "aspect_ratio",
+    "entropy",
+    "mean_thickness",
+    "std_thickness",
+]
 
-    # Extract features once for all models
-    img = preprocess_image(image_path)
+PREPROCESS_WORKERS = int(os.getenv("SPIRAL_PREPROCESS_WORKERS", os.cpu_count() or 1))
+
+PROFILES = ("full", "fast", "ensemble-only")
+
+FAST_MODELS = [
+    name.strip()
+    for name in os.getenv(
+        "SPIRAL_FAST_MODELS", "Logistic Regression,KNN,LinearSVC Calib."
+    ).split(",")
+    if name.strip()
+]
+ENSEMBLE_MODELS = ["Ensemble"]
+
+# Must match HEALTHY_THRESHOLD in the backend's test_service: the backend scores
+# a test as 1 - mean(P(Parkinson)) and calls it HEALTHY at or above this value.
+HEALTHY_THRESHOLD = float(os.getenv("SPIRAL_HEALTHY_THRESHOLD", "0.7"))
+ESCALATION_MARGIN = float(os.getenv("SPIRAL_ESCALATION_MARGIN", "0.1"))
+
+
+def _extract_raw_features(image_bytes):
+    img = preprocess_image(decode_image(image_bytes))
     raw_features = extract_features(img)
 
     if raw_features is None:
         raise ValueError("Could not extract features from the image.")
 
-    # Build extracted features dict with named keys
+    return raw_features
+
+
+def _features_dict(raw_features):
     # Convert numpy.float32 to native Python float for JSON serialization
-    extracted_features = {
-        "area": float(raw_features[0]),
-        "perimeter": float(raw_features[1]),
-        "circularity": float(raw_features[2]),
-        "aspect_ratio": float(raw_features[3]),
-        "entropy": float(raw_features[4]),
-        "mean_thickness": float(raw_features[5]),
-        "std_thickness": float(raw_features[6]),
-    }
+    return {name: float(value) for name, value in zip(FEATURE_NAMES, raw_features)}
 
-    # Load scaler once
-    scaler = joblib.load(scaler_path)
-    X = np.array(raw_features, dtype=np.float32).reshape(1, -1)
-    Xs = scaler.transform(X)
 
-    results = {}
-    predictions = []
-    for name, mpath in models.items():
-        try:
-            model = joblib.load(mpath)
-            pred_raw = model.predict(Xs)[0]
-            pred_label = _labels(pred_raw)
-            prob_dict = None
-
-            if hasattr(model, "predict_proba"):
-                probs = model.predict_proba(Xs)[0]
-                classes = getattr(model, "classes_", None)
-                if classes is not None:
-                    prob_dict = {_labels(c): float(p) for c, p in zip(classes, probs)}
-
-            classes_learned = [_labels(c) for c in getattr(model, "classes_", [])]
-            results[name] = {
-                "prediction": pred_label,
+def predict_model(loaded, Xs):
+    """Runs one estimator over the whole N x 7 matrix, returning one result per row."""
+    if loaded.estimator is None:
+        return [{"error": loaded.error} for _ in range(Xs.shape[0])]
+
+    model = loaded.estimator
+    preds = model.predict(Xs)
+    classes = getattr(model, "classes_", None)
+    probs = None
+
+    if hasattr(model, "predict_proba") and classes is not None:
+        probs = model.predict_proba(Xs)
+
+    classes_learned = [_labels(c) for c in getattr(model, "classes_", [])]
+    rows = []
+    for i in range(Xs.shape[0]):
+        prob_dict = None
+        if probs is not None:
+            prob_dict = {_labels(c): float(p) for c, p in zip(classes, probs[i])}
+        rows.append(
+            {
+                "prediction": _labels(preds[i]),
                 "probabilities": prob_dict,
                 "classes_": classes_learned,
             }
-            predictions.append(pred_label)
-        except Exception as e:
-            results[name] = {"error": str(e)}
+        )
+    return rows
+
+
+def _run_models(snapshot, Xs):
+    """Fans the estimators out through the configured executor and regroups
+    the output as one results dict per row, plus per-model timings in ms."""
+    rows_by_model, seconds_by_model = executor.run(predict_model, snapshot, Xs)
+
+    rows = [
+        {name: model_rows[i] for name, model_rows in rows_by_model.items()}
+        for i in range(Xs.shape[0])
+    ]
+    timings = {name: seconds * 1000 for name, seconds in seconds_by_model.items()}
+    return rows, timings
+
+
+def _vote(results):
+    predictions = [r["prediction"] for r in results.values() if "prediction" in r]
 
     if not predictions:
         raise ValueError("No predictions were made.")
@@ -122,4 +151,128 @@ def predict_all_models(image_path, model_base_path="infra"):
 
     majority = max(vote_count, key=vote_count.get)
 
-    return results, vote_count, majority, extracted_features
+    return vote_count, majority
+
+
+def _healthy_score(results):
+    parkinson_probs = [
+        r["probabilities"].get("Parkinson", 0.0)
+        for r in results.values()
+        if r.get("probabilities")
+    ]
+    if not parkinson_probs:
+        return None
+    return 1.0 - sum(parkinson_probs) / len(parkinson_probs)
+
+
+def predict_all_models(image_bytes, snapshot=None, profile="full"):
+    """
+    Scores one encoded image.
+
+    ``profile`` picks the committee: ``full`` runs every model,
+    ``ensemble-only`` only the soft-voting ensemble and ``fast`` a cheap
+    subset (SPIRAL_FAST_MODELS) that escalates to the remaining models when its
+    score lands within ESCALATION_MARGIN of HEALTHY_THRESHOLD.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown profile '{profile}'. Use one of {PROFILES}.")
+
+    if snapshot is None:
+        snapshot = registry.snapshot()
+
+    # Extract features once for all models
+    raw_features = _extract_raw_features(image_bytes)
+    extracted_features = _features_dict(raw_features)
+
+    X = np.array(raw_features, dtype=np.float32).reshape(1, -1)
+    Xs = snapshot.scaler.transform(X)
+
+    if profile == "fast":
+        committee = snapshot.subset(FAST_MODELS)
+    elif profile == "ensemble-only":
+        committee = snapshot.subset(ENSEMBLE_MODELS)
+    else:
+        committee = snapshot
+
+    rows, timings = _run_models(committee, Xs)
+    results = rows[0]
+    escalated = False
+
+    if profile == "fast":
+        score = _healthy_score(results)
+        remaining = [name for name in snapshot.models if name not in results]
+        if remaining and (
+            score is None or abs(score - HEALTHY_THRESHOLD) < ESCALATION_MARGIN
+        ):
+            rest_rows, rest_timings = _run_models(snapshot.subset(remaining), Xs)
+            merged = {**results, **rest_rows[0]}
+            results = {name: merged[name] for name in snapshot.models}
+            timings.update(rest_timings)
+            escalated = True
+
+    vote_count, majority = _vote(results)
+
+    return {
+        "model_results": results,
+        "vote_count": vote_count,
+        "majority_decision": majority,
+        "extracted_features": extracted_features,
+        "profile": profile,
+        "escalated": escalated,
+        "model_timings_ms": timings,
+    }
+
+
+def predict_batch(images, snapshot=None):
+    """
+    Scores N encoded images with a single predict/predict_proba call per model.
+
+    Images are preprocessed in parallel (OpenCV releases the GIL), the valid
+    feature vectors are stacked into an N x 7 matrix and the per-row results
+    are returned in input order together with the per-model timings of the
+    batch. Images that cannot be processed get an
+    ``{"error": ...}`` entry instead of failing the whole batch.
+    """
+    if snapshot is None:
+        snapshot = registry.snapshot()
+
+    outputs = [None] * len(images)
+    timings = {}
+    raw_rows, row_index = [], []
+
+    def _safe_extract(image_bytes):
+        try:
+            return _extract_raw_features(image_bytes), None
+        except Exception as e:
+            return None, str(e)
+
+    workers = max(1, min(PREPROCESS_WORKERS, len(images)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        extracted = list(pool.map(_safe_extract, images))
+
+    for i, (raw_features, error) in enumerate(extracted):
+        if error is not None:
+            outputs[i] = {"error": error}
+        else:
+            raw_rows.append(raw_features)
+            row_index.append(i)
+
+    if raw_rows:
+        X = np.array(raw_rows, dtype=np.float32)
+        Xs = snapshot.scaler.transform(X)
+
+        rows, timings = _run_models(snapshot, Xs)
+        for i, raw_features, results in zip(row_index, raw_rows, rows):
+            try:
+                vote_count, majority = _vote(results)
+            except ValueError as e:
+                outputs[i] = {"error": str(e)}
+                continue
+            outputs[i] = {
+                "model_results": results,
+                "vote_count": vote_count,
+                "majority_decision": majority,
+                "extracted_features": _features_dict(raw_features),
+            }
+
+    return outputs, timings
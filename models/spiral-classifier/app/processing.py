@@ -2,11 +2,24 @@ import numpy as np
 import cv2
 
 
-def preprocess_image(path, size=(256, 256)):
+def decode_image(data):
+    """Decodes raw image bytes (bytes, bytearray or memoryview) straight from
+    memory into a grayscale array, without touching the filesystem."""
+    buf = np.frombuffer(data, dtype=np.uint8)
+    img = cv2.imdecode(buf, cv2.IMREAD_GRAYSCALE) if buf.size else None
+    if img is None:
+        raise ValueError("Could not decode image data.")
+    return img
+
+
+def read_image(path):
     img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
     if img is None:
         raise FileNotFoundError(f"Image not found at path: {path}")
+    return img
+
 
+def preprocess_image(img, size=(256, 256)):
     img = cv2.resize(img, size)
     img = cv2.GaussianBlur(img, (5, 5), 0)
 
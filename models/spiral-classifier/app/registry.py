@@ -0,0 +1,159 @@
+import os
+import pickle
+import threading
+import time
+from dataclasses import dataclass, field, replace
+
+import joblib
+
+from prediction_cache import artifacts_fingerprint
+
+DEFAULT_MODEL_BASE_PATH = os.path.join(os.path.dirname(__file__), "..", "infra")
+
+SCALER_FILE = "scaler.pkl"
+
+MODEL_FILES = {
+    "Logistic Regression": "log_reg.pkl",
+    "Random Forest": "random_forest.pkl",
+    "SVM": "svm.pkl",
+    "MLP": "mlp.pkl",
+    "KNN": "knn.pkl",
+    "Extra Trees": "extra_trees.pkl",
+    "Gradient Boosting": "gb.pkl",
+    "AdaBoost": "adaboost.pkl",
+    "LinearSVC Calib.": "linearsvc_calibrated.pkl",
+    "Ensemble": "ensemble.pkl",
+    "Stacking": "stacking.pkl",
+}
+
+# Loads retried when an artifact changes while it is being read
+BUILD_ATTEMPTS = 3
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    name: str
+    path: str
+    estimator: object | None
+    load_seconds: float
+    size_bytes: int
+    error: str | None = None
+
+
+@dataclass(frozen=True)
+class ModelSnapshot:
+    base_path: str
+    scaler: object
+    models: dict[str, LoadedModel]
+    fingerprint: str
+    loaded_at: float = field(default_factory=time.time)
+
+    def subset(self, names):
+        """Returns a view of this snapshot restricted to ``names`` (same objects)."""
+        models = {name: self.models[name] for name in names if name in self.models}
+        if not models:
+            raise ValueError(f"None of the models {list(names)} is available.")
+        return replace(self, models=models)
+
+    def stats(self):
+        return {
+            "base_path": os.path.abspath(self.base_path),
+            "fingerprint": self.fingerprint,
+            "loaded_at": self.loaded_at,
+            "total_load_seconds": sum(m.load_seconds for m in self.models.values()),
+            "total_size_bytes": sum(m.size_bytes for m in self.models.values()),
+            "models": {
+                name: {
+                    "file": os.path.basename(m.path),
+                    "loaded": m.estimator is not None,
+                    "load_seconds": m.load_seconds,
+                    "size_bytes": m.size_bytes,
+                    "error": m.error,
+                }
+                for name, m in self.models.items()
+            },
+        }
+
+
+def _load_artifact(name, path):
+    start = time.perf_counter()
+    try:
+        estimator = joblib.load(path)
+    except Exception as e:
+        return LoadedModel(name, path, None, time.perf_counter() - start, 0, str(e))
+
+    elapsed = time.perf_counter() - start
+    # The pickled size is a close, cheap proxy for the resident footprint of
+    # sklearn/xgboost/lightgbm estimators (mostly numpy arrays).
+    size_bytes = len(pickle.dumps(estimator, protocol=pickle.HIGHEST_PROTOCOL))
+    return LoadedModel(name, path, estimator, elapsed, size_bytes)
+
+
+class ModelRegistry:
+    """
+    Keeps the scaler and every spiral estimator resident in memory.
+
+    A reload builds a complete new snapshot off to the side and only then swaps
+    the reference, so in-flight requests keep using the snapshot they started
+    with and a broken artifact never replaces a working set.
+    """
+
+    def __init__(self, base_path=DEFAULT_MODEL_BASE_PATH):
+        self.base_path = base_path
+        self._snapshot: ModelSnapshot | None = None
+        self._lock = threading.Lock()
+
+    def _build_snapshot(self):
+        """
+        Loads every artifact, fingerprinting the directory before and after so
+        the fingerprint (the prediction cache version) always describes the
+        files actually loaded. A file swapped mid-load triggers a new attempt.
+        """
+        for _ in range(BUILD_ATTEMPTS):
+            fingerprint = artifacts_fingerprint(self.base_path)
+            snapshot = self._load_snapshot(fingerprint)
+            if artifacts_fingerprint(self.base_path) == fingerprint:
+                return snapshot
+        raise RuntimeError(
+            f"Spiral artifacts in {self.base_path} kept changing while loading."
+        )
+
+    def _load_snapshot(self, fingerprint):
+        scaler_path = os.path.join(self.base_path, SCALER_FILE)
+        scaler = _load_artifact("Scaler", scaler_path)
+        if scaler.estimator is None:
+            raise RuntimeError(f"Could not load scaler from {scaler_path}: {scaler.error}")
+
+        models = {
+            name: _load_artifact(name, os.path.join(self.base_path, filename))
+            for name, filename in MODEL_FILES.items()
+        }
+        if all(m.estimator is None for m in models.values()):
+            raise RuntimeError(f"No spiral model could be loaded from {self.base_path}.")
+
+        return ModelSnapshot(self.base_path, scaler.estimator, models, fingerprint)
+
+    def load(self):
+        with self._lock:
+            snapshot = self._build_snapshot()
+            self._snapshot = snapshot
+        return snapshot
+
+    def reload(self):
+        return self.load()
+
+    def snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = self._build_snapshot()
+                snapshot = self._snapshot
+        return snapshot
+
+    @property
+    def is_loaded(self):
+        return self._snapshot is not None
+
+
+registry = ModelRegistry()
@@ -0,0 +1,66 @@
+import cv2
+import numpy as np
+import pytest
+
+from app import main
+from app.registry import MODEL_FILES, LoadedModel, ModelSnapshot
+from prediction_cache import PredictionCache
+
+
+class StubEstimator:
+    """Estimator with a fixed P(Parkinson) for every row."""
+
+    classes_ = np.array([0, 1])
+
+    def __init__(self, parkinson_probability):
+        self.parkinson_probability = parkinson_probability
+
+    def predict_proba(self, Xs):
+        p = self.parkinson_probability
+        return np.tile([1 - p, p], (Xs.shape[0], 1))
+
+    def predict(self, Xs):
+        return (self.predict_proba(Xs)[:, 1] >= 0.5).astype(int)
+
+
+class IdentityScaler:
+    def transform(self, X):
+        return X
+
+
+@pytest.fixture
+def make_snapshot():
+    """Snapshot with a stub for every model; ``probabilities`` overrides P(Parkinson)."""
+
+    def make(probabilities=None, default=0.2):
+        probabilities = probabilities or {}
+        models = {
+            name: LoadedModel(
+                name, filename, StubEstimator(probabilities.get(name, default)), 0.0, 0
+            )
+            for name, filename in MODEL_FILES.items()
+        }
+        return ModelSnapshot("stub", IdentityScaler(), models, "stub")
+
+    return make
+
+
+@pytest.fixture
+def spiral_image():
+    """PNG of a circle outline; the radius changes the extracted features."""
+
+    def encode(radius=80):
+        img = np.full((256, 256), 255, dtype=np.uint8)
+        cv2.circle(img, (128, 128), radius, 0, 4)
+        return cv2.imencode(".png", img)[1].tobytes()
+
+    return encode
+
+
+@pytest.fixture
+def stub_service(make_snapshot, monkeypatch):
+    """Serves the endpoints from a stub snapshot and an empty cache."""
+    snapshot = make_snapshot()
+    monkeypatch.setattr(main.registry, "snapshot", lambda: snapshot)
+    monkeypatch.setattr(main, "prediction_cache", PredictionCache())
+    return snapshot
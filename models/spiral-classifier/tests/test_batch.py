@@ -0,0 +1,52 @@
+from fastapi.testclient import TestClient
+
+from app import main
+
+# Only the single-image response has these
+SINGLE_ONLY_FIELDS = ("profile", "escalated", "model_timings_ms", "cached")
+
+
+def _post_batch(client, images):
+    files = [("images", (f"{i}.png", data, "image/png")) for i, data in enumerate(images)]
+    return client.post("/predict/spiral/batch", files=files)
+
+
+def test_batch_matches_single_predictions_in_order(stub_service, spiral_image):
+    client = TestClient(main.app)
+    images = [spiral_image(radius) for radius in (40, 80, 110)]
+
+    response = _post_batch(client, images)
+    singles = [
+        client.post("/predict/spiral", files={"image": ("s.png", data, "image/png")}).json()
+        for data in images
+    ]
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["filename"] for r in results] == ["0.png", "1.png", "2.png"]
+    for result, single in zip(results, singles):
+        assert {k: v for k, v in result.items() if k != "filename"} == {
+            k: v for k, v in single.items() if k not in SINGLE_ONLY_FIELDS
+        }
+    areas = [r["extracted_features"]["area"] for r in results]
+    assert areas == sorted(areas) and len(set(areas)) == 3
+
+
+def test_batch_over_limit_is_rejected(stub_service, spiral_image, monkeypatch):
+    monkeypatch.setattr(main, "MAX_BATCH_SIZE", 2)
+
+    response = _post_batch(TestClient(main.app), [spiral_image()] * 3)
+
+    assert response.status_code == 413
+
+
+def test_undecodable_image_fails_only_its_entry(stub_service, spiral_image):
+    response = _post_batch(
+        TestClient(main.app), [spiral_image(), b"not an image", spiral_image(60)]
+    )
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[1] == {"filename": "1.png", "error": "Could not decode image data."}
+    assert results[0]["majority_decision"] == "Healthy"
+    assert results[2]["majority_decision"] == "Healthy"
@@ -0,0 +1,83 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import joblib
+import numpy as np
+import pytest
+
+from app.executor import ModelExecutor
+from app.registry import MODEL_FILES, SCALER_FILE
+
+MODEL_NAMES = ("A", "B", "C")
+
+
+def _snapshot():
+    return SimpleNamespace(
+        models={name: SimpleNamespace(estimator=name) for name in MODEL_NAMES}
+    )
+
+
+def _slow_predict(loaded, Xs):
+    time.sleep(0.001)
+    return [{"model": loaded.estimator} for _ in range(Xs.shape[0])]
+
+
+@pytest.fixture
+def executor():
+    executor = ModelExecutor(mode="thread", max_workers=2)
+    executor.start(base_path=None)
+    yield executor
+    executor.shutdown()
+
+
+def test_reload_during_predictions_keeps_requests_running(executor):
+    Xs = np.zeros((2, 3))
+    errors = []
+    results = []
+    stop = threading.Event()
+
+    def predict():
+        while not stop.is_set():
+            try:
+                rows, _ = executor.run(_slow_predict, _snapshot(), Xs)
+                results.append(rows)
+            except Exception as e:
+                errors.append(e)
+
+    clients = [threading.Thread(target=predict) for _ in range(4)]
+    for client in clients:
+        client.start()
+    for _ in range(200):
+        executor.restart(base_path=None)
+    stop.set()
+    for client in clients:
+        client.join()
+
+    assert errors == []
+    assert results
+    for rows in results:
+        assert rows == {name: [{"model": name}] * 2 for name in MODEL_NAMES}
+    assert executor.stats()["models"]["A"]["calls"] == len(results)
+
+
+def _stub_predict(loaded, Xs):
+    return [{"model": loaded.estimator["model"]} for _ in range(Xs.shape[0])]
+
+
+def test_process_workers_start_without_fork(tmp_path, make_snapshot):
+    for name, filename in MODEL_FILES.items():
+        joblib.dump({"model": name}, tmp_path / filename)
+    joblib.dump({}, tmp_path / SCALER_FILE)
+    executor = ModelExecutor(mode="process", max_workers=1)
+    executor.start(str(tmp_path))
+
+    try:
+        start_method = executor._pool._mp_context.get_start_method()
+        rows, _ = executor.run(_stub_predict, make_snapshot(), np.zeros((1, 7)))
+    finally:
+        executor.shutdown()
+
+    assert start_method == "forkserver"
+    # Each worker loaded the artifacts itself through _init_worker
+    assert rows["SVM"] == [{"model": "SVM"}]
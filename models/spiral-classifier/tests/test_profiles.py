@@ -0,0 +1,53 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.predictor import ENSEMBLE_MODELS, FAST_MODELS, predict_all_models
+from app.registry import MODEL_FILES
+
+
+@pytest.mark.parametrize(
+    ("profile", "expected"),
+    [
+        ("full", list(MODEL_FILES)),
+        ("fast", FAST_MODELS),
+        ("ensemble-only", ENSEMBLE_MODELS),
+    ],
+)
+def test_profile_selects_its_models(profile, expected, make_snapshot, spiral_image):
+    # Fast committee far from the threshold: no escalation
+    snapshot = make_snapshot(default=0.05)
+
+    result = predict_all_models(spiral_image(), snapshot, profile)
+
+    assert list(result["model_results"]) == expected
+    assert not result["escalated"]
+
+
+@pytest.mark.parametrize(
+    ("fast_probability", "escalated"),
+    [
+        (0.3, True),  # score 0.70: on the threshold
+        (0.35, True),  # score 0.65: inside the margin
+        (0.05, False),  # score 0.95: clearly healthy
+        (0.9, False),  # score 0.10: clearly Parkinson
+    ],
+)
+def test_fast_profile_escalates_only_near_threshold(
+    fast_probability, escalated, make_snapshot, spiral_image
+):
+    snapshot = make_snapshot({name: fast_probability for name in FAST_MODELS})
+
+    result = predict_all_models(spiral_image(), snapshot, "fast")
+
+    assert result["escalated"] is escalated
+    expected = list(MODEL_FILES) if escalated else FAST_MODELS
+    assert list(result["model_results"]) == expected
+
+
+def test_unknown_profile_is_rejected(stub_service, spiral_image):
+    response = TestClient(main.app).post(
+        "/predict/spiral?profile=slow", files={"image": ("s.png", spiral_image())}
+    )
+
+    assert response.status_code == 422
@@ -0,0 +1,64 @@
+import os
+
+import joblib
+import pytest
+
+from app import registry as registry_module
+from app.registry import MODEL_FILES, SCALER_FILE, ModelRegistry
+from prediction_cache import artifacts_fingerprint
+
+
+def _write_artifacts(path, version):
+    joblib.dump({"scaler": version}, path / SCALER_FILE)
+    for name, filename in MODEL_FILES.items():
+        joblib.dump({"model": name, "version": version}, path / filename)
+
+
+def _bump_mtime(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def artifacts(tmp_path):
+    _write_artifacts(tmp_path, version=1)
+    return tmp_path
+
+
+def test_reload_swaps_snapshot_while_a_predict_holds_the_old_one(artifacts):
+    registry = ModelRegistry(str(artifacts))
+    held = registry.snapshot()
+
+    _write_artifacts(artifacts, version=2)
+    _bump_mtime(artifacts / SCALER_FILE)
+    reloaded = registry.reload()
+
+    # The in-flight request keeps a complete, consistent set of version 1
+    assert held.scaler == {"scaler": 1}
+    assert {m.estimator["version"] for m in held.models.values()} == {1}
+    assert registry.snapshot() is reloaded
+    assert reloaded.scaler == {"scaler": 2}
+    assert {m.estimator["version"] for m in reloaded.models.values()} == {2}
+    assert reloaded.fingerprint != held.fingerprint
+
+
+def test_fingerprint_matches_artifacts_swapped_during_load(artifacts, monkeypatch):
+    registry = ModelRegistry(str(artifacts))
+    load_artifact = registry_module._load_artifact
+    swapped = []
+
+    def load_and_swap(name, path):
+        loaded = load_artifact(name, path)
+        if name == "Stacking" and not swapped:
+            # Another deploy replaces a model right after it was read
+            joblib.dump({"model": "SVM", "version": 2}, artifacts / "svm.pkl")
+            _bump_mtime(artifacts / "svm.pkl")
+            swapped.append(name)
+        return loaded
+
+    monkeypatch.setattr(registry_module, "_load_artifact", load_and_swap)
+
+    snapshot = registry.load()
+
+    assert snapshot.models["SVM"].estimator["version"] == 2
+    assert snapshot.fingerprint == artifacts_fingerprint(str(artifacts))
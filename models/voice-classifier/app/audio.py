@@ -0,0 +1,40 @@
+import io
+
+import av
+import numpy as np
+
+# Entrada do wav2vec2: 16 kHz mono, só os primeiros 5 s de cada gravação
+SAMPLE_RATE = 16000
+DURATION = 5.0
+
+
+def decode_audio(data, sr=SAMPLE_RATE, duration=DURATION):
+    """
+    Decodifica o áudio enviado (WebM/Opus, WAV, ...) em memória, direto para
+    float32 mono na taxa ``sr``. Para assim que os primeiros ``duration``
+    segundos, os únicos usados pelo modelo, estiverem decodificados.
+    """
+    max_samples = int(sr * duration)
+    chunks, total = [], 0
+
+    with av.open(io.BytesIO(data)) as container:
+        if not container.streams.audio:
+            raise ValueError("O arquivo enviado não contém áudio.")
+        stream = container.streams.audio[0]
+        resampler = av.AudioResampler(format="flt", layout="mono", rate=sr)
+
+        for frame in container.decode(stream):
+            for resampled in resampler.resample(frame):
+                chunk = resampled.to_ndarray().reshape(-1)
+                chunks.append(chunk)
+                total += len(chunk)
+            if total >= max_samples:
+                break
+        else:
+            for resampled in resampler.resample(None):
+                chunks.append(resampled.to_ndarray().reshape(-1))
+
+    if not chunks:
+        raise ValueError("Nenhuma amostra de áudio foi decodificada.")
+
+    return np.concatenate(chunks)[:max_samples].astype(np.float32, copy=False)
@@ -0,0 +1,114 @@
+import asyncio
+import os
+
+from fastapi.concurrency import run_in_threadpool
+
+
+class EmbeddingBatcher:
+    """
+    Micro-batching dinâmico para o wav2vec2.
+
+    Requisições concorrentes entram em uma fila; o laço de fundo junta o que
+    chegar em até ``max_wait_ms`` (ou ``max_batch_size`` itens), roda
+    ``embed_fn`` uma única vez para o lote inteiro e devolve cada embedding
+    para a requisição que o pediu.
+    """
+
+    def __init__(self, embed_fn, max_batch_size=16, max_wait_ms=5.0):
+        self.embed_fn = embed_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = None
+        self._task = None
+        # Lote já retirado da fila (coletando ou em embed_fn)
+        self._batch = []
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # O lote em andamento já saiu da fila: sem isto, quem o espera nunca
+        # receberia resposta
+        pending, self._batch = self._batch, []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Serviço de voz encerrando."))
+
+    async def embed(self, waveform):
+        if self._task is None:
+            # Sem laço de fundo (ex.: uso fora do app): processa sozinho
+            return (await run_in_threadpool(self.embed_fn, [waveform]))[0]
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((waveform, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        self._batch = batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            waveforms = [waveform for waveform, _ in batch]
+
+            try:
+                embeddings = await run_in_threadpool(self.embed_fn, waveforms)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                self._batch = []
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+            self._batch = []
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+
+def batcher_from_env(embed_fn):
+    return EmbeddingBatcher(
+        embed_fn,
+        max_batch_size=int(os.getenv("VOICE_BATCH_MAX_SIZE", "16")),
+        max_wait_ms=float(os.getenv("VOICE_BATCH_MAX_WAIT_MS", "5")),
+    )
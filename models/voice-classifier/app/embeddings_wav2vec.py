@@ -1,3 +1,6 @@
+import threading
+import time
+
 import torch
 import librosa
 import numpy as np
@@ -5,24 +8,212 @@ import pandas as pd
 from transformers import Wav2Vec2Processor, Wav2Vec2Model
 import os
 
+from .audio import DURATION, SAMPLE_RATE
+
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
-processor = Wav2Vec2Processor.from_pretrained("facebook/wav2vec2-base-960h")
-model = Wav2Vec2Model.from_pretrained("facebook/wav2vec2-base-960h").to(DEVICE)
+MODEL_NAME = "facebook/wav2vec2-base-960h"
 
+EMBEDDING_BACKEND = os.getenv("VOICE_EMBEDDING_BACKEND", "torch")
+ONNX_PATH = os.getenv(
+    "VOICE_ONNX_PATH",
+    os.path.join(os.path.dirname(__file__), "..", "artifacts", "wav2vec2.onnx"),
+)
 
-def extract_wav2vec_embedding(file_path, sr=16000, duration=5.0):
-    y, _ = librosa.load(file_path, sr=sr, mono=True)
+
+class TorchBackend:
+    """wav2vec2 original em PyTorch fp32."""
+
+    name = "torch"
+
+    def __init__(self):
+        self.model = Wav2Vec2Model.from_pretrained(MODEL_NAME).to(DEVICE)
+        self.model.eval()
+
+    def __call__(self, input_values):
+        with torch.no_grad():
+            outputs = self.model(torch.from_numpy(input_values).to(DEVICE))
+            return outputs.last_hidden_state.mean(dim=1).cpu().numpy()
+
+
+class QuantizedTorchBackend(TorchBackend):
+    """Quantização dinâmica int8 das camadas lineares (somente CPU)."""
+
+    name = "torch-int8"
+
+    def __init__(self):
+        model = Wav2Vec2Model.from_pretrained(MODEL_NAME)
+        model.eval()
+        self.model = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+
+    def __call__(self, input_values):
+        with torch.no_grad():
+            outputs = self.model(torch.from_numpy(input_values))
+            return outputs.last_hidden_state.mean(dim=1).numpy()
+
+
+class OnnxBackend:
+    """Grafo exportado para ONNX Runtime (CPU). Exporta na primeira vez se o
+    arquivo em VOICE_ONNX_PATH ainda não existir."""
+
+    name = "onnx"
+
+    def __init__(self, path=ONNX_PATH):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise RuntimeError(
+                "O backend 'onnx' requer o pacote onnxruntime instalado."
+            ) from e
+
+        if not os.path.exists(path):
+            export_onnx(path)
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = (
+            onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        )
+        self.session = onnxruntime.InferenceSession(
+            path, options, providers=["CPUExecutionProvider"]
+        )
+
+    def __call__(self, input_values):
+        (last_hidden_state,) = self.session.run(
+            ["last_hidden_state"], {"input_values": input_values}
+        )
+        return last_hidden_state.mean(axis=1)
+
+
+def export_onnx(path=ONNX_PATH):
+    model = Wav2Vec2Model.from_pretrained(MODEL_NAME)
+    model.eval()
+    model.config.return_dict = False
+    dummy = torch.zeros(1, int(SAMPLE_RATE * DURATION), dtype=torch.float32)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    torch.onnx.export(
+        model,
+        (dummy,),
+        tmp_path,
+        input_names=["input_values"],
+        output_names=["last_hidden_state"],
+        dynamic_axes={
+            "input_values": {0: "batch", 1: "samples"},
+            "last_hidden_state": {0: "batch", 1: "frames"},
+        },
+        opset_version=17,
+        dynamo=False,
+    )
+    os.replace(tmp_path, path)
+    return path
+
+
+BACKENDS = {
+    TorchBackend.name: TorchBackend,
+    QuantizedTorchBackend.name: QuantizedTorchBackend,
+    OnnxBackend.name: OnnxBackend,
+}
+
+
+def create_backend(name):
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Backend de embedding desconhecido: '{name}'. Use um de {list(BACKENDS)}."
+        )
+    return BACKENDS[name]()
+
+
+# Carregados uma única vez por load_model() (no startup ou na primeira chamada)
+processor = None
+backend = None
+_load_lock = threading.Lock()
+
+metrics = {
+    "model_name": MODEL_NAME,
+    "backend": EMBEDDING_BACKEND,
+    "device": DEVICE,
+    "load_seconds": None,
+    "warmup_seconds": None,
+    "loaded_at": None,
+    "ready": False,
+    "warmup_error": None,
+}
+
+
+def get_processor():
+    global processor
+    if processor is None:
+        processor = Wav2Vec2Processor.from_pretrained(MODEL_NAME)
+    return processor
+
+
+def load_model():
+    global backend
+    if backend is not None:
+        return
+
+    with _load_lock:
+        if backend is not None:
+            return
+        start = time.perf_counter()
+        get_processor()
+        backend = create_backend(EMBEDDING_BACKEND)
+        metrics["load_seconds"] = time.perf_counter() - start
+        metrics["loaded_at"] = time.time()
+
+
+def warmup():
+    """Carrega o modelo e roda uma inferência em um buffer sintético de 5 s,
+    para que a primeira requisição real não pague o custo do PyTorch frio.
+    Uma falha é registrada em ``metrics["warmup_error"]`` pelo chamador."""
+    load_model()
+    start = time.perf_counter()
+    synthetic = np.random.default_rng(0).normal(0, 0.01, int(SAMPLE_RATE * DURATION))
+    embed_waveform(synthetic.astype(np.float32))
+    metrics["warmup_seconds"] = time.perf_counter() - start
+    metrics["ready"] = True
+
+
+def is_ready():
+    return metrics["ready"]
+
+
+def _fit_window(y, sr, duration):
     max_len = int(sr * duration)
     if len(y) > max_len:
         y = y[:max_len]
     elif len(y) < max_len:
         y = np.pad(y, (0, max_len - len(y)))
+    return y
+
+
+def embed_batch(waveforms, sr=SAMPLE_RATE, duration=DURATION, embedder=None):
+    """Recorta/preenche cada sinal para a janela fixa e extrai os embeddings
+    (média do last_hidden_state) de todos em uma única passada do modelo.
+    ``embedder`` permite usar outro backend que não o configurado."""
+    if embedder is None:
+        load_model()
+        embedder = backend
+    batch = [_fit_window(y, sr, duration) for y in waveforms]
+
+    inputs = get_processor()(batch, sampling_rate=sr, return_tensors="np", padding=True)
+    embs = embedder(inputs.input_values.astype(np.float32))
+    return list(embs)
+
+
+def embed_waveform(y, sr=SAMPLE_RATE, duration=DURATION):
+    return embed_batch([y], sr, duration)[0].flatten()
+
+
+def load_waveform(file_path, sr=SAMPLE_RATE):
+    y, _ = librosa.load(file_path, sr=sr, mono=True)
+    return y
+
 
-    inputs = processor(y, sampling_rate=sr, return_tensors="pt", padding=True)
-    with torch.no_grad():
-        outputs = model(inputs.input_values.to(DEVICE))
-        emb = outputs.last_hidden_state.mean(dim=1).cpu().numpy().flatten()
-    return emb
+def extract_wav2vec_embedding(file_path, sr=SAMPLE_RATE, duration=DURATION):
+    return embed_waveform(load_waveform(file_path, sr), sr, duration)
 
 
 def build_embeddings(base_path="data/raw/data_italian", sr=16000, duration=5.0):
@@ -1,23 +1,63 @@
-import tempfile
-import shutil
-import os
+import asyncio
 import traceback
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, UploadFile, HTTPException, File
-from .predictor import predict_audio
+from fastapi.concurrency import run_in_threadpool
+from prediction_cache import cache_from_env
+from .audio import decode_audio
+from .batcher import batcher_from_env
+from .embeddings_wav2vec import embed_batch, is_ready, metrics, warmup
+from .predictor import model_version, predict_from_embedding
 
-app = FastAPI()
+prediction_cache = cache_from_env("VOICE")
+embedding_batcher = batcher_from_env(embed_batch)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Descarta do disco o cache de versões anteriores dos artefatos
+    prediction_cache.use_version(model_version)
+    # Carrega o wav2vec2 e faz o warmup em segundo plano: "/" já responde
+    # (liveness) enquanto "/ready" só fica OK depois da primeira inferência
+    warmup_task = asyncio.create_task(run_in_threadpool(warmup))
+    warmup_task.add_done_callback(_on_warmup_done)
+    embedding_batcher.start()
+    yield
+    await embedding_batcher.stop()
+    warmup_task.cancel()
+
+
+def _on_warmup_done(task):
+    # Sem este callback, uma falha no warmup só apareceria no coletor de lixo
+    if task.cancelled():
+        return
+    error = task.exception()
+    if error is None:
+        return
+    traceback.print_exception(error)
+    metrics["warmup_error"] = f"{type(error).__name__}: {error}"
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 @app.post("/predict/voice")
 async def predict_voice_endpoint(audio: UploadFile = File(...)):
-    tmp_path = None
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-            shutil.copyfileobj(audio.file, tmp)
-            tmp_path = tmp.name
+        audio_bytes = await audio.read()
+
+        cache_key = prediction_cache.make_key(audio_bytes)
+        result = await run_in_threadpool(prediction_cache.get, model_version, cache_key)
+        if result is not None:
+            return result
 
-        result = predict_audio(tmp_path)
+        # Aceita o WebM/Opus bruto do navegador; sem arquivos temporários
+        waveform = await run_in_threadpool(decode_audio, audio_bytes)
+        # Requisições simultâneas compartilham uma única passada do wav2vec2
+        embedding = await embedding_batcher.embed(waveform)
+        result = predict_from_embedding(embedding.flatten())
 
+        await run_in_threadpool(prediction_cache.set, model_version, cache_key, result)
         return result
 
     except Exception as e:
@@ -26,9 +66,31 @@ async def predict_voice_endpoint(audio: UploadFile = File(...)):
             status_code=500, detail=f"Erro interno no servidor: {str(e)}"
         )
 
-    finally:
-        if tmp_path and os.path.exists(tmp_path):
-            os.unlink(tmp_path)
+
+@app.get("/ready")
+def readiness_probe():
+    if metrics["warmup_error"]:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Falha no warmup do modelo de voz: {metrics['warmup_error']}",
+        )
+    if not is_ready():
+        raise HTTPException(status_code=503, detail="Modelo de voz ainda não está pronto.")
+    return {"status": "ready"}
+
+
+@app.get("/metrics")
+def get_metrics():
+    return {
+        "model": metrics,
+        "batching": embedding_batcher.stats(),
+        "cache": prediction_cache.stats(),
+    }
+
+
+@app.get("/cache")
+def get_cache_stats():
+    return prediction_cache.stats()
 
 
 @app.get("/")
@@ -2,37 +2,51 @@
 
 import joblib
 import os
+from prediction_cache import artifacts_fingerprint
+from .embeddings_wav2vec import EMBEDDING_BACKEND, MODEL_NAME
 from .embeddings_wav2vec import extract_wav2vec_embedding as extract_embeddings
 
 artifacts_path = os.path.join(os.path.dirname(__file__), "..", "artifacts")
+# Versão dos artefatos efetivamente carregados (usada como chave do cache)
+model_version = (
+    f"{artifacts_fingerprint(artifacts_path)}-{MODEL_NAME.replace('/', '_')}"
+    f"-{EMBEDDING_BACKEND}"
+)
 model = joblib.load(os.path.join(artifacts_path, "svm_rbf_wav2vec.joblib"))
 label_encoder = joblib.load(os.path.join(artifacts_path, "label_encoder.joblib"))
 
 
-def predict_audio(file_path: str):
+def predict_from_embedding(features):
     """
-    Prevê a probabilidade de Parkinson a partir de um arquivo de áudio
-    e retorna o resultado no formato esperado pelo backend.
+    Classifica um embedding wav2vec2 já extraído e retorna o resultado
+    no formato esperado pelo backend.
     """
-    try:
-        features = extract_embeddings(file_path)
-        features_2d = features.reshape(1, -1)
+    features_2d = features.reshape(1, -1)
+
+    prediction_encoded = model.predict(features_2d)
+    prediction_label = label_encoder.inverse_transform(prediction_encoded)[0]
+
+    probability_pd = model.predict_proba(features_2d)[0][1]
 
-        prediction_encoded = model.predict(features_2d)
-        prediction_label = label_encoder.inverse_transform(prediction_encoded)[0]
+    # Traduzir o label para português
+    label_traduzido = "Saudável" if prediction_label == "HC" else "Parkinson"
 
-        probability_pd = model.predict_proba(features_2d)[0][1]
+    analysis_text = (
+        f"A análise vocal indica uma probabilidade de {probability_pd:.2%} "
+        f"de apresentar características associadas à Doença de Parkinson. "
+        f"O modelo classificou a amostra como {label_traduzido}."
+    )
 
-        # Traduzir o label para português
-        label_traduzido = "Saudável" if prediction_label == "HC" else "Parkinson"
+    return {"score": float(probability_pd), "analysis": analysis_text}
 
-        analysis_text = (
-            f"A análise vocal indica uma probabilidade de {probability_pd:.2%} "
-            f"de apresentar características associadas à Doença de Parkinson. "
-            f"O modelo classificou a amostra como {label_traduzido}."
-        )
 
-        return {"score": float(probability_pd), "analysis": analysis_text}
+def predict_audio(file_path: str):
+    """
+    Prevê a probabilidade de Parkinson a partir de um arquivo de áudio
+    e retorna o resultado no formato esperado pelo backend.
+    """
+    try:
+        return predict_from_embedding(extract_embeddings(file_path))
 
     except Exception as e:
         print(f"Erro durante a predição: {e}")
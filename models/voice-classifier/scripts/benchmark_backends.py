@@ -0,0 +1,105 @@
+"""
+Compara os backends de embedding do wav2vec2 (latência e memória).
+
+Cada backend roda em um subprocesso próprio, para que o RSS medido seja só
+dele. Uso (a partir de models/voice-classifier):
+
+    python -m scripts.benchmark_backends --runs 20 --batch-size 8
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+
+def _rss_mb():
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / 1024**2
+
+
+def _measure(backend_name, runs, batch_size):
+    from app import embeddings_wav2vec as emb
+
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    embedder = emb.create_backend(backend_name)
+    emb.get_processor()
+    load_seconds = time.perf_counter() - start
+
+    rng = np.random.default_rng(0)
+    clip = rng.normal(0, 0.05, int(emb.SAMPLE_RATE * emb.DURATION)).astype(np.float32)
+
+    def _latencies(n_clips):
+        emb.embed_batch([clip] * n_clips, embedder=embedder)  # warmup
+        samples = []
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            emb.embed_batch([clip] * n_clips, embedder=embedder)
+            samples.append((time.perf_counter() - t0) * 1000)
+        samples.sort()
+        return {
+            "p50_ms": statistics.median(samples),
+            "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+            "per_clip_ms": statistics.median(samples) / n_clips,
+        }
+
+    return {
+        "backend": backend_name,
+        "load_seconds": load_seconds,
+        "rss_mb": _rss_mb(),
+        "rss_delta_mb": _rss_mb() - rss_before,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "batch_1": _latencies(1),
+        f"batch_{batch_size}": _latencies(batch_size),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backends", nargs="+", default=["torch", "torch-int8", "onnx"])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--single", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(_measure(args.single, args.runs, args.batch_size)))
+        return
+
+    for backend_name in args.backends:
+        proc = subprocess.run(
+            [
+                sys.executable, "-m", "scripts.benchmark_backends",
+                "--single", backend_name,
+                "--runs", str(args.runs),
+                "--batch-size", str(args.batch_size),
+            ],
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            print(f"[{backend_name}] falhou:\n{proc.stderr.strip()}")
+            continue
+
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        batch_key = f"batch_{args.batch_size}"
+        print(
+            f"[{backend_name}] load {result['load_seconds']:.1f}s | "
+            f"RSS {result['rss_mb']:.0f} MB (pico {result['peak_rss_mb']:.0f} MB) | "
+            f"1 clip p50 {result['batch_1']['p50_ms']:.0f} ms "
+            f"p95 {result['batch_1']['p95_ms']:.0f} ms | "
+            f"{args.batch_size} clips p50 {result[batch_key]['p50_ms']:.0f} ms "
+            f"({result[batch_key]['per_clip_ms']:.0f} ms/clip)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import io
+
+import av
+import numpy as np
+import pytest
+
+from app.audio import DURATION, SAMPLE_RATE, decode_audio
+
+
+def _encode_audio(container_format, codec, rate, seconds, layout="stereo"):
+    """Senoide de 220 Hz codificada em memória com o PyAV."""
+    buffer = io.BytesIO()
+    with av.open(buffer, "w", format=container_format) as container:
+        stream = container.add_stream(codec, rate=rate, layout=layout)
+        channels = stream.codec_context.layout.nb_channels
+        frame_size = stream.codec_context.frame_size or 1024
+        t = np.arange(int(rate * seconds)) / rate
+        signal = (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+        for start in range(0, len(signal), frame_size):
+            chunk = np.tile(signal[start : start + frame_size], (channels, 1))
+            frame = av.AudioFrame.from_ndarray(chunk, format="fltp", layout=layout)
+            frame.rate = rate
+            frame.pts = start
+            container.mux(stream.encode(frame))
+        container.mux(stream.encode(None))
+    return buffer.getvalue()
+
+
+def _encode_video_only():
+    buffer = io.BytesIO()
+    with av.open(buffer, "w", format="avi") as container:
+        stream = container.add_stream("mpeg4", rate=10)
+        stream.width, stream.height, stream.pix_fmt = 32, 32, "yuv420p"
+        for i in range(3):
+            frame = av.VideoFrame.from_ndarray(
+                np.zeros((32, 32, 3), dtype=np.uint8), format="rgb24"
+            )
+            frame.pts = i
+            container.mux(stream.encode(frame))
+        container.mux(stream.encode(None))
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize(
+    ("container_format", "codec", "rate"),
+    [("wav", "pcm_f32le", 44100), ("webm", "libopus", 48000)],
+)
+def test_decodes_to_16khz_mono_float32(container_format, codec, rate):
+    data = _encode_audio(container_format, codec, rate, seconds=2)
+
+    waveform = decode_audio(data)
+
+    assert waveform.dtype == np.float32
+    assert waveform.ndim == 1
+    # 2 s a 16 kHz (o Opus pode perder alguns ms de pré-roll)
+    assert abs(len(waveform) - 2 * SAMPLE_RATE) <= 0.05 * SAMPLE_RATE
+    assert 0.1 < np.abs(waveform).max() <= 1.0
+
+
+def test_stops_at_duration():
+    data = _encode_audio("wav", "pcm_f32le", 44100, seconds=DURATION + 3)
+
+    waveform = decode_audio(data)
+
+    assert len(waveform) == int(SAMPLE_RATE * DURATION)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [_encode_video_only(), _encode_audio("wav", "pcm_f32le", 16000, seconds=0)],
+    ids=["video-only", "empty-wav"],
+)
+def test_input_without_audio_raises_value_error(data):
+    with pytest.raises(ValueError):
+        decode_audio(data)
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+
+from app.batcher import EmbeddingBatcher
+
+
+class StubEmbedder:
+    """Devolve 10x cada entrada e registra o tamanho de cada lote."""
+
+    def __init__(self, error=None):
+        self.batch_sizes = []
+        self.error = error
+
+    def __call__(self, waveforms):
+        self.batch_sizes.append(len(waveforms))
+        if self.error is not None:
+            raise self.error
+        return [waveform * 10 for waveform in waveforms]
+
+
+async def _embed_all(batcher, waveforms):
+    batcher.start()
+    try:
+        return await asyncio.gather(
+            *(batcher.embed(waveform) for waveform in waveforms), return_exceptions=True
+        )
+    finally:
+        await batcher.stop()
+
+
+def test_concurrent_requests_share_one_call():
+    embedder = StubEmbedder()
+    batcher = EmbeddingBatcher(embedder, max_batch_size=16, max_wait_ms=50)
+
+    results = asyncio.run(_embed_all(batcher, range(5)))
+
+    assert embedder.batch_sizes == [5]
+    assert batcher.stats()["largest_batch"] == 5
+    assert results == [0, 10, 20, 30, 40]
+
+
+def test_batch_splits_at_max_batch_size():
+    embedder = StubEmbedder()
+    batcher = EmbeddingBatcher(embedder, max_batch_size=2, max_wait_ms=50)
+
+    results = asyncio.run(_embed_all(batcher, range(5)))
+
+    assert embedder.batch_sizes == [2, 2, 1]
+    assert results == [0, 10, 20, 30, 40]
+
+
+def test_each_result_goes_to_its_request():
+    embedder = StubEmbedder()
+    batcher = EmbeddingBatcher(embedder, max_batch_size=3, max_wait_ms=50)
+    waveforms = [7, 3, 9, 1, 5, 8, 2]
+
+    results = asyncio.run(_embed_all(batcher, waveforms))
+
+    assert results == [waveform * 10 for waveform in waveforms]
+
+
+def test_error_reaches_every_waiter_of_the_batch():
+    error = RuntimeError("falha no wav2vec2")
+    batcher = EmbeddingBatcher(StubEmbedder(error), max_batch_size=16, max_wait_ms=50)
+
+    results = asyncio.run(_embed_all(batcher, range(3)))
+
+    assert results == [error, error, error]
+
+
+def test_stop_fails_the_batch_in_flight():
+    started, release = threading.Event(), threading.Event()
+
+    def blocking_embed(waveforms):
+        started.set()
+        release.wait(5)
+        return waveforms
+
+    async def run():
+        batcher = EmbeddingBatcher(blocking_embed, max_batch_size=2, max_wait_ms=1)
+        batcher.start()
+        requests = [asyncio.create_task(batcher.embed(i)) for i in range(3)]
+        while not started.is_set():
+            await asyncio.sleep(0.001)
+        await batcher.stop()
+        return await asyncio.gather(*requests, return_exceptions=True)
+
+    try:
+        results = asyncio.run(asyncio.wait_for(run(), 5))
+    finally:
+        release.set()
+
+    # Os dois do lote em andamento e o que ainda estava na fila
+    assert [str(result) for result in results] == ["Serviço de voz encerrando."] * 3
+    assert all(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from app import embeddings_wav2vec as emb  # noqa: E402
+from app.predictor import predict_from_embedding  # noqa: E402
+
+# Diferença máxima aceita na probabilidade final do svm_rbf_wav2vec.joblib
+PROBABILITY_TOLERANCE = 0.05
+# Similaridade mínima entre o embedding quantizado e o fp32
+COSINE_TOLERANCE = 0.98
+
+
+def _synthetic_voices():
+    """Vogais sintéticas (fundamental + harmônicos + jitter) de 5 s a 16 kHz."""
+    rng = np.random.default_rng(42)
+    t = np.arange(int(emb.SAMPLE_RATE * emb.DURATION)) / emb.SAMPLE_RATE
+    voices = []
+    for f0 in (110.0, 165.0, 220.0):
+        jitter = 1 + 0.01 * np.sin(2 * np.pi * 5 * t)
+        signal = sum(
+            np.sin(2 * np.pi * f0 * k * jitter * t) / k for k in range(1, 6)
+        )
+        signal += rng.normal(0, 0.02, t.shape)
+        voices.append((0.3 * signal / np.abs(signal).max()).astype(np.float32))
+    return voices
+
+
+@pytest.fixture(scope="module")
+def fp32_embeddings():
+    return emb.embed_batch(_synthetic_voices(), embedder=emb.create_backend("torch"))
+
+
+def _cosine(a, b):
+    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+@pytest.mark.parametrize("backend_name", ["torch-int8", "onnx"])
+def test_backend_matches_fp32(backend_name, fp32_embeddings):
+    if backend_name == "onnx":
+        pytest.importorskip("onnxruntime")
+
+    candidate = emb.embed_batch(
+        _synthetic_voices(), embedder=emb.create_backend(backend_name)
+    )
+
+    for reference, embedding in zip(fp32_embeddings, candidate):
+        assert _cosine(reference, embedding) >= COSINE_TOLERANCE
+
+        reference_score = predict_from_embedding(reference)["score"]
+        score = predict_from_embedding(embedding)["score"]
+        assert abs(reference_score - score) <= PROBABILITY_TOLERANCE
+
+
+def test_batch_matches_single_clip(fp32_embeddings):
+    voices = _synthetic_voices()
+    single = emb.embed_batch(voices[:1], embedder=emb.create_backend("torch"))[0]
+
+    np.testing.assert_allclose(single, fp32_embeddings[0], rtol=1e-4, atol=1e-4)
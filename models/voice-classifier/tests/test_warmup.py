@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app import main  # noqa: E402
+
+
+async def _failed_warmup():
+    raise RuntimeError("sem memória")
+
+
+def test_warmup_failure_is_recorded_and_reported(monkeypatch):
+    monkeypatch.setitem(main.metrics, "warmup_error", None)
+
+    async def run():
+        task = asyncio.create_task(_failed_warmup())
+        task.add_done_callback(main._on_warmup_done)
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run())
+    response = TestClient(main.app).get("/ready")
+
+    assert main.metrics["warmup_error"] == "RuntimeError: sem memória"
+    assert "error" not in main.metrics
+    assert response.status_code == 503
+    assert "sem memória" in response.json()["detail"]
@@ -22,6 +22,10 @@ COMMENT ON TYPE bind_enum IS 'Status do vínculo médico-paciente: PENDING (agua
 CREATE TYPE test_type_enum AS ENUM ('SPIRAL_TEST', 'VOICE_TEST');
 COMMENT ON TYPE test_type_enum IS 'Tipo de teste: SPIRAL_TEST (desenho de espiral), VOICE_TEST (análise de voz)';
 
+-- Estado de processamento do teste
+CREATE TYPE test_status_enum AS ENUM ('PENDING', 'PROCESSING', 'COMPLETED', 'FAILED');
+COMMENT ON TYPE test_status_enum IS 'Estado do teste: PENDING (na fila), PROCESSING (em inferência), COMPLETED (com resultado), FAILED (falhou)';
+
 -- Método de captura do teste de espiral
 CREATE TYPE spiral_methods_enum AS ENUM ('WEBCAM', 'PAPER');
 COMMENT ON TYPE spiral_methods_enum IS 'Método de captura da espiral: WEBCAM (tempo real via webcam), PAPER (foto de desenho em papel)';
@@ -229,15 +233,21 @@ CREATE TABLE IF NOT EXISTS "test" (
   "patient_id" INTEGER NOT NULL REFERENCES "patient"(id) ON DELETE CASCADE,
   "doctor_id" INTEGER NOT NULL REFERENCES "doctor"(id) ON DELETE CASCADE,
   "execution_date" TIMESTAMPTZ NOT NULL,
-  "score" REAL NOT NULL,
+  "score" REAL DEFAULT NULL,
   "type" test_type_enum NOT NULL,
+  -- Fila de processamento assíncrono
+  "status" test_status_enum NOT NULL DEFAULT 'COMPLETED',
+  "attempts" INTEGER NOT NULL DEFAULT 0,
+  "available_at" TIMESTAMPTZ DEFAULT NULL,
+  "error_message" TEXT DEFAULT NULL,
   -- Campos de auditoria
   "created_at" TIMESTAMPTZ NOT NULL DEFAULT NOW(),
   "updated_at" TIMESTAMPTZ NOT NULL DEFAULT NOW(),
   "deleted_at" TIMESTAMPTZ DEFAULT NULL,
 
   -- Validações
-  CONSTRAINT valid_score CHECK (score >= 0 AND score <= 1)
+  CONSTRAINT valid_score CHECK (score >= 0 AND score <= 1),
+  CONSTRAINT completed_test_has_score CHECK (status <> 'COMPLETED' OR score IS NOT NULL)
 );
 
 COMMENT ON TABLE "test" IS 'Tabela base de testes de diagnóstico de Parkinson (voice_test e spiral_test)';
@@ -245,6 +255,8 @@ COMMENT ON COLUMN "test"."score" IS 'Probability of being HEALTHY (0.0-1.0): Hig
 COMMENT ON COLUMN "test"."execution_date" IS 'Data e hora de execução do teste';
 COMMENT ON COLUMN "test"."doctor_id" IS 'ID do médico que conduziu o teste clínico';
 COMMENT ON COLUMN "test"."deleted_at" IS 'Soft delete: data de remoção lógica do teste';
+COMMENT ON COLUMN "test"."status" IS 'Estado do processamento; apenas testes COMPLETED têm score';
+COMMENT ON COLUMN "test"."available_at" IS 'Quando o job pode ser (re)tentado; durante o processamento, fim do lease';
 
 -- -----------------------------------------------------
 -- Tabela: voice_test
@@ -253,10 +265,13 @@ COMMENT ON COLUMN "test"."deleted_at" IS 'Soft delete: data de remoção lógica
 CREATE TABLE IF NOT EXISTS "voice_test" (
   "id" INTEGER PRIMARY KEY REFERENCES "test" ("id") ON DELETE CASCADE,
   "record_duration" REAL NOT NULL,
+  "voice_audio_key" CHAR(64) DEFAULT NULL,
+  "voice_audio_size" INTEGER DEFAULT NULL,
   "voice_audio_data" BYTEA DEFAULT NULL,
   "voice_audio_filename" VARCHAR(255) DEFAULT NULL,
   "voice_audio_content_type" VARCHAR(100) DEFAULT NULL,
   "raw_parkinson_probability" REAL DEFAULT NULL,
+  "voice_analysis" TEXT DEFAULT NULL,
 
   -- Validações
   CONSTRAINT positive_record_duration CHECK (record_duration > 0),
@@ -265,7 +280,8 @@ CREATE TABLE IF NOT EXISTS "voice_test" (
 
 COMMENT ON TABLE "voice_test" IS 'Teste de voz para diagnóstico de Parkinson (extends test)';
 COMMENT ON COLUMN "voice_test"."record_duration" IS 'Duração da gravação em segundos';
-COMMENT ON COLUMN "voice_test"."voice_audio_data" IS 'Dados binários do áudio - DADO DE SAÚDE';
+COMMENT ON COLUMN "voice_test"."voice_audio_key" IS 'SHA-256 do áudio no blob store - DADO DE SAÚDE';
+COMMENT ON COLUMN "voice_test"."voice_audio_data" IS 'Legado: dados binários do áudio anteriores ao blob store - DADO DE SAÚDE';
 COMMENT ON COLUMN "voice_test"."voice_audio_filename" IS 'Nome do arquivo de áudio original';
 COMMENT ON COLUMN "voice_test"."raw_parkinson_probability" IS 'Probabilidade original de Parkinson retornada pelo modelo (0.0-1.0)';
 
@@ -277,9 +293,13 @@ CREATE TABLE IF NOT EXISTS "spiral_test" (
   "id" INTEGER PRIMARY KEY REFERENCES "test" ("id") ON DELETE CASCADE,
   "draw_duration" REAL NOT NULL,
   "method" spiral_methods_enum NOT NULL,
+  "spiral_image_key" CHAR(64) DEFAULT NULL,
+  "spiral_image_size" INTEGER DEFAULT NULL,
   "spiral_image_data" BYTEA DEFAULT NULL,
   "spiral_image_filename" VARCHAR(255) DEFAULT NULL,
   "spiral_image_content_type" VARCHAR(100) DEFAULT NULL,
+  "spiral_thumb_key" CHAR(64) DEFAULT NULL,
+  "spiral_medium_key" CHAR(64) DEFAULT NULL,
   "model_predictions" JSONB DEFAULT NULL,
   "avg_parkinson_probability" REAL DEFAULT NULL,
   "majority_vote" VARCHAR(20) DEFAULT NULL,
@@ -307,7 +327,10 @@ CREATE TABLE IF NOT EXISTS "spiral_test" (
 COMMENT ON TABLE "spiral_test" IS 'Teste de desenho de espiral para diagnóstico de Parkinson (extends test)';
 COMMENT ON COLUMN "spiral_test"."draw_duration" IS 'Duração do desenho em segundos';
 COMMENT ON COLUMN "spiral_test"."method" IS 'Método de captura: WEBCAM (tempo real) ou PAPER (foto de papel)';
-COMMENT ON COLUMN "spiral_test"."spiral_image_data" IS 'Dados binários da imagem - DADO DE SAÚDE';
+COMMENT ON COLUMN "spiral_test"."spiral_image_key" IS 'SHA-256 da imagem no blob store - DADO DE SAÚDE';
+COMMENT ON COLUMN "spiral_test"."spiral_image_data" IS 'Legado: dados binários da imagem anteriores ao blob store - DADO DE SAÚDE';
+COMMENT ON COLUMN "spiral_test"."spiral_thumb_key" IS 'SHA-256 da miniatura WebP (160 px) no blob store';
+COMMENT ON COLUMN "spiral_test"."spiral_medium_key" IS 'SHA-256 da versão média WebP (640 px) no blob store';
 COMMENT ON COLUMN "spiral_test"."model_predictions" IS 'Previsões individuais dos 11 modelos em formato JSON - DADO DE SAÚDE';
 COMMENT ON COLUMN "spiral_test"."avg_parkinson_probability" IS 'Média das probabilidades de Parkinson de todos os modelos (0.0-1.0)';
 COMMENT ON COLUMN "spiral_test"."majority_vote" IS 'Decisão por voto majoritário: HEALTHY ou PARKINSON';
@@ -368,9 +391,10 @@ CREATE TABLE IF NOT EXISTS "doctor_document" (
   "doctor_id" INTEGER NOT NULL REFERENCES "doctor" ("id"),
   "document_type" document_type_enum NOT NULL DEFAULT 'CRM_CERTIFICATE',
   "file_name" VARCHAR(255) NOT NULL,
-  "file_data" BYTEA NOT NULL,
   "file_size" INTEGER NOT NULL,  -- em bytes
   "mime_type" VARCHAR(100) NOT NULL,
+  "file_key" CHAR(64) DEFAULT NULL,
+  "file_data" BYTEA DEFAULT NULL,
   "uploaded_at" TIMESTAMPTZ NOT NULL DEFAULT NOW(),
   "verified" BOOLEAN NOT NULL DEFAULT FALSE,
   "verified_by_admin_id" INTEGER REFERENCES "admin" ("id"),
@@ -379,10 +403,43 @@ CREATE TABLE IF NOT EXISTS "doctor_document" (
 
 COMMENT ON TABLE "doctor_document" IS 'Documentos enviados pelos médicos para verificação';
 COMMENT ON COLUMN "doctor_document"."document_type" IS 'Tipo de documento enviado';
-COMMENT ON COLUMN "doctor_document"."file_data" IS 'Dados binários do documento';
+COMMENT ON COLUMN "doctor_document"."file_key" IS 'SHA-256 do documento no blob store';
+COMMENT ON COLUMN "doctor_document"."file_data" IS 'Legado: dados binários do documento anteriores ao blob store';
 COMMENT ON COLUMN "doctor_document"."verified" IS 'Indica se o documento foi verificado por um administrador';
 
 
+-- -----------------------------------------------------
+-- Tabela: cohort_aggregate
+-- -----------------------------------------------------
+-- Soma e contagem dos scores por coorte, para as estatísticas comparativas
+CREATE TABLE IF NOT EXISTS "cohort_aggregate" (
+  "age_group" VARCHAR(8) NOT NULL,
+  "gender" gender_enum NOT NULL,
+  "city" VARCHAR(100) NOT NULL,
+  "state" VARCHAR(20) NOT NULL,
+  "patient_count" INTEGER NOT NULL DEFAULT 0,
+  "score_sum" DOUBLE PRECISION NOT NULL DEFAULT 0,
+  "score_count" INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY ("age_group", "gender", "city", "state")
+);
+
+COMMENT ON TABLE "cohort_aggregate" IS 'Agregados dos pacientes que compartilham dados, por faixa etária, gênero, cidade e estado; recalculado diariamente por python -m infra.db.rebuild_cohorts';
+COMMENT ON COLUMN "cohort_aggregate"."patient_count" IS 'Pacientes da coorte que compartilham dados, com ou sem testes';
+COMMENT ON COLUMN "cohort_aggregate"."score_sum" IS 'Soma dos scores dos testes concluídos da coorte';
+
+-- -----------------------------------------------------
+-- Tabela: score_sketch_bucket
+-- -----------------------------------------------------
+-- Histogramas das médias por paciente, para o percentil das estatísticas comparativas
+CREATE TABLE IF NOT EXISTS "score_sketch_bucket" (
+  "sketch" VARCHAR(160) NOT NULL,
+  "bucket" SMALLINT NOT NULL,
+  "patients" INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY ("sketch", "bucket")
+);
+
+COMMENT ON TABLE "score_sketch_bucket" IS 'Baldes (largura 0.01) dos histogramas das médias por paciente: global e por faixa etária, gênero, estado e cidade';
+
 -- =====================================================
 -- 3. INDEXES FOR PERFORMANCE
 -- =====================================================
@@ -405,8 +462,9 @@ CREATE INDEX idx_test_patient_id ON test(patient_id);
 CREATE INDEX idx_test_doctor_id ON test(doctor_id);
 CREATE INDEX idx_test_type ON test(type);
 CREATE INDEX idx_test_execution_date ON test(execution_date DESC);
-CREATE INDEX idx_test_patient_date ON test(patient_id, execution_date DESC);
+CREATE INDEX idx_test_patient_date ON test(patient_id, execution_date DESC, id DESC);
 CREATE INDEX idx_test_not_deleted ON test(id) WHERE deleted_at IS NULL;
+CREATE INDEX idx_test_job_queue ON test(id) WHERE status IN ('PENDING', 'PROCESSING');
 
 -- Índices para tabela note
 CREATE INDEX idx_note_test_id ON note(test_id);
@@ -0,0 +1,23 @@
+-- =====================================================
+-- Migração: mídias no blob store
+-- =====================================================
+-- Para bancos criados antes do blob store; bancos novos já saem do init_database.sql.
+-- Depois de aplicar, mova os bytes existentes com (a partir de backend/):
+--   python -m infra.storage.migrate --batch-size 100
+-- e rode VACUUM FULL nas tabelas abaixo para devolver o espaço ao disco.
+
+ALTER TABLE "voice_test"
+  ADD COLUMN "voice_audio_key" CHAR(64) DEFAULT NULL,
+  ADD COLUMN "voice_audio_size" INTEGER DEFAULT NULL;
+
+ALTER TABLE "spiral_test"
+  ADD COLUMN "spiral_image_key" CHAR(64) DEFAULT NULL,
+  ADD COLUMN "spiral_image_size" INTEGER DEFAULT NULL;
+
+ALTER TABLE "doctor_document"
+  ADD COLUMN "file_key" CHAR(64) DEFAULT NULL,
+  ALTER COLUMN "file_data" DROP NOT NULL;
+
+COMMENT ON COLUMN "voice_test"."voice_audio_key" IS 'SHA-256 do áudio no blob store - DADO DE SAÚDE';
+COMMENT ON COLUMN "spiral_test"."spiral_image_key" IS 'SHA-256 da imagem no blob store - DADO DE SAÚDE';
+COMMENT ON COLUMN "doctor_document"."file_key" IS 'SHA-256 do documento no blob store';
@@ -0,0 +1,19 @@
+-- =====================================================
+-- Migração: agregados por coorte das estatísticas comparativas
+-- =====================================================
+-- Para bancos criados antes da tabela; bancos novos já saem do init_database.sql.
+-- Depois de aplicar, preencha a tabela (e agende diariamente, por causa dos
+-- aniversários que mudam a faixa etária):
+--
+--     cd backend && python -m infra.db.rebuild_cohorts
+
+CREATE TABLE IF NOT EXISTS "cohort_aggregate" (
+  "age_group" VARCHAR(8) NOT NULL,
+  "gender" gender_enum NOT NULL,
+  "city" VARCHAR(100) NOT NULL,
+  "state" VARCHAR(20) NOT NULL,
+  "patient_count" INTEGER NOT NULL DEFAULT 0,
+  "score_sum" DOUBLE PRECISION NOT NULL DEFAULT 0,
+  "score_count" INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY ("age_group", "gender", "city", "state")
+);
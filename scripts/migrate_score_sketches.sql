@@ -0,0 +1,14 @@
+-- =====================================================
+-- Migração: sketches do percentil das estatísticas comparativas
+-- =====================================================
+-- Para bancos criados antes da tabela; bancos novos já saem do init_database.sql.
+-- Depois de aplicar, preencha os sketches junto com os agregados por coorte:
+--
+--     cd backend && python -m infra.db.rebuild_cohorts
+
+CREATE TABLE IF NOT EXISTS "score_sketch_bucket" (
+  "sketch" VARCHAR(160) NOT NULL,
+  "bucket" SMALLINT NOT NULL,
+  "patients" INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY ("sketch", "bucket")
+);
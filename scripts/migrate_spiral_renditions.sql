@@ -0,0 +1,13 @@
+-- =====================================================
+-- Migração: miniaturas das imagens de espiral
+-- =====================================================
+-- Para bancos criados antes das miniaturas; bancos novos já saem do init_database.sql.
+-- Depois de aplicar, gere as miniaturas dos testes existentes com (a partir de backend/):
+--   python -m infra.storage.backfill_renditions --batch-size 50
+
+ALTER TABLE "spiral_test"
+  ADD COLUMN "spiral_thumb_key" CHAR(64) DEFAULT NULL,
+  ADD COLUMN "spiral_medium_key" CHAR(64) DEFAULT NULL;
+
+COMMENT ON COLUMN "spiral_test"."spiral_thumb_key" IS 'SHA-256 da miniatura WebP (160 px) no blob store';
+COMMENT ON COLUMN "spiral_test"."spiral_medium_key" IS 'SHA-256 da versão média WebP (640 px) no blob store';
@@ -0,0 +1,18 @@
+-- =====================================================
+-- Migração: fila de processamento assíncrono de testes
+-- =====================================================
+-- Para bancos criados antes da fila; bancos novos já saem do init_database.sql.
+
+CREATE TYPE test_status_enum AS ENUM ('PENDING', 'PROCESSING', 'COMPLETED', 'FAILED');
+
+ALTER TABLE "test"
+  ALTER COLUMN "score" DROP NOT NULL,
+  ADD COLUMN "status" test_status_enum NOT NULL DEFAULT 'COMPLETED',
+  ADD COLUMN "attempts" INTEGER NOT NULL DEFAULT 0,
+  ADD COLUMN "available_at" TIMESTAMPTZ DEFAULT NULL,
+  ADD COLUMN "error_message" TEXT DEFAULT NULL,
+  ADD CONSTRAINT completed_test_has_score CHECK (status <> 'COMPLETED' OR score IS NOT NULL);
+
+ALTER TABLE "voice_test" ADD COLUMN "voice_analysis" TEXT DEFAULT NULL;
+
+CREATE INDEX idx_test_job_queue ON test(id) WHERE status IN ('PENDING', 'PROCESSING');
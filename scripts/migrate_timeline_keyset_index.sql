@@ -0,0 +1,9 @@
+-- =====================================================
+-- Migração: índice da paginação da timeline
+-- =====================================================
+-- Para bancos criados antes da paginação; bancos novos já saem do init_database.sql.
+-- A timeline pagina por (execution_date, id): o id no índice desempata testes
+-- com a mesma data sem precisar ordenar a página em memória.
+
+DROP INDEX IF EXISTS idx_test_patient_date;
+CREATE INDEX idx_test_patient_date ON test(patient_id, execution_date DESC, id DESC);